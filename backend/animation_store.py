@@ -0,0 +1,129 @@
+"""
+Animations de l'avatar servies à la demande (/api/animation/<sign>, /api/animations).
+
+Le client téléchargeait toutes les animations d'un coup (asl_animations.js).
+Les fichiers .asla par signe (voir backend/utils/animation_format.py) sont lus
+à la première demande puis gardés dans un cache LRU en mémoire, indexé par
+(signe, etag) : une nouvelle version d'un signe ne sert jamais l'ancienne.
+Le manifeste est relu quand scripts/batch_process_videos.py ou
+scripts/convert_animations.py le réécrit.
+
+Lot de signes (format 'ASLB', little-endian) :
+    magic 'ASLB' | nb signes u16
+    par signe : longueur du nom u8 | nom utf-8 | longueur u32 | fichier .asla
+"""
+import os
+import time
+import struct
+import hashlib
+import logging
+
+from flask import current_app
+
+from backend.utils.cache import TTLCache
+from backend.utils.animation_format import MANIFEST_FILE, normalize_sign, load_manifest
+
+BATCH_MAGIC = b'ASLB'
+
+
+class AnimationStore:
+    def __init__(self, binary_dir, cache_size=256, poll_interval=30):
+        self.binary_dir = os.path.abspath(binary_dir)
+        self.manifest_path = os.path.join(self.binary_dir, MANIFEST_FILE)
+        self.poll_interval = poll_interval
+
+        self._signs = {}
+        self._mtime = None
+        self._checked_at = 0.0
+        self._blobs = TTLCache(maxsize=cache_size, ttl=0)
+
+    def load(self):
+        try:
+            self._mtime = os.stat(self.manifest_path).st_mtime
+        except OSError:
+            self._mtime = None
+        self._signs = load_manifest(self.binary_dir)
+        return self._signs
+
+    def _reload_if_changed(self):
+        now = time.monotonic()
+        if not self.poll_interval or now - self._checked_at < self.poll_interval:
+            return
+        self._checked_at = now
+        try:
+            mtime = os.stat(self.manifest_path).st_mtime
+        except OSError:
+            mtime = None
+        if mtime != self._mtime:
+            self.load()
+            logging.info(f"Manifeste des animations rechargé ({len(self._signs)} signes)")
+
+    def entry(self, sign):
+        """Entrée du manifeste (file, size, etag, duration, frames) ou None"""
+        self._reload_if_changed()
+        return self._signs.get(normalize_sign(sign))
+
+    def get(self, sign):
+        """(octets .asla, entrée) ou (None, None) si le signe n'a pas d'animation"""
+        entry = self.entry(sign)
+        if entry is None:
+            return None, None
+        key = (normalize_sign(sign), entry['etag'])
+        blob = self._blobs.get(key)
+        if blob is None:
+            try:
+                with open(os.path.join(self.binary_dir, entry['file']), 'rb') as f:
+                    blob = f.read()
+            except OSError as e:
+                logging.warning(f"Animation {sign} illisible: {e}")
+                return None, None
+            self._blobs.set(key, blob)
+        return blob, entry
+
+    def get_many(self, signs):
+        """({signe: octets}, etag du lot, signes manquants) dans l'ordre demandé, sans doublons"""
+        found, etags, missing = {}, [], []
+        for sign in signs:
+            name = normalize_sign(sign)
+            if name in found or name in missing:
+                continue
+            blob, entry = self.get(name)
+            if blob is None:
+                missing.append(name)
+                continue
+            found[name] = blob
+            etags.append(f"{name}:{entry['etag']}")
+        etag = hashlib.sha1(','.join(etags).encode('utf-8')).hexdigest()
+        return found, etag, missing
+
+    def stats(self):
+        stats = self._blobs.stats()
+        stats.update({'signs': len(self._signs), 'binary_dir': self.binary_dir})
+        return stats
+
+
+def pack_batch(blobs):
+    """{signe: octets .asla} -> conteneur ASLB"""
+    parts = [BATCH_MAGIC, struct.pack('<H', len(blobs))]
+    for sign, blob in blobs.items():
+        name = sign.encode('utf-8')
+        parts += [struct.pack('<B', len(name)), name, struct.pack('<I', len(blob)), blob]
+    return b''.join(parts)
+
+
+def init_app(app):
+    store = AnimationStore(
+        app.config['ANIMATION_BINARY_DIR'],
+        app.config.get('ANIMATION_CACHE_SIZE', 256),
+        app.config.get('SIGN_INDEX_POLL_INTERVAL', 30),
+    )
+    app.extensions['animation_store'] = store
+    store.load()
+    return store
+
+
+def get_animation_store():
+    store = current_app.extensions.get('animation_store')
+    if store is None:
+        store = init_app(current_app._get_current_object())
+    return store
@@ -12,6 +12,7 @@ try:
     sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
     from backend.config import config
+    from backend import database, prediction_log, spectrogram_jobs, warmup, sign_media, sign_sentences, animation_store, model_server
     from backend.server.routes import bp as main_bp
 
     load_dotenv()
@@ -47,16 +48,26 @@ def make_session_permanent():
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 os.makedirs('backend/static/audio', exist_ok=True) # Ensure static/audio exists
 
+# Pool de connexions MySQL, écriture différée des prédictions, jobs spectrogrammes
+database.init_app(app)
+prediction_log.init_app(app)
+spectrogram_jobs.init_app(app)
+
+# Modèles chargés à la demande, ou à l'avance selon MODEL_WARMUP ; serveur d'inférence optionnel
+model_server.init_app(app)
+warmup.init_app(app)
+
+# Index des vidéos de signes pour /api/video/<word>, cache des vidéos de phrases
+sign_media.init_app(app)
+sign_sentences.init_app(app)
+
+# Animations de l'avatar servies par signe (/api/animation/<sign>)
+animation_store.init_app(app)
+
 # Enregistrer le Blueprint
 app.register_blueprint(main_bp)
 
 if __name__ == '__main__':
-    from backend.utils.predict import load_model
-    try:
-        load_model()
-    except Exception as e:
-        print(f"Warning: Could not load model at startup: {e}")
-
     print("="*50)
     print("Démarrage du serveur...")
     print("L'application est accessible à l'adresse : http://127.0.0.1:5000")
@@ -1,9 +1,12 @@
 # Configuration de l'application Flask
 import os
 
+# Valeur de développement : refusée partout où SECRET_KEY sert d'authentification (serveur d'inférence)
+DEFAULT_SECRET_KEY = 'your-secret-key-change-in-production'
+
 class Config:
     """Configuration de base"""
-    SECRET_KEY = os.environ.get('SECRET_KEY') or 'your-secret-key-change-in-production'
+    SECRET_KEY = os.environ.get('SECRET_KEY') or DEFAULT_SECRET_KEY
     
     # Configuration MySQL
     MYSQL_HOST = os.environ.get('MYSQL_HOST') or 'localhost'
@@ -12,10 +15,77 @@ class Config:
     MYSQL_DATABASE = os.environ.get('MYSQL_DATABASE') or 'asl_recognition'
     MYSQL_PORT = int(os.environ.get('MYSQL_PORT') or 3306)
     
+    # Pool de connexions MySQL
+    MYSQL_POOL_SIZE = int(os.environ.get('MYSQL_POOL_SIZE') or 10)
+    MYSQL_POOL_MAX_LIFETIME = int(os.environ.get('MYSQL_POOL_MAX_LIFETIME') or 1800)  # secondes
+    MYSQL_POOL_TIMEOUT = float(os.environ.get('MYSQL_POOL_TIMEOUT') or 5)  # attente max d'une connexion
+    MYSQL_POOL_PING_INTERVAL = float(os.environ.get('MYSQL_POOL_PING_INTERVAL') or 5)  # ping si inactive depuis
+    
     # Configuration Flask
     UPLOAD_FOLDER = 'uploads'
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB
     
+    # Écriture différée des prédictions (file bornée + insertions par lots)
+    PREDICTION_LOG_BATCH_SIZE = int(os.environ.get('PREDICTION_LOG_BATCH_SIZE') or 100)
+    PREDICTION_LOG_FLUSH_MS = int(os.environ.get('PREDICTION_LOG_FLUSH_MS') or 500)
+    PREDICTION_LOG_QUEUE_SIZE = int(os.environ.get('PREDICTION_LOG_QUEUE_SIZE') or 10000)
+    PREDICTION_LOG_PUT_TIMEOUT = 0.05  # attente max si la file est pleine avant écriture disque
+    PREDICTION_LOG_SPILL_DIR = os.environ.get('PREDICTION_LOG_SPILL_DIR') or 'prediction_spill'
+    
+    # Export incrémental (/api/powerbi/export?since=) : lignes insérées depuis au moins N secondes,
+    # pour qu'une transaction encore ouverte ne soit jamais dépassée par le curseur
+    EXPORT_COMMIT_LAG = int(os.environ.get('EXPORT_COMMIT_LAG') or 10)
+    
+    # Cache des profils utilisateurs (context processor des templates)
+    PROFILE_CACHE_SIZE = int(os.environ.get('PROFILE_CACHE_SIZE') or 1024)
+    PROFILE_CACHE_TTL = int(os.environ.get('PROFILE_CACHE_TTL') or 300)  # secondes
+    
+    # Spectrogrammes d'entraînement calculés en arrière-plan (pool de processus)
+    SPECTROGRAM_WORKERS = int(os.environ.get('SPECTROGRAM_WORKERS') or 2)
+    SPECTROGRAM_JOB_DIR = os.environ.get('SPECTROGRAM_JOB_DIR') or 'spectrogram_jobs'
+    
+    # Préchargement des modèles TensorFlow : off | background | blocking
+    MODEL_WARMUP = os.environ.get('MODEL_WARMUP') or 'off'
+    
+    # Serveur d'inférence partagé (python -m backend.model_server) ; vide = modèles dans chaque worker.
+    # Le socket est créé dans un dossier privé (0700) ; SECRET_KEY doit être défini.
+    MODEL_SERVER_SOCKET = os.environ.get('MODEL_SERVER_SOCKET') or ''
+    # Serveur injoignable : 1 = inférence dans le worker (charge TensorFlow), 0 = la prédiction échoue
+    MODEL_SERVER_FALLBACK = (os.environ.get('MODEL_SERVER_FALLBACK') or '1') == '1'
+    
+    # Registre des modèles versionnés (backend/model/<nom>/<version>/model.h5)
+    MODEL_DIR = os.environ.get('MODEL_DIR') or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'model')
+    MODEL_REGISTRY_POLL_INTERVAL = int(os.environ.get('MODEL_REGISTRY_POLL_INTERVAL') or 30)  # secondes, 0 = désactivé
+    
+    # Runtime TensorFlow (voir backend/utils/tf_runtime.py)
+    TF_INTRA_OP_THREADS = int(os.environ.get('TF_INTRA_OP_THREADS') or 0)  # 0 = défaut TF (tous les coeurs)
+    TF_INTER_OP_THREADS = int(os.environ.get('TF_INTER_OP_THREADS') or 0)
+    TF_CPU_AFFINITY = os.environ.get('TF_CPU_AFFINITY') or ''  # ex. "0-3"
+    TF_ENABLE_ONEDNN = os.environ.get('TF_ENABLE_ONEDNN') or ''  # "1" / "0", vide = défaut TF
+    
+    # Index des vidéos de signes (train/<mot>/*.mp4)
+    SIGN_VIDEO_DIR = os.environ.get('SIGN_VIDEO_DIR') or ''  # vide = <racine>/train
+    SIGN_INDEX_PATH = os.environ.get('SIGN_INDEX_PATH') or 'sign_media_index.json'
+    SIGN_INDEX_POLL_INTERVAL = int(os.environ.get('SIGN_INDEX_POLL_INTERVAL') or 30)  # secondes, 0 = désactivé
+    SIGN_RENDITION_DIR = os.environ.get('SIGN_RENDITION_DIR') or ''  # vide = <racine>/sign_renditions
+    
+    # Vidéos de phrases concaténées (/api/video-sequence)
+    SENTENCE_VIDEO_CACHE_DIR = os.environ.get('SENTENCE_VIDEO_CACHE_DIR') or ''  # vide = <racine>/sentence_video_cache
+    SENTENCE_VIDEO_CACHE_MAX_MB = int(os.environ.get('SENTENCE_VIDEO_CACHE_MAX_MB') or 512)
+    SENTENCE_VIDEO_MAX_SIGNS = int(os.environ.get('SENTENCE_VIDEO_MAX_SIGNS') or 30)
+    SENTENCE_VIDEO_MAX_RENDERS = int(os.environ.get('SENTENCE_VIDEO_MAX_RENDERS') or 2)  # ffmpeg simultanés par worker
+    SENTENCE_VIDEO_RENDER_WAIT = float(os.environ.get('SENTENCE_VIDEO_RENDER_WAIT') or 30)  # attente max d'une place (s)
+    
+    # Animations binaires de l'avatar (.asla, scripts/convert_animations.py)
+    ANIMATION_BINARY_DIR = os.environ.get('ANIMATION_BINARY_DIR') or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'animations', 'binary')
+    ANIMATION_CACHE_SIZE = int(os.environ.get('ANIMATION_CACHE_SIZE') or 256)  # signes gardés en mémoire
+    
+    # Envoi des médias (voir backend/utils/media.py)
+    MEDIA_MAX_AGE = int(os.environ.get('MEDIA_MAX_AGE') or 3600)  # URL non versionnée, revalidée par ETag ensuite
+    MEDIA_SENDFILE_MODE = os.environ.get('MEDIA_SENDFILE_MODE') or ''  # '', 'x-sendfile' ou 'x-accel'
+    MEDIA_ACCEL_PREFIX = os.environ.get('MEDIA_ACCEL_PREFIX') or '/protected-media/'  # location interne nginx
+    MEDIA_ACCEL_ROOT = os.environ.get('MEDIA_ACCEL_ROOT') or ''  # vide = racine du projet
+    
     # Configuration de session
     SESSION_TYPE = 'filesystem'
     PERMANENT_SESSION_LIFETIME = 3600  # 1 heure
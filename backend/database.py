@@ -1,21 +1,301 @@
+import os
+import time
+import logging
+import threading
+from contextlib import contextmanager
+
 import pymysql
-from flask import current_app
+from flask import current_app, g, has_app_context
+
+
+class PoolTimeoutError(Exception):
+    """Aucune connexion disponible dans le pool avant l'expiration du délai"""
+
+
+class PooledConnection:
+    """
+    Proxy autour d'une connexion PyMySQL empruntée au pool.
+
+    `close()` rend la connexion au pool au lieu de fermer le socket, ce qui
+    permet aux routes existantes (`conn = get_db_connection() ... conn.close()`)
+    de fonctionner sans modification.
+    """
+
+    def __init__(self, pool, raw, created_at):
+        self._pool = pool
+        self._raw = raw
+        self._created_at = created_at
+        self._checked_out_at = time.monotonic()
+        self._released = False
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def close(self):
+        """Rendre la connexion au pool (idempotent)"""
+        if not self._released:
+            self._released = True
+            self._pool._release(self)
+
+
+class ConnectionPool:
+    """
+    Pool de connexions MySQL thread-safe.
+
+    - taille maximale configurable (MYSQL_POOL_SIZE)
+    - vérification `ping(reconnect=True)` des connexions restées inactives
+    - durée de vie maximale d'une connexion (MYSQL_POOL_MAX_LIFETIME)
+    - métriques d'emprunt (attente, durée d'utilisation, pic d'utilisation)
+    """
+
+    def __init__(self, connect_kwargs, pool_size=10, max_lifetime=1800,
+                 checkout_timeout=5.0, ping_interval=5.0):
+        self.connect_kwargs = connect_kwargs
+        self.pool_size = max(1, int(pool_size))
+        self.max_lifetime = max_lifetime
+        self.checkout_timeout = checkout_timeout
+        self.ping_interval = ping_interval
+
+        self._cond = threading.Condition()
+        self._idle = []  # pile LIFO de (raw, created_at, last_used)
+        self._size = 0   # connexions ouvertes (inactives + empruntées)
+        self._pid = os.getpid()
+
+        self._stats = {
+            'checkouts': 0,
+            'connections_created': 0,
+            'connections_recycled': 0,
+            'connections_broken': 0,
+            'timeouts': 0,
+            'wait_time_total': 0.0,
+            'wait_time_max': 0.0,
+            'usage_time_total': 0.0,
+            'usage_time_max': 0.0,
+            'peak_in_use': 0,
+        }
+
+    @classmethod
+    def from_config(cls, config):
+        """Créer un pool à partir de la configuration Flask"""
+        connect_kwargs = {
+            'host': config['MYSQL_HOST'],
+            'user': config['MYSQL_USER'],
+            'password': config['MYSQL_PASSWORD'],
+            'database': config['MYSQL_DATABASE'],
+            'port': config['MYSQL_PORT'],
+            'charset': 'utf8mb4',
+            'cursorclass': pymysql.cursors.DictCursor,
+        }
+        return cls(
+            connect_kwargs,
+            pool_size=config.get('MYSQL_POOL_SIZE', 10),
+            max_lifetime=config.get('MYSQL_POOL_MAX_LIFETIME', 1800),
+            checkout_timeout=config.get('MYSQL_POOL_TIMEOUT', 5.0),
+            ping_interval=config.get('MYSQL_POOL_PING_INTERVAL', 5.0),
+        )
+
+    def _check_fork(self):
+        # Après un fork (gunicorn), les sockets du parent ne doivent pas être réutilisés
+        if os.getpid() != self._pid:
+            self._idle = []
+            self._size = 0
+            self._pid = os.getpid()
+
+    def _expired(self, created_at, now):
+        return self.max_lifetime and now - created_at > self.max_lifetime
+
+    def _close_raw(self, raw):
+        try:
+            raw.close()
+        except Exception:
+            pass
+
+    def acquire(self, timeout=None):
+        """Emprunter une connexion (bloque au plus `timeout` secondes)"""
+        timeout = self.checkout_timeout if timeout is None else timeout
+        start = time.monotonic()
+        deadline = start + timeout
+
+        with self._cond:
+            self._check_fork()
+            while True:
+                if self._idle:
+                    raw, created_at, last_used = self._idle.pop()
+                    break
+                if self._size < self.pool_size:
+                    # Réserver la place avant de se connecter hors du verrou
+                    self._size += 1
+                    raw = None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats['timeouts'] += 1
+                    raise PoolTimeoutError(
+                        f"Aucune connexion disponible après {timeout:.1f}s "
+                        f"(pool_size={self.pool_size})"
+                    )
+                self._cond.wait(remaining)
+
+        now = time.monotonic()
+        try:
+            if raw is not None and self._expired(created_at, now):
+                self._close_raw(raw)
+                raw = None
+                with self._cond:
+                    self._stats['connections_recycled'] += 1
+            elif raw is not None and now - last_used > self.ping_interval:
+                try:
+                    raw.ping(reconnect=True)
+                except Exception:
+                    self._close_raw(raw)
+                    raw = None
+                    with self._cond:
+                        self._stats['connections_broken'] += 1
+
+            if raw is None:
+                raw = pymysql.connect(**self.connect_kwargs)
+                created_at = time.monotonic()
+                with self._cond:
+                    self._stats['connections_created'] += 1
+        except Exception:
+            # Libérer la place réservée pour ne pas réduire le pool
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+
+        waited = time.monotonic() - start
+        with self._cond:
+            self._stats['checkouts'] += 1
+            self._stats['wait_time_total'] += waited
+            self._stats['wait_time_max'] = max(self._stats['wait_time_max'], waited)
+            in_use = self._size - len(self._idle)
+            self._stats['peak_in_use'] = max(self._stats['peak_in_use'], in_use)
+
+        return PooledConnection(self, raw, created_at)
+
+    def _release(self, conn):
+        raw = conn._raw
+        now = time.monotonic()
+        used = now - conn._checked_out_at
+
+        keep = raw.open and not self._expired(conn._created_at, now)
+        if keep:
+            try:
+                # Ne jamais rendre une transaction ouverte (ni un snapshot périmé) au pool
+                raw.rollback()
+            except Exception:
+                keep = False
+
+        with self._cond:
+            self._stats['usage_time_total'] += used
+            self._stats['usage_time_max'] = max(self._stats['usage_time_max'], used)
+            if os.getpid() != self._pid:
+                return
+            if keep:
+                self._idle.append((raw, conn._created_at, now))
+            else:
+                self._size -= 1
+                self._stats['connections_recycled'] += 1
+            self._cond.notify()
+
+        if not keep:
+            self._close_raw(raw)
+
+    def close_all(self):
+        """Fermer toutes les connexions inactives"""
+        with self._cond:
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+        for raw, _, _ in idle:
+            self._close_raw(raw)
+
+    def stats(self):
+        """Instantané des métriques du pool"""
+        with self._cond:
+            stats = dict(self._stats)
+            stats['pool_size'] = self.pool_size
+            stats['open'] = self._size
+            stats['idle'] = len(self._idle)
+            stats['in_use'] = self._size - len(self._idle)
+        checkouts = stats['checkouts'] or 1
+        stats['wait_time_avg'] = stats['wait_time_total'] / checkouts
+        stats['usage_time_avg'] = stats['usage_time_total'] / checkouts
+        return stats
+
+
+_pool_lock = threading.Lock()
+
+
+def get_pool(app=None):
+    """Retourner le pool de l'application (créé à la demande)"""
+    app = app or current_app._get_current_object()
+    pool = app.extensions.get('db_pool')
+    if pool is None:
+        with _pool_lock:
+            pool = app.extensions.get('db_pool')
+            if pool is None:
+                pool = ConnectionPool.from_config(app.config)
+                app.extensions['db_pool'] = pool
+    return pool
+
 
 def get_db_connection():
-    """Créer une connexion à la base de données MySQL"""
+    """Emprunter une connexion MySQL au pool (à rendre avec `close()`)"""
     try:
-        connection = pymysql.connect(
-            host=current_app.config['MYSQL_HOST'],
-            user=current_app.config['MYSQL_USER'],
-            password=current_app.config['MYSQL_PASSWORD'],
-            database=current_app.config['MYSQL_DATABASE'],
-            port=current_app.config['MYSQL_PORT'],
-            charset='utf8mb4',
-            cursorclass=pymysql.cursors.DictCursor
-        )
-        return connection
+        connection = get_pool().acquire()
     except Exception as e:
         print(f"Erreur de connexion à la base de données: {e}")
         import traceback
         traceback.print_exc()
         return None
+
+    # Suivre la connexion pour la rendre au pool en fin de requête si la route l'oublie
+    if has_app_context():
+        g.setdefault('_db_connections', []).append(connection)
+    return connection
+
+
+@contextmanager
+def db_connection():
+    """
+    Context manager autour de `get_db_connection`.
+
+        with db_connection() as conn:
+            if not conn:
+                return jsonify({'error': ...}), 500
+            ...
+
+    La connexion est toujours rendue au pool à la sortie du bloc.
+    """
+    conn = get_db_connection()
+    try:
+        yield conn
+    finally:
+        if conn:
+            conn.close()
+
+
+def get_pool_stats():
+    """Métriques du pool de l'application courante"""
+    return get_pool().stats()
+
+
+def _release_request_connections(exc=None):
+    for conn in g.pop('_db_connections', []):
+        if not conn._released:
+            logging.warning("Connexion DB non rendue par la route, retour forcé au pool")
+            conn.close()
+
+
+def init_app(app):
+    """Créer le pool et garantir le retour des connexions en fin de requête"""
+    get_pool(app)
+    app.teardown_appcontext(_release_request_connections)
@@ -25,12 +25,61 @@ CREATE TABLE IF NOT EXISTS predictions (
     predicted_class VARCHAR(50) NOT NULL,
     confidence DECIMAL(5, 4) NOT NULL,
     input_data TEXT, -- JSON ou chemin du fichier
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, -- date de l'événement (écriture différée)
+    inserted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, -- date d'insertion : export incrémental (since)
     FOREIGN KEY (user_email) REFERENCES users(email) ON DELETE CASCADE,
     INDEX idx_user_email (user_email),
     INDEX idx_prediction_type (prediction_type),
     INDEX idx_predicted_class (predicted_class),
-    INDEX idx_created_at (created_at)
+    INDEX idx_created_at (created_at),
+    INDEX idx_user_created (user_email, created_at), -- export paginé par (created_at, id)
+    INDEX idx_user_inserted (user_email, inserted_at) -- export incrémental par (inserted_at, id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Séquences texte -> signes (une ligne par requête /api/text_to_signs)
+-- `signs` est compact : une lettre par signe, '_' pour space (ex. 'HI_YOU')
+CREATE TABLE IF NOT EXISTS sign_sequences (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    user_email VARCHAR(255) NOT NULL,
+    source_text TEXT,
+    signs TEXT NOT NULL,
+    sign_count INT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    inserted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (user_email) REFERENCES users(email) ON DELETE CASCADE,
+    INDEX idx_user_email_created (user_email, created_at),
+    INDEX idx_user_inserted (user_email, inserted_at)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Rollups des prédictions, maintenus par lot par backend/prediction_log.py
+-- (reconstruction : python scripts/rebuild_analytics_rollups.py)
+CREATE TABLE IF NOT EXISTS prediction_daily_rollups (
+    user_email VARCHAR(255) NOT NULL,
+    day DATE NOT NULL,
+    prediction_type VARCHAR(20) NOT NULL,
+    predicted_class VARCHAR(50) NOT NULL,
+    prediction_count INT NOT NULL DEFAULT 0,
+    confidence_sum DOUBLE NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_email, day, prediction_type, predicted_class),
+    FOREIGN KEY (user_email) REFERENCES users(email) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+CREATE TABLE IF NOT EXISTS prediction_class_totals (
+    user_email VARCHAR(255) NOT NULL,
+    prediction_type VARCHAR(20) NOT NULL,
+    predicted_class VARCHAR(50) NOT NULL,
+    prediction_count INT NOT NULL DEFAULT 0,
+    confidence_sum DOUBLE NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_email, prediction_type, predicted_class),
+    FOREIGN KEY (user_email) REFERENCES users(email) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+CREATE TABLE IF NOT EXISTS prediction_daily_totals (
+    user_email VARCHAR(255) NOT NULL,
+    day DATE NOT NULL,
+    prediction_count INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_email, day),
+    FOREIGN KEY (user_email) REFERENCES users(email) ON DELETE CASCADE
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
 -- Table pour les sessions (optionnel, pour gérer les sessions)
@@ -60,3 +109,29 @@ CREATE TABLE IF NOT EXISTS quiz_results (
     INDEX idx_created_at (created_at)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
+-- Réponses de quiz normalisées (une ligne par réponse)
+CREATE TABLE IF NOT EXISTS quiz_answers (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    quiz_id INT NOT NULL,
+    user_email VARCHAR(255) NOT NULL,
+    question VARCHAR(255),
+    correct_answer VARCHAR(50) NOT NULL,
+    selected_answer VARCHAR(50),
+    is_correct BOOLEAN NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (quiz_id) REFERENCES quiz_results(id) ON DELETE CASCADE,
+    FOREIGN KEY (user_email) REFERENCES users(email) ON DELETE CASCADE,
+    INDEX idx_quiz_id (quiz_id),
+    INDEX idx_user_sign (user_email, correct_answer)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Précision par utilisateur et par signe, mise à jour à chaque réponse
+-- (remplissage initial : python scripts/backfill_quiz_answers.py)
+CREATE TABLE IF NOT EXISTS quiz_sign_stats (
+    user_email VARCHAR(255) NOT NULL,
+    sign VARCHAR(50) NOT NULL,
+    total INT NOT NULL DEFAULT 0,
+    correct INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_email, sign),
+    FOREIGN KEY (user_email) REFERENCES users(email) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
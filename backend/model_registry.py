@@ -0,0 +1,241 @@
+"""
+Registre des modèles versionnés avec rechargement à chaud.
+
+Chaque modèle a un dossier par version :
+
+    backend/model/image/2024-06-01/model.h5     (+ classes.json optionnel)
+    backend/model/video/v3/model.keras
+    backend/model/video/ACTIVE                   (optionnel : version imposée, pour un rollback)
+
+La version active est celle de ACTIVE, sinon la plus récente (tri naturel
+des noms). Sans dossier versionné, les anciens fichiers (asl_model.h5,
+cnn_lstm_words_aug_best.h5) sont servis comme version 'legacy'.
+
+Un thread de surveillance détecte une nouvelle version, la charge en
+arrière-plan, exécute une prédiction à vide puis la rend active par une
+simple affectation : les requêtes en cours terminent avec l'ancienne version,
+les suivantes utilisent la nouvelle, sans redémarrage ni requête perdue.
+Publier une version en copiant le dossier à côté puis en le renommant, pour
+qu'un fichier à moitié copié ne soit jamais chargé.
+"""
+import os
+import re
+import json
+import time
+import logging
+import threading
+from collections import namedtuple
+
+import numpy as np
+
+from backend.config import Config
+
+MODEL_FILES = ('model.keras', 'model.h5')
+CLASSES_FILE = 'classes.json'
+ACTIVE_FILE = 'ACTIVE'
+LEGACY_VERSION = 'legacy'
+
+# Ancien emplacement (fichier unique) et liste de classes par défaut
+LEGACY_FILES = {
+    'image': 'asl_model.h5',
+    'video': 'cnn_lstm_words_aug_best.h5',
+}
+
+ModelVersion = namedtuple('ModelVersion', ['name', 'version', 'model', 'classes', 'path', 'loaded_at'])
+
+
+def default_classes(name):
+    if name == 'image':
+        from backend.utils.predict import ASL_CLASSES
+        return ASL_CLASSES
+    from backend.utils.predict_video import ASL_WORDS
+    return ASL_WORDS
+
+
+def _natural_key(version):
+    return [int(part) if part.isdigit() else part for part in re.split(r'(\d+)', version)]
+
+
+class ModelRegistry:
+    def __init__(self, model_dir, poll_interval=30):
+        self.model_dir = model_dir
+        self.poll_interval = poll_interval
+
+        self._active = {}
+        self._loading = set()
+        self._init_lock = threading.Lock()
+        self._failed = {}
+        self._classes = {}
+        self._lock = threading.Lock()
+        self._watcher = None
+        self._watcher_pid = None
+        self._swaps = 0
+
+    # ----- disque -----
+
+    def _version_path(self, name, version):
+        if version == LEGACY_VERSION:
+            return os.path.join(self.model_dir, LEGACY_FILES[name])
+        for filename in MODEL_FILES:
+            path = os.path.join(self.model_dir, name, version, filename)
+            if os.path.exists(path):
+                return path
+        return None
+
+    def versions(self, name):
+        """Versions présentes sur disque, de la plus ancienne à la plus récente"""
+        base = os.path.join(self.model_dir, name)
+        found = []
+        if os.path.isdir(base):
+            found = sorted((v for v in os.listdir(base) if self._version_path(name, v)), key=_natural_key)
+        if not found and os.path.exists(self._version_path(name, LEGACY_VERSION)):
+            found = [LEGACY_VERSION]
+        return found
+
+    def target_version(self, name):
+        """Version à servir : ACTIVE si présent, sinon la plus récente"""
+        active_file = os.path.join(self.model_dir, name, ACTIVE_FILE)
+        if os.path.exists(active_file):
+            with open(active_file) as f:
+                pinned = f.read().strip()
+            if self._version_path(name, pinned):
+                return pinned
+            logging.warning(f"Version {name}/{pinned} indiquée dans ACTIVE introuvable")
+        versions = self.versions(name)
+        return versions[-1] if versions else None
+
+    def classes_for(self, name, version):
+        """Liste des classes d'une version (classes.json du dossier, sinon liste par défaut)"""
+        key = (name, version)
+        if key not in self._classes:
+            path = os.path.join(self.model_dir, name, version, CLASSES_FILE)
+            if version != LEGACY_VERSION and os.path.exists(path):
+                with open(path, encoding='utf-8') as f:
+                    self._classes[key] = json.load(f)
+            else:
+                self._classes[key] = default_classes(name)
+        return self._classes[key]
+
+    # ----- chargement -----
+
+    def _load(self, name, version):
+        from backend.utils.tf_runtime import configure_tensorflow
+        configure_tensorflow()
+        from tensorflow import keras
+
+        path = self._version_path(name, version)
+        start = time.perf_counter()
+        model = keras.models.load_model(path)
+        # Prédiction à vide avant mise en service : construit le graphe d'exécution
+        model.predict(np.zeros((1,) + tuple(model.input_shape[1:]), dtype=np.float32), verbose=0)
+        logging.info(f"Modèle {name} version {version} chargé en {time.perf_counter() - start:.1f}s")
+        return ModelVersion(name, version, model, self.classes_for(name, version), path, time.time())
+
+    def _activate(self, name, version):
+        try:
+            entry = self._load(name, version)
+        except Exception as e:
+            logging.error(f"Chargement du modèle {name} version {version} impossible: {e}")
+            self._failed[name] = version
+            return None
+        finally:
+            with self._lock:
+                self._loading.discard(name)
+        with self._lock:
+            previous = self._active.get(name)
+            self._active[name] = entry
+            if previous is not None:
+                self._swaps += 1
+                logging.info(f"Modèle {name}: {previous.version} -> {version}")
+        self._failed.pop(name, None)
+        return entry
+
+    def get(self, name):
+        """
+        Version active (chargée au premier appel) ; None si aucun modèle sur
+        disque ou si la version cible a déjà échoué au chargement (nouvel essai
+        seulement quand une autre version est publiée)
+        """
+        self._ensure_watcher()
+        entry = self._active.get(name)
+        if entry is not None:
+            return entry
+        # Version en échec : répondre tout de suite sans attendre le verrou de chargement
+        if name in self._failed and self._failed[name] == self.target_version(name):
+            return None
+        # Un seul chargement initial même si plusieurs requêtes arrivent en même temps
+        with self._init_lock:
+            entry = self._active.get(name)
+            if entry is not None:
+                return entry
+            version = self.target_version(name)
+            if version is None:
+                logging.warning(f"Aucun modèle '{name}' trouvé dans {self.model_dir}")
+                return None
+            if self._failed.get(name) == version:
+                return None
+            with self._lock:
+                self._loading.add(name)
+            return self._activate(name, version)
+
+    def refresh(self):
+        """Charger en arrière-plan toute nouvelle version des modèles déjà servis"""
+        for name, entry in list(self._active.items()):
+            version = self.target_version(name)
+            if version is None or version == entry.version or self._failed.get(name) == version:
+                continue
+            with self._lock:
+                if name in self._loading:
+                    continue
+                self._loading.add(name)
+            threading.Thread(target=self._activate, args=(name, version),
+                             name=f'model-load-{name}', daemon=True).start()
+
+    # ----- surveillance -----
+
+    def _ensure_watcher(self):
+        if not self.poll_interval or (self._watcher is not None and self._watcher_pid == os.getpid()):
+            return
+        with self._lock:
+            if self._watcher is not None and self._watcher_pid == os.getpid():
+                return
+            self._watcher_pid = os.getpid()
+            self._watcher = threading.Thread(target=self._watch, name='model-registry', daemon=True)
+            self._watcher.start()
+
+    def _watch(self):
+        while True:
+            time.sleep(self.poll_interval)
+            try:
+                self.refresh()
+            except Exception as e:
+                logging.error(f"Surveillance des modèles: {e}")
+
+    def stats(self):
+        models = {}
+        for name in LEGACY_FILES:
+            entry = self._active.get(name)
+            models[name] = {
+                'version': entry.version if entry else None,
+                'path': entry.path if entry else None,
+                'loaded_at': entry.loaded_at if entry else None,
+                'num_classes': len(entry.classes) if entry else None,
+                'available_versions': self.versions(name),
+                'loading': name in self._loading,
+                'failed_version': self._failed.get(name),
+            }
+        return {'models': models, 'swaps': self._swaps}
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry():
+    """Registre du processus (les modules de prédiction ne dépendent pas de l'application Flask)"""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = ModelRegistry(Config.MODEL_DIR, Config.MODEL_REGISTRY_POLL_INTERVAL)
+    return _registry
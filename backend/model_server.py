@@ -0,0 +1,319 @@
+"""
+Serveur d'inférence local partagé par les workers web.
+
+Avec plusieurs workers gunicorn, chaque worker chargeait sa propre copie de
+TensorFlow et des deux modèles Keras. Ce module fournit un processus unique
+qui possède les modèles (lettres 'image' et mots 'video') ; les workers lui
+envoient leurs tenseurs prétraités :
+
+- le tenseur est écrit dans un segment `multiprocessing.shared_memory` propre
+  au thread client, réutilisé d'une requête à l'autre ;
+- seul le nom du segment, la forme et le dtype passent par le socket Unix
+  (`multiprocessing.connection`, authentifié avec SECRET_KEY : serveur et
+  workers refusent de démarrer avec la clé par défaut, et le socket est créé
+  en 0600 dans un dossier privé 0700 du compte qui lance le serveur) ;
+- le serveur lit le tenseur directement dans le segment (sans copie ni
+  désérialisation) et renvoie les probabilités.
+
+Lancement :
+    MODEL_SERVER_SOCKET=/run/asl/model_server.sock python -m backend.model_server
+
+Les workers web utilisent le serveur dès que MODEL_SERVER_SOCKET est défini ;
+sinon les modèles restent chargés dans le processus web comme avant. Si le
+serveur ne répond pas, les workers chargent les modèles eux-mêmes
+(MODEL_SERVER_FALLBACK=1, défaut) ou la prédiction échoue (MODEL_SERVER_FALLBACK=0).
+"""
+import os
+import sys
+import stat
+import atexit
+import logging
+import argparse
+import threading
+from multiprocessing import shared_memory, resource_tracker
+from multiprocessing.connection import Listener, Client
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.config import Config, DEFAULT_SECRET_KEY
+
+# Taille minimale d'un segment client (une séquence vidéo 40x64x64x3 float32 ~ 2 Mo)
+MIN_SEGMENT_SIZE = 4 * 1024 * 1024
+
+# Message spécial : état du registre du serveur (versions actives)
+STATS_REQUEST = '__stats__'
+
+# Vrai dans le processus serveur : les modèles y sont appelés directement
+_serving = False
+_client = None
+_client_lock = threading.Lock()
+
+
+class ModelServerUnavailable(Exception):
+    """Le serveur d'inférence ne répond pas (connexion refusée ou perdue)"""
+
+
+class ModelServerError(Exception):
+    """Le serveur a répondu par une erreur (forme d'entrée, modèle inconnu...) : pas de repli local"""
+
+
+def _authkey(secret_key):
+    """Clé d'authentification du socket ; refusée si SECRET_KEY n'est pas défini"""
+    if not secret_key or secret_key == DEFAULT_SECRET_KEY:
+        raise RuntimeError(
+            "SECRET_KEY doit être défini (et différent de la valeur par défaut) "
+            "pour utiliser le serveur d'inférence")
+    return secret_key.encode()
+
+
+def _is_named_pipe(address):
+    return address.startswith('\\\\')
+
+
+# ----- côté serveur -----
+
+def _attach_segment(name):
+    shm = shared_memory.SharedMemory(name=name)
+    # Le segment appartient au client : le resource tracker du serveur ne doit pas le supprimer
+    try:
+        resource_tracker.unregister(shm._name, 'shared_memory')
+    except Exception:
+        pass
+    return shm
+
+
+def _handle_connection(conn, registry):
+    segments = {}
+    try:
+        while True:
+            try:
+                name, segment_name, shape, dtype = conn.recv()
+            except (EOFError, OSError):
+                return
+            try:
+                if name == STATS_REQUEST:
+                    conn.send(('ok', registry.stats()))
+                    continue
+                # Version active au moment de la requête (peut changer entre deux requêtes)
+                entry = registry.get(name)
+                if entry is None:
+                    raise ValueError(f"Modèle '{name}' non disponible")
+                shm = segments.get(segment_name)
+                if shm is None:
+                    shm = segments[segment_name] = _attach_segment(segment_name)
+                batch = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+                probabilities = entry.model(batch, training=False).numpy()
+                conn.send(('ok', (probabilities, entry.version)))
+            except Exception as e:
+                logging.error(f"Erreur d'inférence ({name}): {e}")
+                conn.send(('error', str(e)))
+    finally:
+        conn.close()
+        for shm in segments.values():
+            try:
+                shm.close()
+            except BufferError:
+                pass
+
+
+def _prepare_socket_dir(address):
+    """
+    Dossier du socket : créé en 0700 s'il n'existe pas ; refusé s'il appartient
+    à un autre compte ou s'il est accessible au groupe / aux autres (ex. /tmp)
+    """
+    directory = os.path.dirname(os.path.abspath(address))
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    info = os.stat(directory)
+    if info.st_uid != os.geteuid() or stat.S_IMODE(info.st_mode) & 0o077:
+        raise RuntimeError(
+            f"Le dossier du socket {directory} doit appartenir à ce compte et être "
+            f"privé (chmod 700) ; utiliser un sous-dossier dédié, ex. /run/asl/")
+
+
+def serve(address, authkey, intra_op_threads=None, inter_op_threads=None):
+    """Charger les modèles une fois puis servir les workers (un thread par connexion)"""
+    global _serving
+    if not _is_named_pipe(address):
+        _prepare_socket_dir(address)
+    _serving = True
+
+    from backend.utils.tf_runtime import configure_tensorflow
+    configure_tensorflow(intra_op_threads, inter_op_threads)
+
+    from backend.model_registry import get_registry
+
+    # Le registre du serveur surveille les nouvelles versions et les échange à chaud
+    registry = get_registry()
+    loaded = [name for name in ('image', 'video') if registry.get(name) is not None]
+    logging.info(f"Serveur d'inférence prêt sur {address} (modèles: {', '.join(loaded) or 'aucun'})")
+
+    if not _is_named_pipe(address) and os.path.exists(address):
+        os.remove(address)
+    # Socket créé directement en 0600 (pas de fenêtre entre bind et chmod)
+    umask = os.umask(0o177)
+    try:
+        listener = Listener(address, authkey=authkey)
+    finally:
+        os.umask(umask)
+    with listener:
+        while True:
+            try:
+                conn = listener.accept()
+            except Exception as e:
+                logging.warning(f"Connexion refusée: {e}")
+                continue
+            threading.Thread(target=_handle_connection, args=(conn, registry), daemon=True).start()
+
+
+# ----- côté worker web -----
+
+class ModelClient:
+    """Une connexion et un segment de mémoire partagée par thread"""
+
+    def __init__(self, address, authkey):
+        self.address = address
+        self.authkey = authkey
+        self._local = threading.local()
+        self._segments = []
+        self._lock = threading.Lock()
+        atexit.register(self.close)
+
+    def _session(self):
+        session = getattr(self._local, 'session', None)
+        if session is None or session['pid'] != os.getpid():
+            try:
+                conn = Client(self.address, authkey=self.authkey)
+            except Exception as e:
+                raise ModelServerUnavailable(f"Serveur d'inférence injoignable ({self.address}): {e}")
+            session = self._local.session = {'conn': conn, 'shm': None, 'pid': os.getpid()}
+        return session
+
+    def _segment(self, session, nbytes):
+        shm = session['shm']
+        if shm is None or shm.size < nbytes:
+            if shm is not None:
+                self._release_segment(shm)
+            shm = shared_memory.SharedMemory(create=True, size=max(nbytes, MIN_SEGMENT_SIZE))
+            with self._lock:
+                self._segments.append(shm)
+            session['shm'] = shm
+        return shm
+
+    def _release_segment(self, shm):
+        with self._lock:
+            if shm in self._segments:
+                self._segments.remove(shm)
+        shm.close()
+        shm.unlink()
+
+    def predict(self, name, batch):
+        """(probabilités, version) du modèle `name` pour un lot déjà prétraité"""
+        batch = np.ascontiguousarray(batch, dtype=np.float32)
+        session = self._session()
+        shm = self._segment(session, batch.nbytes)
+        view = np.ndarray(batch.shape, dtype=batch.dtype, buffer=shm.buf)
+        view[...] = batch
+        del view
+
+        try:
+            session['conn'].send((name, shm.name, batch.shape, batch.dtype.str))
+            status, payload = session['conn'].recv()
+        except (EOFError, OSError) as e:
+            # Serveur redémarré : repartir d'une nouvelle connexion à la prochaine requête
+            self._local.session = None
+            self._release_segment(shm)
+            raise ModelServerUnavailable(f"Connexion au serveur d'inférence perdue: {e}")
+        if status != 'ok':
+            raise ModelServerError(payload)
+        return payload
+
+    def stats(self):
+        """État du registre du serveur (versions actives, chargements en cours)"""
+        session = self._session()
+        try:
+            session['conn'].send((STATS_REQUEST, None, None, None))
+            status, payload = session['conn'].recv()
+        except (EOFError, OSError) as e:
+            self._local.session = None
+            raise ModelServerUnavailable(f"Connexion au serveur d'inférence perdue: {e}")
+        if status != 'ok':
+            raise ModelServerError(payload)
+        return payload
+
+    def close(self):
+        with self._lock:
+            segments, self._segments = self._segments, []
+        for shm in segments:
+            try:
+                shm.close()
+                shm.unlink()
+            except (FileNotFoundError, BufferError):
+                pass
+
+
+def _setting(name):
+    """Configuration de l'application courante (Config hors contexte Flask : scripts, CLI)"""
+    from flask import current_app, has_app_context
+
+    if has_app_context():
+        return current_app.config.get(name, getattr(Config, name))
+    return getattr(Config, name)
+
+
+def get_model_client():
+    """Client du serveur d'inférence, ou None si les modèles sont chargés dans ce processus"""
+    global _client
+    address = _setting('MODEL_SERVER_SOCKET')
+    if _serving or not address:
+        return None
+    if _client is None or _client.address != address:
+        with _client_lock:
+            if _client is None or _client.address != address:
+                _client = ModelClient(address, _authkey(_setting('SECRET_KEY')))
+    return _client
+
+
+def remote_predict(name, batch):
+    """
+    (probabilités, version) calculées par le serveur d'inférence ; None s'il
+    faut calculer dans ce processus (pas de serveur, ou serveur injoignable
+    avec MODEL_SERVER_FALLBACK). Une erreur renvoyée par le serveur
+    (ModelServerError) remonte à l'appelant : la recharger ici ne la corrigerait pas.
+    """
+    client = get_model_client()
+    if client is None:
+        return None
+    try:
+        return client.predict(name, batch)
+    except ModelServerUnavailable as e:
+        if not _setting('MODEL_SERVER_FALLBACK'):
+            raise
+        logging.warning(f"{e} ; inférence '{name}' dans ce processus")
+        return None
+
+
+def init_app(app):
+    """Refuser de démarrer un worker configuré pour le serveur d'inférence sans SECRET_KEY"""
+    if app.config.get('MODEL_SERVER_SOCKET'):
+        _authkey(app.config.get('SECRET_KEY'))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serveur d'inférence ASL partagé")
+    parser.add_argument('--socket', default=Config.MODEL_SERVER_SOCKET or '/run/asl/model_server.sock')
+    parser.add_argument('--intra-op-threads', type=int, help='Défaut: TF_INTRA_OP_THREADS')
+    parser.add_argument('--inter-op-threads', type=int, help='Défaut: TF_INTER_OP_THREADS')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s: %(message)s')
+    try:
+        authkey = _authkey(Config.SECRET_KEY)
+    except RuntimeError as e:
+        parser.error(str(e))
+    serve(args.socket, authkey, args.intra_op_threads, args.inter_op_threads)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,447 @@
+"""
+Journalisation asynchrone des prédictions (write-behind).
+
+Les routes déposent les prédictions dans une file bornée en mémoire ; un
+thread de fond les insère par lots (`executemany`) toutes les N lignes ou
+toutes les T millisecondes. Si la base est indisponible ou la file pleine,
+les lignes sont écrites sur disque (NDJSON) puis rejouées dès que MySQL
+répond à nouveau. La latence des requêtes n'inclut donc plus aucune
+écriture en base.
+
+Une ligne refusée par MySQL (clé étrangère, valeur trop longue...) ne doit
+pas bloquer son lot : le lot est alors réécrit ligne par ligne et seules les
+lignes refusées partent en quarantaine (rejected-<pid>.ndjson.bad). Seules
+les erreurs de connexion renvoient le lot sur disque pour un rejeu.
+"""
+import os
+import re
+import json
+import glob
+import time
+import queue
+import atexit
+import logging
+import threading
+from datetime import datetime
+
+import pymysql
+from flask import current_app
+
+from backend.database import PoolTimeoutError
+from backend.utils.sign_sequence import count_signs
+
+# Base indisponible : le lot est rejoué plus tard. Toute autre erreur vient des lignes elles-mêmes.
+CONNECTION_ERRORS = (pymysql.err.OperationalError, pymysql.err.InterfaceError, PoolTimeoutError, OSError)
+
+# predictions-<pid écrivain>.ndjson, puis .replaying-<pid rejoueur> pendant le rejeu
+SPILL_NAME = re.compile(r'predictions-(\d+)\.ndjson(?:\.replaying-(\d+))?$')
+
+INSERT_SQL = {
+    'prediction': """
+        INSERT INTO predictions (user_email, prediction_type, predicted_class, confidence, input_data, created_at)
+        VALUES (%s, %s, %s, %s, %s, %s)
+    """,
+    'sign_sequence': """
+        INSERT INTO sign_sequences (user_email, source_text, signs, sign_count, created_at)
+        VALUES (%s, %s, %s, %s, %s)
+    """,
+}
+
+# Agrégats maintenus à chaque lot : les endpoints d'analytics ne lisent que ces tables
+ROLLUP_SQL = {
+    'daily_classes': """
+        INSERT INTO prediction_daily_rollups
+            (user_email, day, prediction_type, predicted_class, prediction_count, confidence_sum)
+        VALUES (%s, %s, %s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE
+            prediction_count = prediction_count + VALUES(prediction_count),
+            confidence_sum = confidence_sum + VALUES(confidence_sum)
+    """,
+    'classes': """
+        INSERT INTO prediction_class_totals
+            (user_email, prediction_type, predicted_class, prediction_count, confidence_sum)
+        VALUES (%s, %s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE
+            prediction_count = prediction_count + VALUES(prediction_count),
+            confidence_sum = confidence_sum + VALUES(confidence_sum)
+    """,
+    'daily': """
+        INSERT INTO prediction_daily_totals (user_email, day, prediction_count)
+        VALUES (%s, %s, %s)
+        ON DUPLICATE KEY UPDATE prediction_count = prediction_count + VALUES(prediction_count)
+    """,
+}
+
+
+def rollup_batch(batch):
+    """
+    Pré-agréger un lot de lignes ('prediction' / 'sign_sequence') pour les
+    tables de rollup. Les séquences texte comptent comme des prédictions
+    'audio' de confiance 1.0, une par signe.
+    """
+    daily_classes = {}
+
+    def add(user_email, day, prediction_type, predicted_class, count, confidence_sum):
+        key = (user_email, day, prediction_type, predicted_class)
+        current = daily_classes.get(key, (0, 0.0))
+        daily_classes[key] = (current[0] + count, current[1] + confidence_sum)
+
+    for kind, row in batch:
+        if kind == 'prediction':
+            user_email, prediction_type, predicted_class, confidence, _, created_at = row
+            add(user_email, str(created_at)[:10], prediction_type, predicted_class, 1, float(confidence))
+        elif kind == 'sign_sequence':
+            user_email, _, signs, _, created_at = row
+            for sign, count in count_signs([signs]).items():
+                add(user_email, str(created_at)[:10], 'audio', sign, count, float(count))
+
+    classes = {}
+    daily = {}
+    for (user_email, day, prediction_type, predicted_class), (count, conf_sum) in daily_classes.items():
+        key = (user_email, prediction_type, predicted_class)
+        current = classes.get(key, (0, 0.0))
+        classes[key] = (current[0] + count, current[1] + conf_sum)
+        daily[(user_email, day)] = daily.get((user_email, day), 0) + count
+
+    return {
+        'daily_classes': [key + value for key, value in daily_classes.items()],
+        'classes': [key + value for key, value in classes.items()],
+        'daily': [key + (count,) for key, count in daily.items()],
+    }
+
+
+class PredictionLogWriter:
+    """File d'attente bornée + thread d'écriture par lots vers MySQL"""
+
+    def __init__(self, pool, batch_size=100, flush_interval_ms=500, max_queue=10000,
+                 put_timeout=0.05, spill_dir='prediction_spill'):
+        self.pool = pool
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000.0
+        self.put_timeout = put_timeout
+        self.spill_dir = spill_dir
+
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._stop = threading.Event()
+        self._thread = None
+        self._pid = None
+        self._spill_lock = threading.Lock()
+        self._last_replay = 0.0
+        self._pending_spill = False
+
+        self._stats = {
+            'enqueued': 0,
+            'written': 0,
+            'batches': 0,
+            'spilled': 0,
+            'replayed': 0,
+            'rejected': 0,
+            'flush_errors': 0,
+        }
+
+    @classmethod
+    def from_config(cls, pool, config):
+        return cls(
+            pool,
+            batch_size=config.get('PREDICTION_LOG_BATCH_SIZE', 100),
+            flush_interval_ms=config.get('PREDICTION_LOG_FLUSH_MS', 500),
+            max_queue=config.get('PREDICTION_LOG_QUEUE_SIZE', 10000),
+            put_timeout=config.get('PREDICTION_LOG_PUT_TIMEOUT', 0.05),
+            spill_dir=config.get('PREDICTION_LOG_SPILL_DIR', 'prediction_spill'),
+        )
+
+    # ----- côté requête -----
+
+    def start(self):
+        """Démarrer le thread d'écriture (relancé automatiquement après un fork)"""
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        if self._pid is not None and self._pid != os.getpid():
+            # La file héritée du parent n'a plus de consommateur : repartir à vide
+            self._queue = queue.Queue(maxsize=self._queue.maxsize)
+        self._pid = os.getpid()
+        self._pending_spill = bool(self._claimable_spills())
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='prediction-log-writer', daemon=True)
+        self._thread.start()
+
+    def log(self, kind, row):
+        """
+        Déposer une ligne dans la file.
+
+        Backpressure : si la file est pleine, on attend au plus `put_timeout`
+        secondes puis la ligne part directement sur disque plutôt que de
+        bloquer la requête.
+        """
+        if self._pid != os.getpid() or self._thread is None or not self._thread.is_alive():
+            self.start()
+        try:
+            self._queue.put((kind, row), timeout=self.put_timeout)
+            self._stats['enqueued'] += 1
+        except queue.Full:
+            logging.warning("File des prédictions pleine, écriture sur disque")
+            self._spill([(kind, row)])
+        return True
+
+    # ----- côté worker -----
+
+    def _collect_batch(self):
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while not self._stop.is_set():
+            # Une erreur inattendue ne doit jamais tuer le thread : la file se remplirait pour de bon
+            try:
+                batch = self._collect_batch()
+                if batch:
+                    self._flush(batch)
+                elif time.monotonic() - self._last_replay > 30:
+                    # Aussi les fichiers laissés par un worker mort depuis
+                    self._last_replay = time.monotonic()
+                    if self._pending_spill or self._claimable_spills():
+                        self._replay_spill()
+            except Exception:
+                logging.exception("Erreur du writer des prédictions")
+                self._stop.wait(1)
+        # Vider ce qui reste à l'arrêt
+        try:
+            self._drain()
+        except Exception:
+            logging.exception("Erreur du writer des prédictions à l'arrêt")
+
+    def _drain(self):
+        while True:
+            batch = []
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if not batch:
+                return
+            self._flush(batch)
+
+    def _write(self, batch):
+        """Insérer un lot et mettre à jour les rollups en une transaction, un `executemany` par table"""
+        rows_by_kind = {}
+        for kind, row in batch:
+            rows_by_kind.setdefault(kind, []).append(row)
+
+        conn = self.pool.acquire()
+        try:
+            with conn.cursor() as cursor:
+                for kind, rows in rows_by_kind.items():
+                    cursor.executemany(INSERT_SQL[kind], rows)
+                for name, rows in rollup_batch(batch).items():
+                    if rows:
+                        cursor.executemany(ROLLUP_SQL[name], rows)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    def _write_isolating(self, batch):
+        """
+        Écrire un lot ; si MySQL refuse une ligne, réécrire le lot ligne par
+        ligne et mettre en quarantaine les lignes refusées. Retourne
+        (lignes écrites, lignes non écrites faute de connexion, erreur de connexion)
+        """
+        try:
+            self._write(batch)
+            return len(batch), [], None
+        except CONNECTION_ERRORS as e:
+            return 0, batch, e
+        except Exception as e:
+            logging.warning(f"Lot de {len(batch)} prédictions refusé ({e}), écriture ligne par ligne")
+
+        written, rejected = 0, []
+        for i, item in enumerate(batch):
+            try:
+                self._write([item])
+                written += 1
+            except CONNECTION_ERRORS as e:
+                self._reject(rejected)
+                return written, batch[i:], e
+            except Exception as e:
+                rejected.append((item, e))
+        self._reject(rejected)
+        return written, [], None
+
+    def _flush(self, batch):
+        written, unwritten, error = self._write_isolating(batch)
+        if written:
+            self._stats['written'] += written
+            self._stats['batches'] += 1
+            logging.debug(f"{written} prédictions écrites en base")
+        if error is not None:
+            self._stats['flush_errors'] += 1
+            logging.error(f"Écriture des prédictions impossible ({error}), sauvegarde sur disque")
+            self._spill(unwritten)
+            # Laisser la base respirer avant de tenter un rejeu
+            self._last_replay = time.monotonic()
+            return
+        if self._pending_spill:
+            self._replay_spill()
+
+    # ----- secours sur disque -----
+
+    def _spill_path(self):
+        return os.path.join(self.spill_dir, f"predictions-{os.getpid()}.ndjson")
+
+    def _spill(self, batch):
+        with self._spill_lock:
+            try:
+                os.makedirs(self.spill_dir, exist_ok=True)
+                with open(self._spill_path(), 'a', encoding='utf-8') as f:
+                    for kind, row in batch:
+                        f.write(json.dumps({'kind': kind, 'row': list(row)}) + '\n')
+                self._stats['spilled'] += len(batch)
+                self._pending_spill = True
+            except Exception as e:
+                logging.error(f"Perte de {len(batch)} prédictions, écriture disque impossible: {e}")
+
+    def _claimable_spills(self):
+        """
+        Fichiers que ce processus peut rejouer : le sien, ceux d'écrivains
+        morts, et les rejeux interrompus par la mort de leur processus. Le
+        fichier d'un autre worker vivant n'est jamais touché (il y écrit
+        peut-être encore).
+        """
+        paths = []
+        for path in sorted(glob.glob(os.path.join(self.spill_dir, 'predictions-*'))):
+            match = SPILL_NAME.search(os.path.basename(path))
+            if match is None:
+                continue
+            owner = int(match.group(2) or match.group(1))
+            if (owner == os.getpid() and match.group(2) is None) or not _pid_alive(owner):
+                paths.append(path)
+        return paths
+
+    def _replay_spill(self):
+        """Rejouer les fichiers NDJSON en attente une fois la base revenue"""
+        self._last_replay = time.monotonic()
+        with self._spill_lock:
+            self._pending_spill = False
+            replaying = []
+            for path in self._claimable_spills():
+                # Le renommage est la prise en charge : un seul processus le réussit
+                claimed = SPILL_NAME.sub(lambda m: f"predictions-{m.group(1)}.ndjson.replaying-{os.getpid()}",
+                                         path)
+                try:
+                    os.replace(path, claimed)
+                    replaying.append(claimed)
+                except OSError:
+                    continue
+
+        for path in replaying:
+            batch, rejected = [], []
+            with open(path, encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        item = json.loads(line)
+                        batch.append((item['kind'], tuple(item['row'])))
+                    except (ValueError, KeyError, TypeError):
+                        rejected.append(line)
+            if rejected:
+                logging.warning(f"{len(rejected)} lignes illisibles dans {path}")
+                self._quarantine(rejected)
+            done, replayed = 0, 0
+            try:
+                while done < len(batch):
+                    chunk = batch[done:done + self.batch_size]
+                    written, unwritten, error = self._write_isolating(chunk)
+                    replayed += written
+                    self._stats['replayed'] += written
+                    if error is not None:
+                        # Remettre uniquement les lignes non écrites en attente
+                        logging.warning(f"Rejeu de {path} interrompu: {error}")
+                        pending = unwritten + batch[done + len(chunk):]
+                        self._spill(pending)
+                        self._stats['spilled'] -= len(pending)
+                        break
+                    done += len(chunk)
+                else:
+                    logging.info(f"{replayed} prédictions rejouées depuis {path}")
+            finally:
+                os.remove(path)
+
+    def _reject(self, rejected):
+        """Lignes refusées par MySQL : en quarantaine avec l'erreur, jamais rejouées"""
+        if not rejected:
+            return
+        logging.error(f"{len(rejected)} prédictions refusées par la base: {rejected[0][1]}")
+        self._stats['rejected'] += len(rejected)
+        self._quarantine([
+            json.dumps({'kind': kind, 'row': list(row), 'error': str(error)}) + '\n'
+            for (kind, row), error in rejected
+        ])
+
+    def _quarantine(self, lines):
+        """Garder de côté les lignes illisibles (tronquées par un arrêt brutal) ou refusées par la base"""
+        logging.warning(f"{len(lines)} lignes mises en quarantaine")
+        try:
+            os.makedirs(self.spill_dir, exist_ok=True)
+            with open(os.path.join(self.spill_dir, f"rejected-{os.getpid()}.ndjson.bad"), 'a',
+                      encoding='utf-8') as f:
+                f.writelines(line if line.endswith('\n') else line + '\n' for line in lines)
+        except OSError as e:
+            logging.error(f"Quarantaine impossible: {e}")
+
+    def close(self, timeout=10):
+        """Arrêter le worker et écrire tout ce qui reste dans la file"""
+        if self._thread is None or self._pid != os.getpid():
+            return
+        self._stop.set()
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            logging.warning("Le writer des prédictions ne s'est pas arrêté à temps")
+
+    def stats(self):
+        stats = dict(self._stats)
+        stats['queued'] = self._queue.qsize()
+        return stats
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True  # existe, mais appartient à un autre utilisateur
+    return True
+
+
+def init_app(app):
+    """Créer le writer de l'application et vider la file à l'arrêt du processus"""
+    from backend.database import get_pool
+
+    writer = PredictionLogWriter.from_config(get_pool(app), app.config)
+    app.extensions['prediction_log'] = writer
+    writer.start()
+    atexit.register(writer.close)
+    return writer
+
+
+def get_prediction_log():
+    writer = current_app.extensions.get('prediction_log')
+    if writer is None:
+        writer = init_app(current_app._get_current_object())
+    return writer
+
+
+def now():
+    """Horodatage de l'événement (la ligne est insérée plus tard)"""
+    return datetime.now().strftime('%Y-%m-%d %H:%M:%S')
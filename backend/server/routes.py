@@ -1,4 +1,4 @@
-from flask import Blueprint, render_template, request, jsonify, send_from_directory, session, redirect, url_for, flash, current_app
+from flask import Blueprint, render_template, request, jsonify, session, redirect, url_for, flash, current_app, Response, stream_with_context
 import os
 import time
 import json
@@ -8,62 +8,67 @@ import io
 import tempfile
 from datetime import datetime, timedelta
 from functools import wraps
+from urllib.parse import quote
 from werkzeug.utils import secure_filename
 from werkzeug.security import generate_password_hash, check_password_hash
-import speech_recognition as sr
-from pydub import AudioSegment
 import numpy as np
 from PIL import Image
+import pymysql
 
-try:
-    import librosa
-    import matplotlib.pyplot as plt
-    import librosa.display
-    HAS_TRAINING_LIBS = True
-except ImportError:
-    HAS_TRAINING_LIBS = False
-
-from backend.database import get_db_connection
-from backend.utils.predict import predict_image_file, load_model, ASL_CLASSES
+from backend.database import get_db_connection, get_pool_stats
+from backend.prediction_log import get_prediction_log, now as log_timestamp
+from backend.spectrogram_jobs import get_spectrogram_jobs, HAS_TRAINING_LIBS
+from backend.model_registry import get_registry
+from backend.sign_media import get_sign_index, get_sign_renditions, select_rendition, RENDITION_MIMETYPES
+from backend.sign_sentences import render_sentence, get_sentence_cache, SentenceRenderBusy
+from backend.animation_store import get_animation_store, pack_batch
+from backend.model_server import get_model_client, ModelServerUnavailable, ModelServerError
+from backend.utils.cache import TTLCache
+from backend.utils.sign_sequence import pack_signs
+from backend.utils.media import send_media, resolve_media_path, versioned_url
+from backend.utils.animation_format import decode_animation
+from backend.utils.export import STREAMERS, CONTENT_TYPES, HAS_PARQUET, EXPORT_TABLES
+from backend.utils.predict import predict_image_file, predict_probabilities, ASL_CLASSES
 from backend.utils.preprocess import preprocess_image
 from backend.utils.predict_video import predict_video_sequence, load_cnn_lstm_model
 
 bp = Blueprint('main', __name__)
 
+# Nombre de lignes lues par lot lors des exports en flux
+EXPORT_BATCH_SIZE = 1000
+
+# Taille de page maximale de /api/powerbi/export (paramètre limit)
+EXPORT_MAX_LIMIT = 100000
+
+# Nombre maximal de signes par requête /api/animations
+ANIMATION_BATCH_MAX = 100
+
+# Dossier des images de l'alphabet servies par /images/<filename>
+IMAGES_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'images')
+
+# Champs de profil injectés dans les templates
+PROFILE_FIELDS = ('email', 'first_name', 'last_name', 'profile_image')
+
 # Helper helper
 def save_prediction(user_email, prediction_type, predicted_class, confidence, input_data=None):
-    """Enregistrer une prédiction dans la base de données"""
+    """Enregistrer une prédiction (écriture différée, par lots, hors de la requête)"""
     if not user_email:
         logging.error("Erreur: user_email est None dans save_prediction")
         return False
     
-    conn = get_db_connection()
-    if not conn:
-        logging.error("Erreur: Impossible de se connecter à la base de données dans save_prediction")
-        return False
-    
-    try:
-        with conn.cursor() as cursor:
-            sql = """
-                INSERT INTO predictions (user_email, prediction_type, predicted_class, confidence, input_data)
-                VALUES (%s, %s, %s, %s, %s)
-            """
-            input_data_json = json.dumps(input_data) if input_data else None
-            logging.debug(f"Exécution SQL: {sql} avec {(user_email, prediction_type, predicted_class, confidence, input_data_json)}")
-            cursor.execute(sql, (user_email, prediction_type, predicted_class, confidence, input_data_json))
-            conn.commit()
-            logging.info(f"Prédiction enregistrée: {predicted_class} ({prediction_type}) pour {user_email}")
-            return True
-    except Exception as e:
-        logging.error(f"Erreur lors de l'enregistrement de la prédiction: {e}")
-        import traceback
-        traceback.print_exc()
-        if conn:
-            conn.rollback()
+    input_data_json = json.dumps(input_data) if input_data else None
+    return get_prediction_log().log('prediction', (
+        user_email, prediction_type, predicted_class, confidence, input_data_json, log_timestamp()
+    ))
+
+def save_sign_sequence(user_email, text, signs):
+    """Enregistrer une conversion texte -> signes sous forme compacte (une ligne par requête)"""
+    signs = [sign for sign in signs if sign in ASL_CLASSES]
+    if not signs:
         return False
-    finally:
-        if conn:
-            conn.close()
+    return get_prediction_log().log('sign_sequence', (
+        user_email, text, pack_signs(signs), len(signs), log_timestamp()
+    ))
 
 # Décorateur pour protéger les routes
 def login_required(f):
@@ -77,25 +82,58 @@ def login_required(f):
         return f(*args, **kwargs)
     return decorated_function
 
+def get_profile_cache():
+    """Cache LRU/TTL des profils utilisateurs (un par application)"""
+    cache = current_app.extensions.get('profile_cache')
+    if cache is None:
+        cache = TTLCache(
+            maxsize=current_app.config.get('PROFILE_CACHE_SIZE', 1024),
+            ttl=current_app.config.get('PROFILE_CACHE_TTL', 300)
+        )
+        current_app.extensions['profile_cache'] = cache
+    return cache
+
+def cache_user_profile(user):
+    """Mettre en cache les champs de profil d'une ligne `users`"""
+    profile = {field: user.get(field) for field in PROFILE_FIELDS}
+    get_profile_cache().set(user['email'], profile)
+    return profile
+
+def get_user_profile(user_email):
+    """Profil (email, prénom, nom, photo) depuis le cache, ou MySQL en cas d'absence"""
+    profile = get_profile_cache().get(user_email)
+    if profile is not None:
+        return profile
+    
+    conn = get_db_connection()
+    if not conn:
+        return None
+    try:
+        with conn.cursor() as cursor:
+            sql = "SELECT email, first_name, last_name, profile_image FROM users WHERE email = %s"
+            cursor.execute(sql, (user_email,))
+            user = cursor.fetchone()
+            if user:
+                return cache_user_profile(user)
+    except Exception as e:
+        logging.warning(f"Erreur lors du chargement du profil: {e}")
+    finally:
+        conn.close()
+    return None
+
 @bp.context_processor
 def inject_user_profile():
     """Injecter les infos de profil dans tous les templates"""
     if 'user_email' in session:
-        conn = get_db_connection()
-        if conn:
-            try:
-                with conn.cursor() as cursor:
-                    sql = "SELECT first_name, last_name, profile_image FROM users WHERE email = %s"
-                    cursor.execute(sql, (session['user_email'],))
-                    user = cursor.fetchone()
-                    if user:
-                        return {'current_user_profile': user}
-            except Exception:
-                pass
-            finally:
-                conn.close()
+        return {'current_user_profile': get_user_profile(session['user_email'])}
     return {'current_user_profile': None}
 
+@bp.app_template_global()
+def media_url(endpoint, filename):
+    """URL versionnée (?v=<empreinte>) d'une image ou d'un upload, mise en cache sans limite"""
+    directory = IMAGES_DIR if endpoint == 'main.serve_image' else current_app.config['UPLOAD_FOLDER']
+    return versioned_url(endpoint, directory, filename)
+
 # ===== ROUTES D'AUTHENTIFICATION =====
 
 @bp.route('/login', methods=['GET', 'POST'])
@@ -123,6 +161,7 @@ def login():
                     session.permanent = True
                     session['user_email'] = user['email']
                     session['user_name'] = user.get('first_name', 'User')
+                    cache_user_profile(user)
                     
                     # Mettre à jour la dernière connexion
                     update_sql = "UPDATE users SET last_login = %s WHERE email = %s"
@@ -334,12 +373,14 @@ def update_profile():
         conn.rollback()
     finally:
         conn.close()
+        get_profile_cache().invalidate(user_email)
     
     return redirect(url_for('main.profile_page'))
 
 @bp.route('/uploads/<path:filename>')
 def uploaded_file(filename):
-    return send_from_directory(current_app.config['UPLOAD_FOLDER'], filename)
+    # Photos de profil : pas de mise en cache par un proxy partagé
+    return send_media(resolve_media_path(current_app.config['UPLOAD_FOLDER'], filename), private=True)
 
 @bp.route('/api/profile/stats')
 @login_required
@@ -352,8 +393,8 @@ def api_profile_stats():
     
     try:
         with conn.cursor() as cursor:
-            # Nombre de prédictions
-            sql = "SELECT COUNT(*) as total FROM predictions WHERE user_email = %s"
+            # Nombre de prédictions (rollup, séquences texte incluses)
+            sql = "SELECT COALESCE(SUM(prediction_count), 0) as total FROM prediction_class_totals WHERE user_email = %s"
             cursor.execute(sql, (user_email,))
             predictions = cursor.fetchone()
             
@@ -363,7 +404,7 @@ def api_profile_stats():
             user = cursor.fetchone()
             
             return jsonify({
-                'total_predictions': predictions['total'] if predictions else 0,
+                'total_predictions': int(predictions['total']) if predictions else 0,
                 'member_since': user['created_at'].isoformat() if user and user['created_at'] else None
             })
     except Exception as e:
@@ -502,11 +543,11 @@ def api_predict_base64():
         
         img_array = np.array(image)
         processed_img = preprocess_image(img_array)
-        model = load_model()
-        predictions = model.predict(processed_img, verbose=0)
+        predictions, model_version = predict_probabilities(processed_img)
+        classes = get_registry().classes_for('image', model_version)
         predicted_class_idx = np.argmax(predictions[0])
         confidence = float(predictions[0][predicted_class_idx])
-        predicted_class = ASL_CLASSES[predicted_class_idx]
+        predicted_class = classes[predicted_class_idx]
         
         # Enregistrer la prédiction (optionnel pour webcam, peut être fait périodiquement)
         save_prediction_enabled = data.get('save', False)
@@ -521,7 +562,8 @@ def api_predict_base64():
         
         return jsonify({
             'class': predicted_class,
-            'confidence': confidence
+            'confidence': confidence,
+            'model_version': model_version
         })
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -605,6 +647,9 @@ def api_gloss_to_sentence():
 @login_required
 def api_audio_to_text():
     """Convertir l'audio en texte"""
+    import speech_recognition as sr
+    from pydub import AudioSegment
+    
     # Configurer le chemin FFmpeg si nécessaire (Windows)
     ffmpeg_path = current_app.config.get('FFMPEG_PATH', os.environ.get('FFMPEG_PATH', 'C:\\ffmpeg\\bin'))
     if os.path.exists(ffmpeg_path):
@@ -788,17 +833,9 @@ def api_text_to_signs():
             else:
                 continue
         
-        # Enregistrer les prédictions audio
+        # Enregistrer la séquence en une seule ligne (et non une prédiction par caractère)
         if user_email and signs:
-            for sign in signs:
-                if sign in ASL_CLASSES:
-                    save_prediction(
-                        user_email=user_email,
-                        prediction_type='audio',
-                        predicted_class=sign,
-                        confidence=1.0,  # Confiance par défaut pour audio
-                        input_data={'text': text, 'sign': sign}
-                    )
+            save_sign_sequence(user_email, text, signs)
         
         return jsonify({'signs': signs})
     except Exception as e:
@@ -812,6 +849,8 @@ def api_audio_translate_asl():
     Combines audio-to-text and text-to-ASL in one endpoint
     """
     print("DEBUG: Entered api_audio_translate_asl") # Debugging print
+    import speech_recognition as sr
+    from pydub import AudioSegment
     from backend.utils.predict_video import predict_text_to_asl
     
     # Configurer le chemin FFmpeg si nécessaire
@@ -1017,14 +1056,15 @@ def api_analytics_stats():
     
     try:
         with conn.cursor() as cursor:
+            # Lecture des rollups uniquement (coût indépendant de l'historique brut)
             # Statistiques générales
             stats_sql = """
                 SELECT 
-                    COUNT(*) as total_predictions,
-                    AVG(confidence) as avg_confidence,
                     prediction_type,
-                    COUNT(DISTINCT predicted_class) as unique_classes
-                FROM predictions
+                    CAST(SUM(prediction_count) AS UNSIGNED) as total_predictions,
+                    SUM(confidence_sum) / SUM(prediction_count) as avg_confidence,
+                    COUNT(*) as unique_classes
+                FROM prediction_class_totals
                 WHERE user_email = %s
                 GROUP BY prediction_type
             """
@@ -1035,9 +1075,9 @@ def api_analytics_stats():
             classes_sql = """
                 SELECT 
                     predicted_class,
-                    COUNT(*) as count,
-                    AVG(confidence) as avg_confidence
-                FROM predictions
+                    CAST(SUM(prediction_count) AS UNSIGNED) as count,
+                    SUM(confidence_sum) / SUM(prediction_count) as avg_confidence
+                FROM prediction_class_totals
                 WHERE user_email = %s
                 GROUP BY predicted_class
                 ORDER BY count DESC
@@ -1048,12 +1088,11 @@ def api_analytics_stats():
             # Prédictions par jour
             daily_sql = """
                 SELECT 
-                    DATE(created_at) as date,
-                    COUNT(*) as count
-                FROM predictions
+                    day as date,
+                    prediction_count as count
+                FROM prediction_daily_totals
                 WHERE user_email = %s
-                GROUP BY DATE(created_at)
-                ORDER BY date DESC
+                ORDER BY day DESC
                 LIMIT 30
             """
             cursor.execute(daily_sql, (user_email,))
@@ -1070,6 +1109,30 @@ def api_analytics_stats():
     finally:
         conn.close()
 
+def record_quiz_answers(cursor, quiz_id, user_email, questions):
+    """Insérer les réponses dans quiz_answers et mettre à jour quiz_sign_stats (même transaction)"""
+    answers = []
+    sign_stats = {}
+    for q in questions:
+        sign = q.get('correct_answer', 'Unknown')
+        is_correct = bool(q.get('correct', False))
+        answers.append((quiz_id, user_email, q.get('question'), sign, q.get('selected_answer'), is_correct))
+        total, correct = sign_stats.get(sign, (0, 0))
+        sign_stats[sign] = (total + 1, correct + (1 if is_correct else 0))
+    
+    if not answers:
+        return
+    
+    cursor.executemany("""
+        INSERT INTO quiz_answers (quiz_id, user_email, question, correct_answer, selected_answer, is_correct)
+        VALUES (%s, %s, %s, %s, %s, %s)
+    """, answers)
+    cursor.executemany("""
+        INSERT INTO quiz_sign_stats (user_email, sign, total, correct)
+        VALUES (%s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE total = total + VALUES(total), correct = correct + VALUES(correct)
+    """, [(user_email, sign, total, correct) for sign, (total, correct) in sign_stats.items()])
+
 @bp.route('/api/quiz/start_session', methods=['POST'])
 @login_required
 def api_quiz_start_session():
@@ -1107,6 +1170,7 @@ def api_quiz_update_progress():
         data = request.json
         quiz_id = data.get('quiz_id')
         question_data = data.get('question_data')  # Un seul objet de question
+        user_email = session.get('user_email')
         
         if not quiz_id or not question_data:
             return jsonify({'error': 'ID de quiz ou données de question manquants'}), 400
@@ -1117,40 +1181,32 @@ def api_quiz_update_progress():
         
         try:
             with conn.cursor() as cursor:
-                # 1. Récupérer les données actuelles
-                cursor.execute("SELECT questions_data, correct_answers, total_questions FROM quiz_results WHERE id = %s", (quiz_id,))
-                row = cursor.fetchone()
+                # 1. Incréments atomiques, sans relire ni réécrire questions_data.
+                # MySQL évalue les affectations d'un UPDATE de gauche à droite :
+                # score_percentage voit donc les compteurs déjà incrémentés.
+                sql = """
+                    UPDATE quiz_results 
+                    SET total_questions = total_questions + 1, 
+                    correct_answers = correct_answers + %s, 
+                    score_percentage = correct_answers * 100 / total_questions
+                    WHERE id = %s AND user_email = %s
+                """
+                is_correct = 1 if question_data.get('correct') else 0
+                cursor.execute(sql, (is_correct, quiz_id, user_email))
                 
-                if not row:
+                if cursor.rowcount == 0:
+                    conn.rollback()
                     return jsonify({'error': 'Quiz non trouvé'}), 404
                 
-                current_questions = json.loads(row['questions_data']) if row['questions_data'] else []
-                current_correct = row['correct_answers'] or 0
-                current_total = row['total_questions'] or 0
-                
-                # 2. Mettre à jour avec la nouvelle question
-                current_questions.append(question_data)
-                new_total = current_total + 1
-                new_correct = current_correct + (1 if question_data.get('correct') else 0)
-                new_percentage = (new_correct / new_total * 100) if new_total > 0 else 0
+                # 2. Journal des réponses (append-only) + agrégats par signe
+                record_quiz_answers(cursor, quiz_id, user_email, [question_data])
                 
-                # 3. Sauvegarder
-                sql = """
-                    UPDATE quiz_results 
-                    SET total_questions = %s, 
-                    correct_answers = %s, 
-                    score_percentage = %s, 
-                    questions_data = %s
-                    WHERE id = %s
-                """
-                cursor.execute(sql, (
-                    new_total,
-                    new_correct,
-                    new_percentage,
-                    json.dumps(current_questions),
-                    quiz_id
-                ))
+                # 3. Totaux à jour (ligne verrouillée par notre UPDATE)
+                cursor.execute("SELECT correct_answers, total_questions FROM quiz_results WHERE id = %s", (quiz_id,))
+                row = cursor.fetchone()
                 conn.commit()
+                new_correct = row['correct_answers']
+                new_total = row['total_questions']
                 return jsonify({'success': True, 'current_score': new_correct, 'total': new_total})
         except Exception as e:
             logging.error(f"Erreur lors de la mise à jour du quiz: {e}")
@@ -1175,8 +1231,10 @@ def api_quiz_save_result_legacy(data, user_email):
         with conn.cursor() as cursor:
             sql = "INSERT INTO quiz_results (user_email, total_questions, correct_answers, score_percentage, quiz_duration, questions_data) VALUES (%s, %s, %s, %s, %s, %s)"
             cursor.execute(sql, (user_email, total_questions, correct_answers, score_percentage, quiz_duration, json.dumps(questions_data)))
+            quiz_id = cursor.lastrowid
+            record_quiz_answers(cursor, quiz_id, user_email, questions_data)
             conn.commit()
-            return jsonify({'success': True, 'id': cursor.lastrowid})
+            return jsonify({'success': True, 'id': quiz_id})
     except Exception as e:
         conn.rollback()
         return jsonify({'error': str(e)}), 500
@@ -1302,42 +1360,31 @@ def api_quiz_analysis():
             cursor.execute(recent_sql, (user_email,))
             recent = cursor.fetchall()
             
-            # Analyse des erreurs
-            errors_sql = "SELECT questions_data FROM quiz_results WHERE user_email = %s ORDER BY created_at DESC LIMIT 50"
+            # Analyse des erreurs (agrégats par signe, tenus à jour à chaque réponse)
+            errors_sql = """
+                SELECT sign, total - correct as errors
+                FROM quiz_sign_stats
+                WHERE user_email = %s AND total > correct
+                ORDER BY errors DESC
+                LIMIT 10
+            """
             cursor.execute(errors_sql, (user_email,))
-            all_questions = cursor.fetchall()
-            
-            error_analysis = {}
-            total_predictions_by_sign = {}
-            correct_predictions = {}
-
-            for row in all_questions:
-                if row['questions_data']:
-                    try:
-                        q_list = json.loads(row['questions_data']) if isinstance(row['questions_data'], str) else row['questions_data']
-                        for q in q_list:
-                            sign = q.get('correct_answer', 'Unknown')
-                            total_predictions_by_sign[sign] = total_predictions_by_sign.get(sign, 0) + 1
-                            if q.get('correct', False):
-                                correct_predictions[sign] = correct_predictions.get(sign, 0) + 1
-                            else:
-                                error_analysis[sign] = error_analysis.get(sign, 0) + 1
-                    except Exception as e:
-                        logging.warning(f"Failed to parse questions_data: {e}")
-            
-            top_errors = sorted(error_analysis.items(), key=lambda x: x[1], reverse=True)[:10]
+            top_errors = cursor.fetchall()
             
-            prediction_accuracy = []
-            for sign, total in total_predictions_by_sign.items():
-                correct = correct_predictions.get(sign, 0)
-                accuracy = (correct / total * 100) if total > 0 else 0
-                prediction_accuracy.append({
-                    'sign': sign,
-                    'total': total,
-                    'correct': correct,
-                    'accuracy': round(accuracy, 1)
-                })
-            prediction_accuracy.sort(key=lambda x: x['accuracy'], reverse=True)
+            accuracy_sql = """
+                SELECT sign, total, correct, correct * 100.0 / total as accuracy
+                FROM quiz_sign_stats
+                WHERE user_email = %s AND total > 0
+                ORDER BY accuracy DESC
+                LIMIT 15
+            """
+            cursor.execute(accuracy_sql, (user_email,))
+            prediction_accuracy = [{
+                'sign': row['sign'],
+                'total': row['total'],
+                'correct': row['correct'],
+                'accuracy': round(float(row['accuracy']), 1)
+            } for row in cursor.fetchall()]
             
             daily_formatted = []
             for d in daily:
@@ -1372,8 +1419,8 @@ def api_quiz_analysis():
                 'daily': daily_formatted,
                 'score_distribution': score_distribution,
                 'recent': recent_formatted,
-                'top_errors': [{'sign': sign, 'count': count} for sign, count in top_errors],
-                'prediction_accuracy': prediction_accuracy[:15]
+                'top_errors': [{'sign': row['sign'], 'count': int(row['errors'])} for row in top_errors],
+                'prediction_accuracy': prediction_accuracy
             })
     except Exception as e:
         logging.error(f"Erreur lors de l'analyse des quiz: {e}")
@@ -1384,58 +1431,141 @@ def api_quiz_analysis():
         if conn:
             conn.close()
 
+def parse_export_cursor(value):
+    """Curseur de pagination `<horodatage ISO>,<id>` -> (datetime, id)"""
+    timestamp, row_id = value.rsplit(',', 1)
+    return datetime.fromisoformat(timestamp), int(row_id)
+
 @bp.route('/api/powerbi/export')
 @login_required
 def api_powerbi_export():
-    """API pour exporter les données vers PowerBI"""
+    """
+    API pour exporter les données vers PowerBI, en flux.
+    
+    Paramètres (optionnels) :
+    - type   : predictions (défaut) ou sign_sequences (conversions texte -> signes)
+    - format : json (défaut), ndjson, csv ou parquet
+    - since  : date d'insertion ISO, export incrémental des lignes insérées
+               ensuite (ordre d'insertion croissant)
+    - after  : curseur `<horodatage>,<id>` de la dernière ligne reçue (pagination par clé)
+    - limit  : taille de page (1 à EXPORT_MAX_LIMIT)
+    
+    L'historique (sans `since`) est trié par date d'événement `created_at`
+    décroissante. L'export incrémental suit `inserted_at` : les prédictions
+    sont insérées après coup (écriture différée, rejeu après une panne), une
+    ligne peut donc arriver avec un `created_at` ancien. Il s'arrête aux lignes
+    insérées depuis EXPORT_COMMIT_LAG secondes, pour ne jamais dépasser une
+    transaction pas encore validée.
+    
+    L'en-tête X-Next-Cursor donne le curseur `after` de la page suivante
+    (quand la page est complète) ou, en incrémental, celui de la dernière
+    ligne envoyée, à réutiliser pour l'actualisation suivante.
+    """
     user_email = session.get('user_email')
     if not user_email:
         return jsonify({'error': 'Non authentifié'}), 401
     
+    table = request.args.get('type', 'predictions').lower()
+    if table not in EXPORT_TABLES:
+        return jsonify({'error': f'Type inconnu: {table}'}), 400
+    export_format = request.args.get('format', 'json').lower()
+    if export_format not in STREAMERS:
+        return jsonify({'error': f'Format inconnu: {export_format}'}), 400
+    if export_format == 'parquet' and not HAS_PARQUET:
+        return jsonify({'error': 'Export Parquet indisponible (pyarrow non installé)'}), 501
+    
+    try:
+        since = request.args.get('since')
+        since = datetime.fromisoformat(since) if since else None
+        after = request.args.get('after')
+        after = parse_export_cursor(after) if after else None
+        limit = request.args.get('limit')
+        limit = int(limit) if limit is not None else None
+    except ValueError as e:
+        return jsonify({'error': f'Paramètre invalide: {e}'}), 400
+    if limit is not None and not 1 <= limit <= EXPORT_MAX_LIMIT:
+        return jsonify({'error': f'limit doit être compris entre 1 et {EXPORT_MAX_LIMIT}'}), 400
+    
+    # Incrémental : ordre d'insertion croissant ; historique : date d'événement décroissante
+    ascending = since is not None
+    key, op, order = ('inserted_at', '>', 'ASC') if ascending else ('created_at', '<', 'DESC')
+    
+    conditions = ["user_email = %s"]
+    params = [user_email]
+    if since:
+        conditions.append("inserted_at > %s")
+        params.append(since)
+    if after:
+        conditions.append(f"({key} {op} %s OR ({key} = %s AND id {op} %s))")
+        params.extend([after[0], after[0], after[1]])
+    
+    # Connexion prise avant d'envoyer les en-têtes : une panne donne encore un 500
     conn = get_db_connection()
     if not conn:
         return jsonify({'error': 'Erreur de connexion à la base de données'}), 500
     
     try:
+        if ascending:
+            # Horizon fixé une fois pour la page et son curseur : lignes validées seulement
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT NOW() - INTERVAL %s SECOND AS horizon",
+                               (current_app.config.get('EXPORT_COMMIT_LAG', 10),))
+                conditions.append("inserted_at <= %s")
+                params.append(cursor.fetchone()['horizon'])
+        
+        where_sql = f"FROM {table} WHERE {' AND '.join(conditions)}"
+        from_sql = f"{where_sql} ORDER BY {key} {order}, id {order}"
+        
+        # Dernière ligne de la page (lue sur l'index (user_email, created_at / inserted_at))
+        last = None
         with conn.cursor() as cursor:
-            sql = """
-                SELECT 
-                    id,
-                    user_email,
-                    prediction_type,
-                    predicted_class,
-                    confidence,
-                    created_at,
-                    input_data
-                FROM predictions
-                WHERE user_email = %s
-                ORDER BY created_at DESC
-            """
-            cursor.execute(sql, (user_email,))
-            data = cursor.fetchall()
-            
-            # Convertir les données pour PowerBI
-            powerbi_data = []
-            for row in data:
-                powerbi_data.append({
-                    'id': row['id'],
-                    'user_email': row['user_email'],
-                    'prediction_type': row['prediction_type'],
-                    'predicted_class': row['predicted_class'],
-                    'confidence': float(row['confidence']),
-                    'created_at': row['created_at'].isoformat() if row['created_at'] else None,
-                    'input_data': row['input_data']
-                })
-            
-            return jsonify({
-                'data': powerbi_data,
-                'total': len(powerbi_data)
-            })
+            if limit:
+                cursor.execute(f"SELECT {key} AS cursor_at, id {from_sql} LIMIT 1 OFFSET %s",
+                               params + [limit - 1])
+                last = cursor.fetchone()
+            if last is None and ascending:
+                # Page incomplète : la dernière ligne de l'export sert de point de reprise
+                reverse = 'DESC' if order == 'ASC' else 'ASC'
+                cursor.execute(f"SELECT {key} AS cursor_at, id {where_sql} "
+                               f"ORDER BY {key} {reverse}, id {reverse} LIMIT 1", params)
+                last = cursor.fetchone()
     except Exception as e:
-        print(f"Erreur lors de l'export PowerBI: {e}")
-        return jsonify({'error': str(e)}), 500
-    finally:
         conn.close()
+        logging.error(f"Erreur lors de l'export PowerBI: {e}")
+        return jsonify({'error': str(e)}), 500
+    next_cursor = f"{last['cursor_at'].isoformat()},{last['id']}" if last else None
+    
+    sql = f"SELECT {', '.join(EXPORT_TABLES[table]['columns'])} {from_sql}"
+    if limit:
+        sql += " LIMIT %s"
+    
+    def row_batches():
+        # Curseur serveur : les lignes sont lues par lots, jamais toutes en mémoire
+        with conn.cursor(pymysql.cursors.SSDictCursor) as cursor:
+            cursor.execute(sql, params + [limit] if limit else params)
+            while True:
+                rows = cursor.fetchmany(EXPORT_BATCH_SIZE)
+                if not rows:
+                    break
+                yield rows
+    
+    def generate():
+        try:
+            yield from STREAMERS[export_format](row_batches(), table)
+        except Exception as e:
+            # Les en-têtes sont déjà envoyés : on ne peut plus changer le code HTTP
+            logging.error(f"Erreur lors de l'export PowerBI: {e}")
+            raise
+    
+    headers = {}
+    if export_format != 'json':
+        headers['Content-Disposition'] = f'attachment; filename={table}.{export_format}'
+    if next_cursor:
+        headers['X-Next-Cursor'] = next_cursor
+    response = Response(stream_with_context(generate()), mimetype=CONTENT_TYPES[export_format], headers=headers)
+    # Rendue au pool à la fin de la réponse, même si le flux n'a jamais été lu
+    response.call_on_close(conn.close)
+    return response
 
 @bp.route('/api/training/save', methods=['POST'])
 @login_required
@@ -1467,54 +1597,130 @@ def api_training_save():
         audio_path = os.path.join(audio_dir, audio_filename)
         audio_file.save(audio_path)
         
-        # 3. Générer le spectrogramme
-        spec_filename = f"{word}_{timestamp}.png"
-        spec_path = os.path.join(spectrograms_dir, spec_filename)
-        
-        try:
-            y, sr_rate = librosa.load(audio_path)
-            S = librosa.feature.melspectrogram(y=y, sr=sr_rate, n_mels=128)
-            S_dB = librosa.power_to_db(S, ref=np.max)
-            
-            plt.figure(figsize=(10, 4))
-            librosa.display.specshow(S_dB, sr=sr_rate)
-            plt.axis('off')
-            plt.savefig(spec_path, bbox_inches='tight', pad_inches=0)
-            plt.close()
-        except Exception as e:
-            logging.error(f"Erreur lors de la génération du spectrogramme: {e}")
-            return jsonify({'error': f'Erreur spectrogramme: {str(e)}'}), 500
-        
-        # 4. Enregistrer en base de données
+        # 3. Enregistrer en base (spectrogramme renseigné par le job)
         conn = get_db_connection()
         if not conn:
             return jsonify({'error': 'Erreur DB'}), 500
             
         try:
             with conn.cursor() as cursor:
-                sql = "INSERT INTO asl_training_labels (word, audio_path, spectrogram_path) VALUES (%s, %s, %s)"
-                cursor.execute(sql, (word, audio_path, spec_path))
+                sql = "INSERT INTO asl_training_labels (word, audio_path) VALUES (%s, %s)"
+                cursor.execute(sql, (word, audio_path))
+                label_id = cursor.lastrowid
                 conn.commit()
-                logging.info(f"Échantillon d'entraînement ajouté pour '{word}'")
-            return jsonify({
-                'success': True, 
-                'message': f'Échantillon pour "{word}" sauvegardé',
-                'spec_path': spec_path
-            })
         except Exception as e:
             logging.error(f"Erreur SQL training save: {e}")
             return jsonify({'error': str(e)}), 500
         finally:
             conn.close()
         
+        # 4. Calcul du spectrogramme dans un processus worker
+        base_name = os.path.join(spectrograms_dir, f"{word}_{timestamp}")
+        job = get_spectrogram_jobs().submit(label_id, session['user_email'], audio_path,
+                                            base_name + '.png', base_name + '.npy')
+        logging.info(f"Échantillon d'entraînement ajouté pour '{word}' (job {job['id']})")
+        
+        return jsonify({
+            'success': True,
+            'message': f'Échantillon pour "{word}" sauvegardé',
+            'job_id': job['id'],
+            'status': job['status'],
+            'status_url': url_for('main.api_training_job', job_id=job['id'])
+        }), 202
+        
     except Exception as e:
         logging.error(f"Erreur training save générale: {e}")
         return jsonify({'error': str(e)}), 500
 
+@bp.route('/api/training/jobs/<job_id>')
+@login_required
+def api_training_job(job_id):
+    """Statut d'un job de génération de spectrogramme"""
+    job = get_spectrogram_jobs().get(job_id)
+    if not job or job.get('user_email') != session['user_email']:
+        return jsonify({'error': 'Job introuvable'}), 404
+    
+    return jsonify({
+        'job_id': job['id'],
+        'label_id': job['label_id'],
+        'status': job['status'],
+        'spectrogram_path': job['spectrogram_path'] if job['status'] == 'done' else None,
+        'mel_path': job['mel_path'] if job['status'] == 'done' else None,
+        'error': job.get('error')
+    })
+
+@bp.route('/api/metrics/db')
+@login_required
+def api_metrics_db():
+    """Métriques du pool de connexions MySQL et de l'écriture différée des prédictions"""
+    stats = get_pool_stats()
+    stats['prediction_log'] = get_prediction_log().stats()
+    stats['sign_media_index'] = get_sign_index().stats()
+    stats['sign_renditions'] = get_sign_renditions().stats()
+    stats['sentence_video_cache'] = get_sentence_cache().stats()
+    stats['animation_cache'] = get_animation_store().stats()
+    return jsonify(stats)
+
+@bp.route('/api/metrics/models')
+@login_required
+def api_metrics_models():
+    """Versions actives des modèles (celles du serveur d'inférence s'il est utilisé)"""
+    client = get_model_client()
+    if client is None:
+        return jsonify(get_registry().stats())
+    try:
+        stats = client.stats()
+    except ModelServerUnavailable as e:
+        return jsonify({'error': str(e)}), 503
+    except ModelServerError as e:
+        return jsonify({'error': str(e)}), 502
+    stats['model_server'] = current_app.config.get('MODEL_SERVER_SOCKET')
+    return jsonify(stats)
+
 @bp.route('/images/<filename>')
 def serve_image(filename):
-    images_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'images')
-    return send_from_directory(images_dir, filename)
+    return send_media(resolve_media_path(IMAGES_DIR, filename))
+
+@bp.route('/animations/<path:filename>')
+def serve_animation_file(filename):
+    """Animations binaires de l'avatar (.asla) et leur manifeste index.json"""
+    return send_media(resolve_media_path(current_app.config['ANIMATION_BINARY_DIR'], filename))
+
+def animation_response(body, etag, mimetype):
+    """Réponse d'animation avec ETag fort (304 si le client a déjà cette version)"""
+    response = Response(body, mimetype=mimetype)
+    response.set_etag(etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = current_app.config.get('MEDIA_MAX_AGE', 3600)
+    return response.make_conditional(request)
+
+@bp.route('/api/animation/<sign>')
+def api_animation(sign):
+    """Animation d'un signe : .asla (défaut) ou keyframes JSON avec ?format=json"""
+    blob, entry = get_animation_store().get(sign)
+    if blob is None:
+        return jsonify({'error': 'Animation not found'}), 404
+    if request.args.get('format') == 'json':
+        return animation_response(json.dumps(decode_animation(blob)), entry['etag'] + '-json', 'application/json')
+    return animation_response(blob, entry['etag'], 'application/octet-stream')
+
+@bp.route('/api/animations')
+def api_animations():
+    """Animations de plusieurs signes (?signs=hello,thanks) : conteneur ASLB ou JSON"""
+    signs = [s for s in request.args.get('signs', '').split(',') if s.strip()]
+    if not signs:
+        return jsonify({'error': 'No signs given'}), 400
+    if len(signs) > ANIMATION_BATCH_MAX:
+        return jsonify({'error': 'Too many signs'}), 400
+    blobs, etag, missing = get_animation_store().get_many(signs)
+    if request.args.get('format') == 'json':
+        body = json.dumps({'animations': {sign: decode_animation(blob) for sign, blob in blobs.items()},
+                           'missing': missing})
+        return animation_response(body, etag + '-json', 'application/json')
+    response = animation_response(pack_batch(blobs), etag, 'application/octet-stream')
+    if missing:
+        response.headers['X-Missing-Signs'] = quote(','.join(missing), safe=',')
+    return response
 
 
 
@@ -1522,27 +1728,14 @@ def serve_image(filename):
 @login_required
 def conversation_page():
     """Page du Pont de Conversation bidirectionnel"""
-    pass # No import needed
     current_user_profile = None
-    if 'user_email' in session:
-        # Note: Using get_db_connection pattern usually, but here adapting to what was likely there
-        # or simplified version if no ORM
-        # For now, let's use the session data or basic query if needed
-        # Assuming direct DB connection is preferred based on other routes
-        conn = get_db_connection()
-        if conn:
-            try:
-                with conn.cursor() as cursor:
-                    cursor.execute("SELECT * FROM users WHERE email = %s", (session['user_email'],))
-                    user = cursor.fetchone()
-                    if user:
-                        current_user_profile = {
-                            'email': user['email'],
-                            'name': user.get('first_name', 'User'),
-                            'profile_image': user.get('profile_image')
-                        }
-            finally:
-                conn.close()
+    profile = get_user_profile(session['user_email'])
+    if profile:
+        current_user_profile = {
+            'email': profile['email'],
+            'name': profile.get('first_name', 'User'),
+            'profile_image': profile.get('profile_image')
+        }
                 
     return render_template('conversation.html', current_user_profile=current_user_profile)
 
@@ -1550,29 +1743,65 @@ def conversation_page():
 def serve_video_sign(word):
     """Serve the ASL video for a specific word"""
     try:
-        # Normalize word
-        word = word.lower().strip()
-        
-        # Path to train directory (relative to backend/server/routes.py -> ../../train)
-        # current_app.root_path points to backend/
-        train_dir = os.path.join(current_app.root_path, '..', 'train')
-        word_dir = os.path.join(train_dir, word)
-        
-        if not os.path.exists(word_dir):
+        # Lookup in the precomputed index (word is normalized there)
+        index = get_sign_index()
+        entry = index.lookup(word)
+        if not entry:
             return jsonify({'error': 'Word not found'}), 404
-            
-        # Find first mp4 file
-        video_file = None
-        for filename in os.listdir(word_dir):
-            if filename.lower().endswith('.mp4'):
-                video_file = filename
-                break
-                
-        if not video_file:
-            return jsonify({'error': 'No video for this word'}), 404
-            
-        return send_from_directory(word_dir, video_file)
+        
+        # Small 240p rendition (mp4 / webm) picked from client hints when it has been built
+        kind = select_rendition(request)
+        store = get_sign_renditions()
+        renditions = store.lookup(word) if kind else None
+        if renditions and kind in renditions:
+            response = send_media(store.path_for(renditions, kind), etag=renditions[kind]['etag'],
+                                  mimetype=RENDITION_MIMETYPES[kind])
+        else:
+            # Range (206) for scrubbing, 304 on If-None-Match, optional X-Sendfile / X-Accel-Redirect
+            response = send_media(index.path_for(entry), etag=entry['etag'], mimetype='video/mp4')
+        response.vary.update(('Accept', 'Save-Data'))
+        return response
         
     except Exception as e:
         logging.error(f"Error serving video: {e}")
         return jsonify({'error': str(e)}), 500
+
+@bp.route('/api/video-sequence')
+def serve_video_sequence():
+    """Serve one video for a whole sign sequence (?signs=YOUR,NAME,WHAT)"""
+    signs = [s for s in request.args.get('signs', '').split(',') if s.strip()]
+    if not signs:
+        return jsonify({'error': 'No signs given'}), 400
+    if len(signs) > current_app.config.get('SENTENCE_VIDEO_MAX_SIGNS', 30):
+        return jsonify({'error': 'Too many signs'}), 400
+    try:
+        kind = select_rendition(request) or 'mp4'
+        path, key, included, missing = render_sentence(signs, kind)
+        if path is None:
+            return jsonify({'error': 'No rendition for these signs', 'missing': missing}), 404
+        
+        # Content-addressed: the cache key is a strong ETag for the assembled video
+        response = send_media(path, etag=key, mimetype=RENDITION_MIMETYPES[kind])
+        response.headers['X-Sign-Sequence'] = quote(','.join(included), safe=',')
+        if missing:
+            response.headers['X-Missing-Signs'] = quote(','.join(missing), safe=',')
+        response.vary.update(('Accept', 'Save-Data'))
+        return response
+        
+    except SentenceRenderBusy as e:
+        response = jsonify({'error': str(e)})
+        response.headers['Retry-After'] = '5'
+        return response, 503
+    except Exception as e:
+        logging.error(f"Error rendering sentence video: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@bp.route('/api/video/<word>/poster')
+def serve_video_poster(word):
+    """Poster frame shown before the sign clip starts"""
+    renditions = get_sign_renditions()
+    entry = renditions.lookup(word)
+    if not entry or 'poster' not in entry:
+        return jsonify({'error': 'Poster not found'}), 404
+    return send_media(renditions.path_for(entry, 'poster'), etag=entry['poster']['etag'],
+                      mimetype=RENDITION_MIMETYPES['poster'])
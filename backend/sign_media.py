@@ -0,0 +1,386 @@
+"""
+Index des vidéos de signes (train/<mot>/*.mp4).
+
+`/api/video/<word>` faisait un `os.path.exists` et un `os.listdir` du dossier
+du mot à chaque requête. L'index associe une fois pour toutes chaque mot
+normalisé à sa vidéo préférée, avec taille, durée (atome `mvhd` du MP4) et
+ETag fort (SHA-1 du contenu) : une recherche est un simple accès au dict.
+
+L'index est sauvegardé en JSON compact (SIGN_INDEX_PATH) : au redémarrage,
+seuls les fichiers dont la taille ou la date ont changé sont relus. Un thread
+surveille les dates de modification des dossiers (clip ajouté, supprimé ou
+remplacé par renommage) ainsi que la taille et la date de chaque clip indexé
+(clip réécrit sur place), et reconstruit l'index incrémentalement.
+
+Construction hors ligne : `flask --app backend.app build-sign-index`
+
+Les renditions 240p (H.264 / WebM + image d'attente) produites par
+scripts/build_sign_renditions.py sont décrites par SIGN_RENDITION_DIR/renditions.json ;
+`select_rendition` choisit celle à servir d'après les indications du client.
+"""
+import os
+import json
+import time
+import struct
+import hashlib
+import logging
+import tempfile
+import threading
+
+from flask import current_app
+
+INDEX_VERSION = 1
+VIDEO_EXTENSIONS = ('.mp4',)
+
+# Champs d'une entrée, stockée sous forme de liste dans le fichier d'index
+ENTRY_FIELDS = ('file', 'size', 'mtime', 'duration', 'etag')
+
+# Renditions : mêmes dimensions, cadence et base de temps pour tous les clips
+# (condition de la concaténation sans réencodage)
+RENDITION_MANIFEST = 'renditions.json'
+RENDITION_SPEC = {'width': 426, 'height': 240, 'fps': 25, 'timescale': 12800}
+RENDITION_FILES = {'mp4': '240p.mp4', 'webm': '240p.webm', 'poster': 'poster.jpg'}
+RENDITION_MIMETYPES = {'mp4': 'video/mp4', 'webm': 'video/webm', 'poster': 'image/jpeg'}
+
+
+def default_train_dir(root):
+    return os.path.join(root, 'train')
+
+
+def default_rendition_dir(root):
+    return os.path.join(root, 'sign_renditions')
+
+
+def normalize_word(word):
+    return word.lower().strip()
+
+
+def file_etag(path):
+    """Empreinte du contenu (ETag fort, stable d'une machine à l'autre)"""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _iter_boxes(f, end):
+    while f.tell() + 8 <= end:
+        start = f.tell()
+        size, box_type = struct.unpack('>I4s', f.read(8))
+        header = 8
+        if size == 1:
+            size = struct.unpack('>Q', f.read(8))[0]
+            header = 16
+        elif size == 0:
+            size = end - start
+        if size < header:
+            return
+        yield box_type, start + header, start + size
+        f.seek(start + size)
+
+
+def mp4_duration(path):
+    """Durée (s) lue dans moov/mvhd sans ffprobe ; None si le fichier n'est pas lisible"""
+    try:
+        with open(path, 'rb') as f:
+            end = os.fstat(f.fileno()).st_size
+            for box_type, body, box_end in _iter_boxes(f, end):
+                if box_type != b'moov':
+                    continue
+                f.seek(body)
+                for child, child_body, _ in _iter_boxes(f, box_end):
+                    if child != b'mvhd':
+                        continue
+                    f.seek(child_body)
+                    version = f.read(1)[0]
+                    f.read(3)
+                    if version == 1:
+                        f.read(16)
+                        timescale, duration = struct.unpack('>IQ', f.read(12))
+                    else:
+                        f.read(8)
+                        timescale, duration = struct.unpack('>II', f.read(8))
+                    return round(duration / timescale, 3) if timescale else None
+    except (OSError, struct.error, IndexError):
+        pass
+    return None
+
+
+class SignMediaIndex:
+    def __init__(self, train_dir, index_path, poll_interval=30):
+        self.train_dir = os.path.abspath(train_dir)
+        self.index_path = index_path
+        self.poll_interval = poll_interval
+
+        self._entries = {}
+        self._dir_mtimes = {}
+        self._lock = threading.Lock()
+        self._watcher = None
+        self._watcher_pid = None
+        self._built_at = None
+        self._build_seconds = None
+
+    # ----- construction -----
+
+    def _load_file(self):
+        try:
+            with open(self.index_path, encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if data.get('version') != INDEX_VERSION or data.get('train_dir') != self.train_dir:
+            return {}
+        return {word: dict(zip(ENTRY_FIELDS, values)) for word, values in data['entries'].items()}
+
+    def _save_file(self, entries):
+        directory = os.path.dirname(self.index_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        data = {
+            'version': INDEX_VERSION,
+            'train_dir': self.train_dir,
+            'entries': {word: [entry[field] for field in ENTRY_FIELDS] for word, entry in entries.items()},
+        }
+        # Fichier temporaire propre à ce processus : tous les workers gunicorn construisent
+        # l'index au démarrage, le dernier os.replace l'emporte sans mélange d'écritures
+        fd, tmp_path = tempfile.mkstemp(suffix='.tmp', dir=directory or '.')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(data, f, separators=(',', ':'))
+            os.replace(tmp_path, self.index_path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+    def _scan_dir_mtimes(self):
+        mtimes = {}
+        if not os.path.isdir(self.train_dir):
+            return mtimes
+        mtimes[''] = os.stat(self.train_dir).st_mtime
+        with os.scandir(self.train_dir) as it:
+            for entry in it:
+                if entry.is_dir():
+                    mtimes[entry.name] = entry.stat().st_mtime
+        return mtimes
+
+    def build(self, previous=None):
+        """(Re)construire l'index ; les fichiers inchangés reprennent leur entrée précédente"""
+        start = time.perf_counter()
+        previous = self._entries if previous is None else previous
+        dir_mtimes = self._scan_dir_mtimes()
+        entries = {}
+        hashed = 0
+
+        for word_dir in sorted(name for name in dir_mtimes if name):
+            path = os.path.join(self.train_dir, word_dir)
+            videos = sorted(name for name in os.listdir(path) if name.lower().endswith(VIDEO_EXTENSIONS))
+            if not videos:
+                continue
+            video_path = os.path.join(path, videos[0])
+            stat = os.stat(video_path)
+            word = normalize_word(word_dir)
+            relative = os.path.join(word_dir, videos[0])
+            old = previous.get(word)
+            if old and old['file'] == relative and old['size'] == stat.st_size and old['mtime'] == int(stat.st_mtime):
+                entries[word] = old
+                continue
+            entries[word] = {
+                'file': relative,
+                'size': stat.st_size,
+                'mtime': int(stat.st_mtime),
+                'duration': mp4_duration(video_path),
+                'etag': file_etag(video_path),
+            }
+            hashed += 1
+
+        with self._lock:
+            self._entries = entries
+            self._dir_mtimes = dir_mtimes
+            self._built_at = time.time()
+            self._build_seconds = time.perf_counter() - start
+        if hashed or set(entries) != set(previous):
+            self._save_file(entries)
+        logging.info(f"Index des vidéos de signes: {len(entries)} mots ({hashed} fichiers relus) "
+                     f"en {self._build_seconds:.2f}s")
+        return entries
+
+    def load(self):
+        """Charger l'index sauvegardé puis le mettre à jour par rapport au disque"""
+        return self.build(previous=self._load_file())
+
+    def _files_changed(self):
+        """Un clip indexé a été réécrit sur place (le dossier garde alors sa date)"""
+        for entry in self._entries.values():
+            try:
+                stat = os.stat(self.path_for(entry))
+            except OSError:
+                return True
+            if stat.st_size != entry['size'] or int(stat.st_mtime) != entry['mtime']:
+                return True
+        return False
+
+    def refresh_if_changed(self):
+        if self._scan_dir_mtimes() != self._dir_mtimes or self._files_changed():
+            self.build()
+            return True
+        return False
+
+    # ----- consultation -----
+
+    def lookup(self, word):
+        """Entrée du mot (dict avec file, size, mtime, duration, etag) ou None"""
+        return self._entries.get(normalize_word(word))
+
+    def path_for(self, entry):
+        return os.path.join(self.train_dir, entry['file'])
+
+    def stats(self):
+        return {
+            'words': len(self._entries),
+            'train_dir': self.train_dir,
+            'built_at': self._built_at,
+            'build_seconds': self._build_seconds,
+        }
+
+    # ----- surveillance -----
+
+    def start_watcher(self):
+        if not self.poll_interval or (self._watcher is not None and self._watcher_pid == os.getpid()):
+            return
+        with self._lock:
+            if self._watcher is not None and self._watcher_pid == os.getpid():
+                return
+            self._watcher_pid = os.getpid()
+            self._watcher = threading.Thread(target=self._watch, name='sign-media-index', daemon=True)
+            self._watcher.start()
+
+    def _watch(self):
+        while True:
+            time.sleep(self.poll_interval)
+            try:
+                self.refresh_if_changed()
+            except Exception as e:
+                logging.error(f"Mise à jour de l'index des vidéos impossible: {e}")
+
+
+class SignRenditions:
+    """Manifeste des renditions, rechargé quand le script de transcodage le réécrit"""
+
+    def __init__(self, rendition_dir, poll_interval=30):
+        self.rendition_dir = os.path.abspath(rendition_dir)
+        self.manifest_path = os.path.join(self.rendition_dir, RENDITION_MANIFEST)
+        self.poll_interval = poll_interval
+
+        self._entries = {}
+        self._mtime = None
+        self._checked_at = 0.0
+
+    def load(self):
+        try:
+            mtime = os.stat(self.manifest_path).st_mtime
+            with open(self.manifest_path, encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            self._entries, self._mtime = {}, None
+            return self._entries
+        self._entries = data.get('entries', {}) if data.get('version') == INDEX_VERSION else {}
+        self._mtime = mtime
+        return self._entries
+
+    def save(self, entries):
+        os.makedirs(self.rendition_dir, exist_ok=True)
+        data = {'version': INDEX_VERSION, 'spec': RENDITION_SPEC, 'entries': entries}
+        with open(self.manifest_path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(data, f, separators=(',', ':'))
+        os.replace(self.manifest_path + '.tmp', self.manifest_path)
+        self._entries = entries
+
+    def _reload_if_changed(self):
+        # Au plus un stat du manifeste par intervalle, pas un par requête
+        now = time.monotonic()
+        if not self.poll_interval or now - self._checked_at < self.poll_interval:
+            return
+        self._checked_at = now
+        try:
+            mtime = os.stat(self.manifest_path).st_mtime
+        except OSError:
+            mtime = None
+        if mtime != self._mtime:
+            self.load()
+
+    def lookup(self, word):
+        """Renditions du mot ({'mp4': {...}, 'webm': {...}, 'poster': {...}}) ou None"""
+        self._reload_if_changed()
+        return self._entries.get(normalize_word(word))
+
+    def path_for(self, entry, kind):
+        return os.path.join(self.rendition_dir, entry[kind]['file'])
+
+    def stats(self):
+        return {'words': len(self._entries), 'rendition_dir': self.rendition_dir}
+
+
+def select_rendition(request):
+    """Format à servir d'après la requête : 'mp4', 'webm' ou None (clip d'origine)
+
+    - `?quality=original` : clip d'origine, sauf si le client a demandé `Save-Data: on`
+    - `?format=webm|mp4` : format imposé
+    - sinon WebM seulement si l'en-tête Accept le préfère explicitement à MP4
+      (Safari envoie */*, Firefox video/webm en premier)
+    """
+    save_data = request.headers.get('Save-Data', '').lower() == 'on'
+    if request.args.get('quality') == 'original' and not save_data:
+        return None
+    requested = request.args.get('format')
+    if requested in ('mp4', 'webm'):
+        return requested
+    accept = request.accept_mimetypes
+    return 'webm' if accept['video/webm'] > accept['video/mp4'] else 'mp4'
+
+
+def init_app(app):
+    """Charger l'index au démarrage et enregistrer `flask build-sign-index`"""
+    root = os.path.join(app.root_path, '..')
+    index = SignMediaIndex(
+        app.config.get('SIGN_VIDEO_DIR') or default_train_dir(root),
+        app.config.get('SIGN_INDEX_PATH', 'sign_media_index.json'),
+        app.config.get('SIGN_INDEX_POLL_INTERVAL', 30),
+    )
+    app.extensions['sign_media_index'] = index
+    try:
+        index.load()
+    except Exception as e:
+        logging.error(f"Construction de l'index des vidéos impossible: {e}")
+
+    renditions = SignRenditions(
+        app.config.get('SIGN_RENDITION_DIR') or default_rendition_dir(root),
+        app.config.get('SIGN_INDEX_POLL_INTERVAL', 30),
+    )
+    app.extensions['sign_renditions'] = renditions
+    renditions.load()
+
+    @app.cli.command('build-sign-index')
+    def build_sign_index_command():
+        """Reconstruire complètement l'index des vidéos de signes"""
+        entries = index.build(previous={})
+        print(f"{len(entries)} mots indexés dans {index.index_path}")
+
+    return index
+
+
+def get_sign_index():
+    index = current_app.extensions.get('sign_media_index')
+    if index is None:
+        index = init_app(current_app._get_current_object())
+    # Le thread de surveillance démarre dans chaque processus qui sert des requêtes
+    index.start_watcher()
+    return index
+
+
+def get_sign_renditions():
+    renditions = current_app.extensions.get('sign_renditions')
+    if renditions is None:
+        init_app(current_app._get_current_object())
+        renditions = current_app.extensions['sign_renditions']
+    return renditions
@@ -0,0 +1,213 @@
+"""
+Vidéos de phrases : les clips des signes d'une séquence assemblés en une seule vidéo.
+
+Pour ["YOUR", "NAME", "WHAT"], le client enchaînait une requête et un
+démarrage de décodeur par mot. Les renditions 240p ayant toutes les mêmes
+paramètres (voir scripts/build_sign_renditions.py), elles sont concaténées
+par le démultiplexeur concat de ffmpeg sans réencodage (`-c copy`).
+
+Le résultat est rangé dans un cache adressé par contenu : la clé est le
+SHA-256 de la séquence, du format et des ETags des renditions utilisées, si
+bien qu'un clip retranscodé donne une nouvelle clé. Chaque lecture met à jour
+la date du fichier ; après un nouveau rendu, les fichiers les moins récemment
+lus sont supprimés jusqu'à repasser sous SENTENCE_VIDEO_CACHE_MAX_MB. Le
+cache étant sur disque, il est partagé par tous les workers.
+
+Au plus SENTENCE_VIDEO_MAX_RENDERS ffmpeg tournent en même temps par
+processus ; au-delà, une requête attend une place au plus
+SENTENCE_VIDEO_RENDER_WAIT secondes puis reçoit SentenceRenderBusy (503).
+"""
+import os
+import json
+import time
+import hashlib
+import logging
+import tempfile
+import threading
+
+from flask import current_app
+
+from backend.sign_media import get_sign_renditions, normalize_word
+from backend.utils.ffmpeg import find_ffmpeg, run_ffmpeg
+
+OUTPUT_ARGS = {
+    'mp4': ['-c', 'copy', '-movflags', '+faststart', '-f', 'mp4'],
+    'webm': ['-c', 'copy', '-f', 'webm'],
+}
+
+
+def sequence_key(kind, words, etags):
+    payload = json.dumps({'kind': kind, 'signs': words, 'etags': etags}, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class SentenceRenderBusy(Exception):
+    """Tous les rendus ffmpeg autorisés sont en cours"""
+
+
+def _concat_line(path):
+    # Syntaxe du fichier de liste concat : apostrophes échappées
+    return "file '" + path.replace("'", "'\\''") + "'\n"
+
+
+class SentenceVideoCache:
+    def __init__(self, cache_dir, max_bytes, ffmpeg_path=None, max_renders=2, render_wait=30):
+        self.cache_dir = os.path.abspath(cache_dir)
+        self.max_bytes = max_bytes
+        self.ffmpeg_path = ffmpeg_path
+        self.render_wait = render_wait
+
+        # clé -> [verrou, nombre de requêtes qui l'utilisent]
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+        self._render_slots = threading.BoundedSemaphore(max_renders)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.render_seconds = 0.0
+
+    def path_for(self, key, kind):
+        return os.path.join(self.cache_dir, key[:2], f'{key}.{kind}')
+
+    def _acquire_lock(self, key):
+        """Verrou de la clé, partagé tant qu'une requête l'utilise encore"""
+        with self._locks_guard:
+            holder = self._locks.setdefault(key, [threading.Lock(), 0])
+            holder[1] += 1
+            return holder[0]
+
+    def _release_lock(self, key):
+        with self._locks_guard:
+            holder = self._locks[key]
+            holder[1] -= 1
+            if not holder[1]:
+                del self._locks[key]
+
+    def get_or_render(self, kind, words, clip_paths, etags):
+        """(chemin, clé) de la vidéo de la séquence, rendue si elle n'est pas en cache"""
+        key = sequence_key(kind, words, etags)
+        path = self.path_for(key, kind)
+        # Un seul rendu par clé dans le processus, même si la phrase est demandée en rafale
+        lock = self._acquire_lock(key)
+        try:
+            with lock:
+                if os.path.exists(path):
+                    self.hits += 1
+                    try:
+                        os.utime(path)  # ordre LRU
+                    except OSError:
+                        pass
+                    return path, key
+                self.misses += 1
+                if not self._render_slots.acquire(timeout=self.render_wait):
+                    raise SentenceRenderBusy("Trop de vidéos de phrases en cours de rendu")
+                try:
+                    self._render(kind, clip_paths, path)
+                finally:
+                    self._render_slots.release()
+        finally:
+            self._release_lock(key)
+        self._evict(keep=path)
+        return path, key
+
+    def _render(self, kind, clip_paths, path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        start = time.perf_counter()
+        fd, list_path = tempfile.mkstemp(suffix='.txt', dir=os.path.dirname(path))
+        # Nom unique même entre threads et entre workers (ffmpeg l'écrase grâce à -y)
+        part_fd, partial = tempfile.mkstemp(suffix='.part', dir=os.path.dirname(path))
+        os.close(part_fd)
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.writelines(_concat_line(clip) for clip in clip_paths)
+            run_ffmpeg(['-f', 'concat', '-safe', '0', '-i', list_path] + OUTPUT_ARGS[kind] + [partial],
+                       find_ffmpeg(self.ffmpeg_path), timeout=60)
+            os.replace(partial, path)
+        finally:
+            os.remove(list_path)
+            if os.path.exists(partial):
+                os.remove(partial)
+        self.render_seconds += time.perf_counter() - start
+
+    def _scan(self):
+        files = []
+        if not os.path.isdir(self.cache_dir):
+            return files
+        for shard in os.scandir(self.cache_dir):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if not entry.name.endswith(tuple(f'.{kind}' for kind in OUTPUT_ARGS)):
+                    continue
+                stat = entry.stat()
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+        return files
+
+    def _evict(self, keep=None):
+        """Supprimer les vidéos les moins récemment lues au-delà de max_bytes"""
+        if not self.max_bytes:
+            return
+        files = sorted(self._scan())
+        total = sum(size for _, size, _ in files)
+        for _, size, path in files:
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            self.evictions += 1
+
+    def stats(self):
+        files = self._scan()
+        return {
+            'cache_dir': self.cache_dir,
+            'files': len(files),
+            'bytes': sum(size for _, size, _ in files),
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'render_seconds': round(self.render_seconds, 3),
+        }
+
+
+def render_sentence(words, kind='mp4'):
+    """Vidéo d'une séquence de signes : (chemin, clé, signes inclus, signes sans rendition)"""
+    renditions = get_sign_renditions()
+    included, missing, clip_paths, etags = [], [], [], []
+    for word in words:
+        entry = renditions.lookup(word)
+        if not entry or kind not in entry:
+            missing.append(word)
+            continue
+        included.append(normalize_word(word))
+        clip_paths.append(renditions.path_for(entry, kind))
+        etags.append(entry[kind]['etag'])
+    if not included:
+        return None, None, included, missing
+    path, key = get_sentence_cache().get_or_render(kind, included, clip_paths, etags)
+    return path, key, included, missing
+
+
+def init_app(app):
+    cache = SentenceVideoCache(
+        app.config.get('SENTENCE_VIDEO_CACHE_DIR') or os.path.join(app.root_path, '..', 'sentence_video_cache'),
+        app.config.get('SENTENCE_VIDEO_CACHE_MAX_MB', 512) * 1024 * 1024,
+        app.config.get('FFMPEG_PATH'),
+        max_renders=app.config.get('SENTENCE_VIDEO_MAX_RENDERS', 2),
+        render_wait=app.config.get('SENTENCE_VIDEO_RENDER_WAIT', 30),
+    )
+    app.extensions['sentence_video_cache'] = cache
+    logging.info(f"Cache des vidéos de phrases: {cache.cache_dir}")
+    return cache
+
+
+def get_sentence_cache():
+    cache = current_app.extensions.get('sentence_video_cache')
+    if cache is None:
+        cache = init_app(current_app._get_current_object())
+    return cache
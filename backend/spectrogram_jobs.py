@@ -0,0 +1,266 @@
+"""
+Génération des spectrogrammes d'entraînement en arrière-plan.
+
+`/api/training/save` enregistre l'audio puis dépose un job : le calcul du
+mel-spectrogramme (librosa) se fait dans un pool de processus, et le résultat
+est écrit directement depuis NumPy (PNG en niveaux de gris + tableau `.npy`
+brut), sans matplotlib. L'état de chaque job est persisté en JSON sur disque :
+les jobs interrompus par un redémarrage sont relancés au démarrage suivant.
+
+Les workers sont lancés en forkserver (spawn à défaut) et n'exécutent que
+backend/utils/spectrogram.py : jamais de fork du processus web, dont les
+threads (writer des prédictions, pool MySQL, TensorFlow) pourraient laisser
+des verrous pris dans l'enfant. Chaque job est réservé par un verrou fcntl
+sur `<id>.lock` avant d'être lancé : avec plusieurs workers gunicorn, un job
+repris au démarrage n'est calculé que par un seul d'entre eux, et le verrou
+disparaît avec le processus s'il meurt.
+"""
+import os
+import re
+import json
+import time
+import uuid
+import glob
+import atexit
+import logging
+import threading
+import importlib.util
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from flask import current_app
+
+from backend.utils.spectrogram import compute_spectrogram
+
+try:
+    import fcntl
+except ImportError:  # Windows : un seul processus en développement, pas de verrou
+    fcntl = None
+
+# librosa n'est importé que dans les processus workers
+HAS_TRAINING_LIBS = importlib.util.find_spec('librosa') is not None
+
+# Jobs terminés conservés une semaine pour la consultation du statut
+FINISHED_JOB_TTL = 7 * 24 * 3600
+
+_JOB_ID = re.compile(r'^[0-9a-f]{32}$')
+
+
+# ----- côté application -----
+
+class SpectrogramJobs:
+    """Pool de processus + état des jobs persisté dans `state_dir`"""
+
+    def __init__(self, pool, workers=2, state_dir='spectrogram_jobs'):
+        self.pool = pool
+        self.workers = workers
+        self.state_dir = state_dir
+
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._futures = {}
+        self._claims = {}
+
+        self._stats = {
+            'submitted': 0,
+            'completed': 0,
+            'failed': 0,
+            'resumed': 0,
+        }
+
+    @classmethod
+    def from_config(cls, pool, config):
+        return cls(
+            pool,
+            workers=config.get('SPECTROGRAM_WORKERS', 2),
+            state_dir=config.get('SPECTROGRAM_JOB_DIR', 'spectrogram_jobs'),
+        )
+
+    def _get_executor(self):
+        """Pool de processus créé au premier job (et recréé après un fork)"""
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                methods = multiprocessing.get_all_start_methods()
+                context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+                if context.get_start_method() == 'forkserver':
+                    # Le serveur de fork importe NumPy/Pillow une fois pour tous les workers
+                    context.set_forkserver_preload(['backend.utils.spectrogram'])
+                self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+                self._pid = os.getpid()
+                self._futures = {}
+            return self._executor
+
+    # ----- état persistant -----
+
+    def _job_path(self, job_id):
+        return os.path.join(self.state_dir, f"{job_id}.json")
+
+    def _save(self, job):
+        job['updated_at'] = time.time()
+        path = self._job_path(job['id'])
+        os.makedirs(self.state_dir, exist_ok=True)
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(job, f)
+        os.replace(path + '.tmp', path)
+
+    def _claim(self, job_id):
+        """Réserver un job pour ce processus ; False s'il est déjà pris ailleurs"""
+        if fcntl is None:
+            return True
+        fd = os.open(os.path.join(self.state_dir, f"{job_id}.lock"), os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        self._claims[job_id] = fd
+        return True
+
+    def _release(self, job_id):
+        fd = self._claims.pop(job_id, None)
+        if fd is None:
+            return
+        try:
+            os.remove(os.path.join(self.state_dir, f"{job_id}.lock"))
+        except OSError:
+            pass
+        os.close(fd)
+
+    def _load(self, path):
+        try:
+            with open(path, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def get(self, job_id):
+        """État d'un job (None si inconnu)"""
+        if not _JOB_ID.match(job_id or ''):
+            return None
+        job = self._load(self._job_path(job_id))
+        if job and job['status'] == 'queued':
+            future = self._futures.get(job_id)
+            if future is not None and future.running():
+                job['status'] = 'running'
+        return job
+
+    # ----- soumission -----
+
+    def submit(self, label_id, user_email, audio_path, png_path, npy_path):
+        """Déposer un job et rendre la main immédiatement"""
+        job = {
+            'id': uuid.uuid4().hex,
+            'label_id': label_id,
+            'user_email': user_email,
+            'audio_path': audio_path,
+            'spectrogram_path': png_path,
+            'mel_path': npy_path,
+            'status': 'queued',
+            'created_at': time.time(),
+        }
+        self._save(job)
+        self._claim(job['id'])
+        self._dispatch(job)
+        self._stats['submitted'] += 1
+        return job
+
+    def _dispatch(self, job):
+        future = self._get_executor().submit(
+            compute_spectrogram, job['audio_path'], job['spectrogram_path'], job['mel_path'])
+        self._futures[job['id']] = future
+        future.add_done_callback(lambda f: self._on_done(job, f))
+
+    def _on_done(self, job, future):
+        """Callback (thread du pool) : mettre à jour la ligne d'entraînement et l'état du job"""
+        self._futures.pop(job['id'], None)
+        if future.cancelled():
+            # Arrêt (close) : le job reste 'queued' sur disque et sera repris au démarrage suivant
+            self._release(job['id'])
+            return
+        try:
+            result = future.result()
+            self._update_label(job['label_id'], result)
+        except Exception as e:
+            logging.error(f"Job spectrogramme {job['id']} en échec: {e}")
+            job.update(status='failed', error=str(e))
+            self._stats['failed'] += 1
+        else:
+            job.update(status='done', result=result)
+            self._stats['completed'] += 1
+        self._save(job)
+        self._release(job['id'])
+
+    def _update_label(self, label_id, result):
+        conn = self.pool.acquire()
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("""
+                    UPDATE asl_training_labels
+                    SET spectrogram_path = %s,
+                        action_metadata = JSON_SET(COALESCE(action_metadata, JSON_OBJECT()), '$.mel_path', %s)
+                    WHERE id = %s
+                """, (result['spectrogram_path'], result['mel_path'], label_id))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    def resume(self):
+        """
+        Relancer les jobs non terminés (redémarrage pendant un calcul) et
+        purger les jobs terminés trop anciens. Appelé par chaque worker
+        gunicorn : seul celui qui obtient le verrou d'un job le relance.
+        """
+        now = time.time()
+        for path in glob.glob(os.path.join(self.state_dir, '*.json')):
+            job = self._load(path)
+            if job is None:
+                continue
+            if job['status'] == 'queued':
+                job_id = job['id']
+                if job_id in self._claims or not self._claim(job_id):
+                    continue
+                # Relire après le verrou : le job a pu se terminer entre-temps
+                job = self._load(path)
+                if job is None or job['status'] != 'queued':
+                    self._release(job_id)
+                    continue
+                logging.info(f"Reprise du job spectrogramme {job['id']}")
+                self._dispatch(job)
+                self._stats['resumed'] += 1
+            elif now - job.get('updated_at', now) > FINISHED_JOB_TTL:
+                os.remove(path)
+
+    def close(self):
+        """Les jobs non terminés restent 'queued' sur disque et seront repris"""
+        if self._executor is not None and self._pid == os.getpid():
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self):
+        stats = dict(self._stats)
+        stats['pending'] = len(self._futures)
+        stats['workers'] = self.workers
+        return stats
+
+
+def init_app(app):
+    """Créer la file de jobs de l'application et reprendre les jobs interrompus"""
+    from backend.database import get_pool
+
+    jobs = SpectrogramJobs.from_config(get_pool(app), app.config)
+    app.extensions['spectrogram_jobs'] = jobs
+    # Ne pas relancer de jobs depuis un processus worker qui réimporte l'application
+    if HAS_TRAINING_LIBS and multiprocessing.parent_process() is None:
+        jobs.resume()
+    atexit.register(jobs.close)
+    return jobs
+
+
+def get_spectrogram_jobs():
+    jobs = current_app.extensions.get('spectrogram_jobs')
+    if jobs is None:
+        jobs = init_app(current_app._get_current_object())
+    return jobs
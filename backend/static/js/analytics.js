@@ -233,7 +233,7 @@ function updateCharts(data) {
 async function updateTable(data) {
     // Charger les données détaillées pour le tableau
     try {
-        const response = await fetch('/api/powerbi/export');
+        const response = await fetch('/api/powerbi/export?limit=50');
         const exportData = await response.json();
 
         if (response.ok && exportData.data) {
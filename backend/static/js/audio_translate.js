@@ -292,6 +292,9 @@ function resetAvatar() {
 let animationTimeouts = [];
 let videoQueue = [];
 let isPlayingSequence = false;
+// Consecutive signs without a 3D animation are played as one stream (/api/video-sequence)
+const MAX_SEQUENCE_SIGNS = 30;  // SENTENCE_VIDEO_MAX_SIGNS on the server
+let sequenceVideoFailed = false;
 
 function animateSigns(signs) {
     stopAnimation(); // Stop any current animation
@@ -305,15 +308,23 @@ function animateSigns(signs) {
 
     // Prepare queue - Filter out nulls or invalid entries if any
     videoQueue = signs.map(s => typeof s === 'string' ? s : (s.asl_word || s)).filter(s => s && !s.startsWith('UNKNOWN_'));
+    sequenceVideoFailed = false;
 
     if (videoQueue.length > 0) {
-        playNextVideo(0);
+        // Download the avatar animations of the whole sentence in one request
+        const ready = typeof loadASLAnimations === 'function' ? loadASLAnimations(videoQueue) : Promise.resolve();
+        ready.then(() => playNextVideo(0));
     } else {
         resetAvatar();
         if (statusText) statusText.textContent = "Aucun signe connu trouvé.";
     }
 }
 
+function has3DSign(word) {
+    const known3DSigns = ['HELLO', 'GOOD_MORNING', 'THANKS', 'PLEASE', 'YES', 'NO', 'I', 'YOU', '21'];
+    return known3DSigns.includes(word.toUpperCase()) || (typeof hasASLAnimation === 'function' && hasASLAnimation(word));
+}
+
 function playNextVideo(index) {
     const avatarImg = document.getElementById('proAvatarImg');
     const videoPlayer = document.getElementById('signVideoPlayer');
@@ -360,9 +371,7 @@ function playNextVideo(index) {
     // If it's one of our hardcoded procedural signs -> 3D Avatar
     // Else -> Video (User might accept video if avatar is impossible, OR we show generic gesture)
 
-    const known3DSigns = ['HELLO', 'GOOD_MORNING', 'THANKS', 'PLEASE', 'YES', 'NO', 'I', 'YOU', '21'];
-
-    if (known3DSigns.includes(word.toUpperCase())) {
+    if (has3DSign(word)) {
         if (avatarImg) avatarImg.style.display = 'none';
         if (videoPlayer) videoPlayer.style.display = 'none';
         const avatar3DContainer = document.getElementById('avatar3DContainer');
@@ -380,7 +389,21 @@ function playNextVideo(index) {
     // OR we could generic gesture?
     // Let's stick to video for unknown words for now, as "generic waving" is not translation.
 
-    const videoUrl = `/api/video/${encodeURIComponent(word)}`;
+    // Following signs without animation: one sentence video instead of one request per sign
+    let end = index + 1;
+    if (!sequenceVideoFailed) {
+        while (end < videoQueue.length && end - index < MAX_SEQUENCE_SIGNS && !has3DSign(videoQueue[end])) end++;
+    }
+    const run = videoQueue.slice(index, end);
+    const wordUrl = `/api/video/${encodeURIComponent(word)}`;
+    const videoUrl = run.length > 1
+        ? `/api/video-sequence?signs=${run.map(encodeURIComponent).join(',')}`
+        : wordUrl;
+
+    if (run.length > 1) {
+        if (currentSignName) currentSignName.textContent = `Signes: ${run.join(' ').toUpperCase()}`;
+        showSignBadge(run.join(' '));
+    }
 
     // Switch to video mode
     if (avatarImg) avatarImg.style.display = 'none';
@@ -390,6 +413,7 @@ function playNextVideo(index) {
     if (videoPlayer) {
         videoPlayer.classList.add('active');
         videoPlayer.style.display = 'block';
+        videoPlayer.poster = `${wordUrl}/poster`;
         videoPlayer.src = videoUrl;
         videoPlayer.load();
 
@@ -410,7 +434,7 @@ function playNextVideo(index) {
 
             // Play next after short pause
             setTimeout(() => {
-                playNextVideo(index + 1);
+                playNextVideo(end);
             }, 500);
         };
 
@@ -418,6 +442,13 @@ function playNextVideo(index) {
             videoPlayer.removeEventListener('canplay', onCanPlay);
             videoPlayer.removeEventListener('ended', onEnded);
             videoPlayer.removeEventListener('error', onError);
+            if (run.length > 1) {
+                // Sentence video unavailable: replay these signs one clip at a time
+                console.warn(`Sequence video failed for ${run.join(',')}`);
+                sequenceVideoFailed = true;
+                playNextVideo(index);
+                return;
+            }
             handleVideoError(index, word);
         };
 
@@ -648,7 +679,7 @@ async function submitTrainingData() {
 
         const result = await response.json();
         if (response.ok) {
-            alert('Échantillon sauvegardé avec succès dans le dataset d\'entraînement !');
+            alert('Échantillon sauvegardé ! Le spectrogramme est généré en arrière-plan.');
             closeTrainingModal();
         } else {
             alert('Erreur: ' + (result.error || 'Erreur inconnue'));
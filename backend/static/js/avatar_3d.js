@@ -384,8 +384,12 @@ async function playASLAnimation(aslSign) {
             mixer.addEventListener('finished', onFinished);
         });
     } else {
-        // Fallback to procedural keyframe animation
-        const animData = getASLAnimationData(aslSign);
+        // Fallback to procedural keyframe animation, then to the extracted one
+        let animData = getASLAnimationData(aslSign);
+        if (!animData) {
+            await loadASLAnimations([aslSign]);
+            animData = aslAnimationCache.get(animationKey(aslSign));
+        }
         if (animData) {
             return new Promise((resolve) => {
                 playProceduralAnimation(animData, resolve);
@@ -488,6 +492,93 @@ function getASLAnimationData(aslSign) {
     return signs[aslSign.toUpperCase()];
 }
 
+/**
+ * Compact binary animations (.asla, see backend/utils/animation_format.py)
+ * Channel ids index this list: keep it in sync with CHANNELS on the server.
+ */
+const ASLA_CHANNELS = [
+    'time',
+    'rightHand.pos.x', 'rightHand.pos.y', 'rightHand.pos.z',
+    'fingers.right.thumb', 'fingers.right.index', 'fingers.right.middle',
+    'fingers.right.ring', 'fingers.right.pinky',
+    'rightArm.rot.x', 'rightArm.rot.z'
+];
+const ASLA_MISSING = -32768;
+
+function decodeASLAnimation(buffer) {
+    const view = new DataView(buffer);
+    const magic = String.fromCharCode(view.getUint8(0), view.getUint8(1), view.getUint8(2), view.getUint8(3));
+    if (magic !== 'ASLA' || view.getUint8(4) !== 1) throw new Error('Unknown animation format');
+
+    const channelCount = view.getUint16(6, true);
+    const frameCount = view.getUint32(8, true);
+    const duration = view.getFloat32(12, true);
+    const keyframes = Array.from({ length: frameCount }, () => ({}));
+
+    let offset = 16 + channelCount * 8;
+    for (let c = 0; c < channelCount; c++) {
+        const path = ASLA_CHANNELS[view.getUint8(16 + c * 8)];
+        const scale = view.getFloat32(16 + c * 8 + 4, true);
+        // Int16Array reads native (little-endian) order, one typed view per channel
+        const values = new Int16Array(buffer, offset, frameCount);
+        offset += frameCount * 2;
+        if (!path) continue;
+        const parts = path.split('.');
+        for (let f = 0; f < frameCount; f++) {
+            if (values[f] === ASLA_MISSING) continue;
+            let target = keyframes[f];
+            for (let p = 0; p < parts.length - 1; p++) target = target[parts[p]] ||= {};
+            target[parts[parts.length - 1]] = values[f] / scale;
+        }
+    }
+    return { duration: Math.round(duration * 1000) / 1000, keyframes };
+}
+
+/**
+ * On-demand animation loading (/api/animations), cached per sign for the page lifetime
+ */
+const aslAnimationCache = new Map();
+
+function animationKey(sign) {
+    return sign.trim().toLowerCase().replace(/ /g, '_');
+}
+
+function decodeASLAnimationBatch(buffer) {
+    const view = new DataView(buffer);
+    const decoder = new TextDecoder();
+    const animations = new Map();
+    const count = view.getUint16(4, true);
+    let offset = 6;
+    for (let i = 0; i < count; i++) {
+        const nameLength = view.getUint8(offset);
+        const name = decoder.decode(new Uint8Array(buffer, offset + 1, nameLength));
+        offset += 1 + nameLength;
+        const size = view.getUint32(offset, true);
+        offset += 4;
+        // slice() copies to a fresh buffer: keeps the Int16Array views aligned
+        animations.set(name, decodeASLAnimation(buffer.slice(offset, offset + size)));
+        offset += size;
+    }
+    return animations;
+}
+
+async function loadASLAnimations(signs) {
+    const wanted = [...new Set(signs.map(animationKey))].filter(s => s && !aslAnimationCache.has(s));
+    if (!wanted.length) return;
+    try {
+        const response = await fetch(`/api/animations?signs=${encodeURIComponent(wanted.join(','))}`);
+        if (!response.ok) return;
+        const animations = decodeASLAnimationBatch(await response.arrayBuffer());
+        wanted.forEach(s => aslAnimationCache.set(s, animations.get(s) || null));
+    } catch (e) {
+        console.warn('Animation download failed:', e);
+    }
+}
+
+function hasASLAnimation(sign) {
+    return !!aslAnimationCache.get(animationKey(sign));
+}
+
 /**
  * Play keyframe-based procedural animation
  */
@@ -539,6 +630,7 @@ function playProceduralAnimation(data, callback) {
  */
 async function playASLSequence(signs) {
     const progress = document.getElementById('animationProgress');
+    await loadASLAnimations(signs);
     for (let i = 0; i < signs.length; i++) {
         const sign = signs[i];
         if (progress) progress.style.width = ((i + 1) / signs.length * 100) + '%';
@@ -51,6 +51,9 @@ let signInterval = null;
 let videoQueue = [];
 let isPlayingSequence = false;
 let animationTimeouts = [];
+// Consecutive signs without a 3D animation are played as one stream (/api/video-sequence)
+const MAX_SEQUENCE_SIGNS = 30;  // SENTENCE_VIDEO_MAX_SIGNS on the server
+let sequenceVideoFailed = false;
 
 // ===== TOGGLE FUNCTIONS =====
 
@@ -382,8 +385,11 @@ function animateSigns(signs) {
     openAvatarView();
     // Reset queue
     videoQueue = signs.map(s => typeof s === 'string' ? s : (s.asl_word || s)).filter(s => s);
+    sequenceVideoFailed = false;
     if (videoQueue.length > 0) {
-        playNextVideo(0);
+        // Download the avatar animations of the whole sentence in one request
+        const ready = typeof loadASLAnimations === 'function' ? loadASLAnimations(videoQueue) : Promise.resolve();
+        ready.then(() => playNextVideo(0));
     } else {
         closeAvatarView();
     }
@@ -423,6 +429,12 @@ function closeAvatarView() {
     }
 }
 
+function has3DSign(word) {
+    const known3DSigns = ['HELLO', 'GOOD_MORNING', 'THANKS', 'PLEASE', 'YES', 'NO', 'I', 'YOU', '21'];
+    if (typeof playASLAnimation !== 'function') return false;
+    return known3DSigns.includes(word.toUpperCase()) || (typeof hasASLAnimation === 'function' && hasASLAnimation(word));
+}
+
 function playNextVideo(index) {
     if (index >= videoQueue.length) {
         // Finished
@@ -450,9 +462,7 @@ function playNextVideo(index) {
     }
 
     // 1. Try 3D
-    const known3DSigns = ['HELLO', 'GOOD_MORNING', 'THANKS', 'PLEASE', 'YES', 'NO', 'I', 'YOU', '21'];
-
-    if (known3DSigns.includes(word.toUpperCase()) && typeof playASLAnimation === 'function') {
+    if (has3DSign(word)) {
         avatar3DContainer.style.display = 'block';
         signVideoPlayer.style.display = 'none';
         proAvatarImg.style.display = 'none';
@@ -463,24 +473,45 @@ function playNextVideo(index) {
         return;
     }
 
-    // 2. Fallback to Video
-    const videoUrl = `/api/video/${encodeURIComponent(word)}`;
+    // 2. Fallback to Video: the following signs without animation play as one stream
+    let end = index + 1;
+    if (!sequenceVideoFailed) {
+        while (end < videoQueue.length && end - index < MAX_SEQUENCE_SIGNS && !has3DSign(videoQueue[end])) end++;
+    }
+    const run = videoQueue.slice(index, end);
+    const wordUrl = `/api/video/${encodeURIComponent(word)}`;
+    const videoUrl = run.length > 1
+        ? `/api/video-sequence?signs=${run.map(encodeURIComponent).join(',')}`
+        : wordUrl;
+
+    if (run.length > 1) {
+        badge.textContent = run.join(' ');
+        if (currentSignName) currentSignName.textContent = `Signes: ${run.join(' ')}`;
+    }
 
     avatar3DContainer.style.display = 'none';
     signVideoPlayer.style.display = 'block';
     proAvatarImg.style.display = 'none';
 
+    signVideoPlayer.poster = `${wordUrl}/poster`;
     signVideoPlayer.src = videoUrl;
     signVideoPlayer.load();
 
     const onCanPlay = () => signVideoPlayer.play().catch(e => handleError());
     const onEnded = () => {
         cleanup();
-        setTimeout(() => playNextVideo(index + 1), 300);
+        setTimeout(() => playNextVideo(end), 300);
     };
     const handleError = () => {
-        console.warn(`Video missing for ${word}`);
         cleanup();
+        if (run.length > 1) {
+            // Sentence video unavailable: replay these signs one clip at a time
+            console.warn(`Sequence video failed for ${run.join(',')}`);
+            sequenceVideoFailed = true;
+            playNextVideo(index);
+            return;
+        }
+        console.warn(`Video missing for ${word}`);
         // Fallback to image + badge delay
         signVideoPlayer.style.display = 'none';
         proAvatarImg.style.display = 'block';
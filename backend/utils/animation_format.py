@@ -0,0 +1,145 @@
+"""
+Format binaire compact des animations de l'avatar (fichiers .asla)
+
+Les keyframes produites par scripts/extract_pose_from_video.py étaient du JSON
+indenté (dicts imbriqués, flottants arrondis au millième). Ici chaque canal
+(temps, position du poignet, flexion des doigts, rotation du bras) devient un
+tableau int16 contigu, lisible côté navigateur avec un simple `Int16Array` :
+
+    en-tête (16 octets, little-endian)
+        magic 'ASLA' | version u8 | réservé u8 | nb canaux u16 | nb frames u32 | durée f32
+    table des canaux (8 octets par canal)
+        id du canal u8 | 3 octets de bourrage | échelle f32
+    données : nb canaux x nb frames int16, canal par canal
+
+valeur réelle = entier / échelle ; MISSING (-32768) = canal absent dans la
+keyframe. L'échelle par défaut (1000) conserve exactement les valeurs du JSON
+(arrondies au millième) ; elle est réduite si un canal dépasserait l'int16.
+
+Un manifeste (index.json) liste les signes convertis : fichier, taille,
+ETag, durée, nombre de frames et date du JSON source.
+"""
+import os
+import json
+import struct
+import hashlib
+
+import numpy as np
+
+MAGIC = b'ASLA'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('<4sBBHIf')
+CHANNEL_ENTRY = struct.Struct('<B3xf')
+MISSING = -32768
+DEFAULT_SCALE = 1000.0
+EXTENSION = '.asla'
+MANIFEST_FILE = 'index.json'
+
+# Ordre fixe : l'id d'un canal est sa position (ne jamais réordonner, seulement ajouter)
+CHANNELS = (
+    'time',
+    'rightHand.pos.x', 'rightHand.pos.y', 'rightHand.pos.z',
+    'fingers.right.thumb', 'fingers.right.index', 'fingers.right.middle',
+    'fingers.right.ring', 'fingers.right.pinky',
+    'rightArm.rot.x', 'rightArm.rot.z',
+)
+
+
+class AnimationFormatError(ValueError):
+    """Fichier .asla invalide"""
+
+
+def normalize_sign(sign):
+    return sign.strip().lower().replace(' ', '_')
+
+
+def _get_path(keyframe, path):
+    value = keyframe
+    for part in path.split('.'):
+        if not isinstance(value, dict) or part not in value:
+            return None
+        value = value[part]
+    return value
+
+
+def _set_path(keyframe, path, value):
+    parts = path.split('.')
+    for part in parts[:-1]:
+        keyframe = keyframe.setdefault(part, {})
+    keyframe[parts[-1]] = value
+
+
+def encode_animation(animation):
+    """Dict {'duration', 'keyframes': [...]} (format JSON de l'avatar) -> octets .asla"""
+    keyframes = animation['keyframes']
+    columns = []
+    for channel_id, path in enumerate(CHANNELS):
+        values = [_get_path(kf, path) for kf in keyframes]
+        if all(v is None for v in values):
+            continue
+        present = np.array([v is not None for v in values])
+        floats = np.array([v if v is not None else 0.0 for v in values], dtype=np.float64)
+        peak = float(np.abs(floats).max()) if len(floats) else 0.0
+        scale = DEFAULT_SCALE if peak * DEFAULT_SCALE <= 32767 else 32767 / peak
+        quantized = np.round(floats * scale).astype(np.int16)
+        quantized[~present] = MISSING
+        columns.append((channel_id, scale, quantized))
+
+    parts = [HEADER.pack(MAGIC, FORMAT_VERSION, 0, len(columns), len(keyframes),
+                         float(animation.get('duration', 0)))]
+    parts += [CHANNEL_ENTRY.pack(channel_id, scale) for channel_id, scale, _ in columns]
+    parts += [column.astype('<i2').tobytes() for _, _, column in columns]
+    return b''.join(parts)
+
+
+def decode_animation(blob):
+    """Octets .asla -> dict {'duration', 'keyframes'} au format JSON de l'avatar"""
+    if len(blob) < HEADER.size:
+        raise AnimationFormatError("Fichier d'animation tronqué")
+    magic, version, _, channel_count, frame_count, duration = HEADER.unpack_from(blob)
+    if magic != MAGIC or version != FORMAT_VERSION:
+        raise AnimationFormatError("Format d'animation inconnu")
+    offset = HEADER.size + channel_count * CHANNEL_ENTRY.size
+    if len(blob) < offset + channel_count * frame_count * 2:
+        raise AnimationFormatError("Fichier d'animation tronqué")
+
+    keyframes = [{} for _ in range(frame_count)]
+    for index in range(channel_count):
+        channel_id, scale = CHANNEL_ENTRY.unpack_from(blob, HEADER.size + index * CHANNEL_ENTRY.size)
+        column = np.frombuffer(blob, dtype='<i2', count=frame_count, offset=offset)
+        offset += frame_count * 2
+        if channel_id >= len(CHANNELS):
+            continue  # canal d'une version plus récente
+        path = CHANNELS[channel_id]
+        for keyframe, value in zip(keyframes, column.tolist()):
+            if value != MISSING:
+                _set_path(keyframe, path, round(value / scale, 3))
+    return {'duration': round(duration, 3), 'keyframes': keyframes}
+
+
+def write_animation(path, animation):
+    """Écrire un .asla de façon atomique ; renvoie (taille, etag)"""
+    blob = encode_animation(animation)
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path + '.tmp', 'wb') as f:
+        f.write(blob)
+    os.replace(path + '.tmp', path)
+    return len(blob), hashlib.sha1(blob).hexdigest()
+
+
+def load_manifest(directory):
+    try:
+        with open(os.path.join(directory, MANIFEST_FILE), encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return data.get('signs', {}) if data.get('version') == FORMAT_VERSION else {}
+
+
+def save_manifest(directory, signs):
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, MANIFEST_FILE)
+    data = {'version': FORMAT_VERSION, 'channels': CHANNELS, 'signs': signs}
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(data, f, separators=(',', ':'), sort_keys=True)
+    os.replace(path + '.tmp', path)
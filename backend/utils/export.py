@@ -0,0 +1,194 @@
+"""
+Sérialisation en flux des prédictions (et des séquences texte -> signes)
+pour l'export PowerBI / BI.
+
+Chaque format est un générateur qui consomme les lignes par lots (curseur
+serveur) et produit la sortie au fur et à mesure : la mémoire utilisée reste
+constante quelle que soit la taille de l'historique.
+"""
+import io
+import csv
+import json
+import importlib.util
+
+# pyarrow n'est importé qu'au premier export Parquet
+HAS_PARQUET = importlib.util.find_spec('pyarrow') is not None
+
+PREDICTION_COLUMNS = [
+    'id', 'user_email', 'prediction_type', 'predicted_class',
+    'confidence', 'created_at', 'input_data'
+]
+
+SIGN_SEQUENCE_COLUMNS = [
+    'id', 'user_email', 'source_text', 'signs', 'sign_count', 'created_at'
+]
+
+CONTENT_TYPES = {
+    'json': 'application/json',
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv; charset=utf-8',
+    'parquet': 'application/vnd.apache.parquet',
+}
+
+
+def serialize_prediction(row):
+    """Ligne MySQL -> dict JSON (même forme que l'ancien export)"""
+    return {
+        'id': row['id'],
+        'user_email': row['user_email'],
+        'prediction_type': row['prediction_type'],
+        'predicted_class': row['predicted_class'],
+        'confidence': float(row['confidence']),
+        'created_at': row['created_at'].isoformat() if row['created_at'] else None,
+        'input_data': row['input_data']
+    }
+
+
+def serialize_sign_sequence(row):
+    """Ligne sign_sequences -> dict JSON (`signs` compact, voir utils/sign_sequence.py)"""
+    return {
+        'id': row['id'],
+        'user_email': row['user_email'],
+        'source_text': row['source_text'],
+        'signs': row['signs'],
+        'sign_count': int(row['sign_count']),
+        'created_at': row['created_at'].isoformat() if row['created_at'] else None,
+    }
+
+
+def iter_json(batches, table='predictions'):
+    """`{"data": [...], "total": n}` écrit élément par élément"""
+    serialize = EXPORT_TABLES[table]['serialize']
+    yield '{"data": ['
+    total = 0
+    for rows in batches:
+        for row in rows:
+            yield (',' if total else '') + json.dumps(serialize(row))
+            total += 1
+    yield f'], "total": {total}}}'
+
+
+def iter_ndjson(batches, table='predictions'):
+    serialize = EXPORT_TABLES[table]['serialize']
+    for rows in batches:
+        yield ''.join(json.dumps(serialize(row)) + '\n' for row in rows)
+
+
+def iter_csv(batches, table='predictions'):
+    serialize = EXPORT_TABLES[table]['serialize']
+    columns = EXPORT_TABLES[table]['columns']
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for rows in batches:
+        for row in rows:
+            item = serialize(row)
+            writer.writerow([item[column] for column in columns])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+class _ChunkSink(io.RawIOBase):
+    """Fichier en écriture seule dont on récupère les octets au fil de l'eau"""
+
+    def __init__(self):
+        self._chunks = []
+        self._pos = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._pos += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._pos
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def prediction_schema():
+    import pyarrow as pa
+
+    return pa.schema([
+        ('id', pa.int64()),
+        ('user_email', pa.string()),
+        ('prediction_type', pa.string()),
+        ('predicted_class', pa.string()),
+        ('confidence', pa.float64()),
+        ('created_at', pa.timestamp('s')),
+        ('input_data', pa.string()),
+    ])
+
+
+def sign_sequence_schema():
+    import pyarrow as pa
+
+    return pa.schema([
+        ('id', pa.int64()),
+        ('user_email', pa.string()),
+        ('source_text', pa.string()),
+        ('signs', pa.string()),
+        ('sign_count', pa.int64()),
+        ('created_at', pa.timestamp('s')),
+    ])
+
+
+def rows_to_table(rows, schema):
+    """Lot de lignes -> table Arrow (une colonne à la fois)"""
+    import pyarrow as pa
+
+    columns = {name: [row[name] for row in rows] for name in schema.names}
+    if 'confidence' in columns:
+        columns['confidence'] = [float(v) if v is not None else None for v in columns['confidence']]
+    return pa.Table.from_pydict(columns, schema=schema)
+
+
+def iter_parquet(batches, table='predictions'):
+    """Un row group Parquet par lot, envoyé dès qu'il est écrit"""
+    if not HAS_PARQUET:
+        raise RuntimeError("pyarrow n'est pas installé")
+    import pyarrow.parquet as pq
+
+    schema = EXPORT_TABLES[table]['schema']()
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema, compression='snappy')
+    try:
+        for rows in batches:
+            if rows:
+                writer.write_table(rows_to_table(rows, schema))
+                yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+# Tables exportables (paramètre `type` de /api/powerbi/export)
+EXPORT_TABLES = {
+    'predictions': {
+        'columns': PREDICTION_COLUMNS,
+        'serialize': serialize_prediction,
+        'schema': prediction_schema,
+    },
+    # Conversions texte -> signes : une ligne par requête, hors de `predictions`
+    'sign_sequences': {
+        'columns': SIGN_SEQUENCE_COLUMNS,
+        'serialize': serialize_sign_sequence,
+        'schema': sign_sequence_schema,
+    },
+}
+
+STREAMERS = {
+    'json': iter_json,
+    'ndjson': iter_ndjson,
+    'csv': iter_csv,
+    'parquet': iter_parquet,
+}
@@ -0,0 +1,38 @@
+"""
+Localisation et appel de ffmpeg (renditions des vidéos de signes, phrases concaténées)
+"""
+import os
+import shutil
+import subprocess
+
+
+class FFmpegError(Exception):
+    """ffmpeg introuvable ou terminé en erreur"""
+
+
+def find_ffmpeg(ffmpeg_path=None):
+    """Exécutable ffmpeg : dossier FFMPEG_PATH (comme pour pydub) puis PATH"""
+    ffmpeg_path = ffmpeg_path or os.environ.get('FFMPEG_PATH')
+    if ffmpeg_path:
+        if os.path.isfile(ffmpeg_path):
+            return ffmpeg_path
+        for name in ('ffmpeg.exe', 'ffmpeg'):
+            candidate = os.path.join(ffmpeg_path, name)
+            if os.path.isfile(candidate):
+                return candidate
+    found = shutil.which('ffmpeg')
+    if not found:
+        raise FFmpegError("ffmpeg introuvable (voir INSTALL_FFMPEG.md)")
+    return found
+
+
+def run_ffmpeg(args, ffmpeg=None, timeout=300):
+    """Lancer ffmpeg sans interaction ; FFmpegError avec la fin de stderr en cas d'échec"""
+    cmd = [ffmpeg or find_ffmpeg(), '-hide_banner', '-loglevel', 'error', '-nostdin', '-y'] + list(args)
+    try:
+        result = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        raise FFmpegError(f"ffmpeg a dépassé {timeout}s")
+    if result.returncode != 0:
+        message = result.stderr.decode('utf-8', 'replace').strip().splitlines()
+        raise FFmpegError(message[-1] if message else f"ffmpeg a échoué (code {result.returncode})")
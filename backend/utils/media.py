@@ -0,0 +1,104 @@
+"""
+Envoi des fichiers média (vidéos de signes, images, uploads) avec cache HTTP.
+
+- ETag fort calculé sur le contenu (SHA-1), mémorisé par (chemin, taille, mtime)
+- réponses 304 (If-None-Match) et 206 (Range) pour le déplacement dans les vidéos
+- URL versionnée (`?v=<empreinte>` de VERSION_LENGTH caractères, voir
+  `versioned_url`) : cache immuable d'un an ; sinon cache court (MEDIA_MAX_AGE)
+  puis revalidation par ETag
+- fichiers des utilisateurs (uploads) : `private=True`, jamais stockés par un
+  cache partagé (proxy, CDN)
+- MEDIA_SENDFILE_MODE : 'x-sendfile' (Apache / lighttpd) ou 'x-accel' (nginx,
+  avec MEDIA_ACCEL_PREFIX) pour que le serveur web envoie lui-même les octets
+"""
+import os
+import hashlib
+import mimetypes
+
+from flask import current_app, request, url_for, abort
+from werkzeug.security import safe_join
+from werkzeug.utils import send_file
+
+from .cache import TTLCache
+
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+VERSION_LENGTH = 16
+
+# (chemin, taille, mtime_ns) -> empreinte ; pas d'expiration, la clé change avec le fichier
+_etags = TTLCache(maxsize=8192, ttl=0)
+
+
+def content_etag(path):
+    """Empreinte SHA-1 du contenu, recalculée seulement si le fichier a changé"""
+    stat = os.stat(path)
+    key = (path, stat.st_size, stat.st_mtime_ns)
+    etag = _etags.get(key)
+    if etag is None:
+        digest = hashlib.sha1()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        etag = digest.hexdigest()
+        _etags.set(key, etag)
+    return etag
+
+
+def resolve_media_path(directory, filename):
+    """Chemin absolu sûr (pas de sortie du dossier) ou 404"""
+    if not os.path.isabs(directory):
+        directory = os.path.join(current_app.root_path, directory)
+    path = safe_join(directory, filename)
+    if path is None or not os.path.isfile(path):
+        abort(404)
+    return path
+
+
+def versioned_url(endpoint, directory, filename, **values):
+    """URL incluant l'empreinte du fichier : peut être mise en cache indéfiniment"""
+    if not os.path.isabs(directory):
+        directory = os.path.join(current_app.root_path, directory)
+    path = safe_join(directory, filename)
+    if path and os.path.isfile(path):
+        values['v'] = content_etag(path)[:VERSION_LENGTH]
+    return url_for(endpoint, filename=filename, **values)
+
+
+def _accel_response(path, etag, mimetype):
+    """Réponse vide : nginx envoie le fichier (et gère lui-même les Range)"""
+    root = current_app.config.get('MEDIA_ACCEL_ROOT') or os.path.join(current_app.root_path, '..')
+    prefix = current_app.config.get('MEDIA_ACCEL_PREFIX', '/protected-media/')
+    relative = os.path.relpath(path, os.path.abspath(root)).replace(os.sep, '/')
+    response = current_app.response_class(mimetype=mimetype)
+    response.headers['X-Accel-Redirect'] = prefix.rstrip('/') + '/' + relative
+    response.set_etag(etag)
+    return response.make_conditional(request)
+
+
+def send_media(path, etag=None, mimetype=None, private=False):
+    """Envoyer un fichier avec ETag fort, 304 / 206 et en-têtes de cache (`private` : navigateur seul)"""
+    etag = etag or content_etag(path)
+    mimetype = mimetype or mimetypes.guess_type(path)[0] or 'application/octet-stream'
+    mode = current_app.config.get('MEDIA_SENDFILE_MODE', '')
+
+    # URL versionnée par le client : le contenu ne changera jamais pour cette URL
+    version = request.args.get('v')
+    immutable = bool(version) and len(version) == VERSION_LENGTH and etag.startswith(version)
+    max_age = IMMUTABLE_MAX_AGE if immutable else current_app.config.get('MEDIA_MAX_AGE', 3600)
+
+    if mode == 'x-accel':
+        response = _accel_response(path, etag, mimetype)
+    else:
+        response = send_file(path, request.environ, mimetype=mimetype, etag=etag, conditional=True,
+                             max_age=max_age, use_x_sendfile=(mode == 'x-sendfile'),
+                             response_class=current_app.response_class)
+
+    if private:
+        # send_file marque la réponse `public` dès que max_age est fourni
+        response.cache_control.public = False
+        response.cache_control.private = True
+    else:
+        response.cache_control.public = True
+    response.cache_control.max_age = max_age
+    if immutable:
+        response.cache_control.immutable = True
+    return response
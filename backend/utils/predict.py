@@ -1,13 +1,6 @@
-from tensorflow import keras
 import numpy as np
-import os
 from .preprocess import preprocess_image
 
-# Path relative to backend/utils/ -> backend/model/asl_model.h5
-MODEL_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'model', 'asl_model.h5')
-
-model = None
-
 # Classes ASL (29 classes)
 ASL_CLASSES = [
     'A', 'B', 'C', 'D', 'E', 'F', 'G', 'H', 'I', 'J', 'K', 'L', 'M',
@@ -16,31 +9,47 @@ ASL_CLASSES = [
 ]
 
 def load_model():
-    global model
-    if model is None:
-        try:
-            model = keras.models.load_model(MODEL_PATH)
-            print("Modèle chargé avec succès!")
-        except Exception as e:
-            print(f"Erreur lors du chargement du modèle: {e}")
-    return model
+    """Modèle lettres actif du registre (chargé au premier appel, TensorFlow importé à ce moment)"""
+    from backend.model_registry import get_registry
+
+    entry = get_registry().get('image')
+    return entry.model if entry else None
+
+def predict_probabilities(batch):
+    """
+    Probabilités du modèle lettres pour un lot prétraité (serveur d'inférence
+    si configuré) ; retourne (probabilités, version du modèle)
+    """
+    from backend.model_server import remote_predict
+    from backend.model_registry import get_registry
+
+    result = remote_predict('image', batch)
+    if result is not None:
+        return result
+    entry = get_registry().get('image')
+    if entry is None:
+        raise RuntimeError("Modèle lettres indisponible")
+    return entry.model.predict(batch, verbose=0), entry.version
 
 def predict_image_file(image_path):
     """Prédire la classe d'une image"""
+    from backend.model_registry import get_registry
+
     try:
-        model = load_model()
         processed_img = preprocess_image(image_path)
-        predictions = model.predict(processed_img, verbose=0)
+        predictions, version = predict_probabilities(processed_img)
+        classes = get_registry().classes_for('image', version)
         predicted_class_idx = np.argmax(predictions[0])
         confidence = float(predictions[0][predicted_class_idx])
-        predicted_class = ASL_CLASSES[predicted_class_idx]
+        predicted_class = classes[predicted_class_idx]
         
         return {
             'class': predicted_class,
             'confidence': confidence,
+            'model_version': version,
             'all_predictions': {
-                ASL_CLASSES[i]: float(predictions[0][i]) 
-                for i in range(len(ASL_CLASSES))
+                classes[i]: float(predictions[0][i]) 
+                for i in range(min(len(classes), len(predictions[0])))
             }
         }
     except Exception as e:
@@ -4,7 +4,6 @@ Module pour la prédiction vidéo ASL avec le modèle CNN-LSTM
 import os
 import re
 import numpy as np
-from tensorflow import keras
 import logging
 import json
 import requests
@@ -79,9 +78,6 @@ Output:"""
         return gloss_text # Fallback
 
 
-# Chemin vers le modèle CNN-LSTM
-CNN_LSTM_MODEL_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'model', 'cnn_lstm_words_aug_best.h5')
-
 # Classes de mots ASL - Vocabulaire complet du modèle CNN-LSTM
 # Ces mots correspondent aux classes que le modèle a été entraîné à reconnaître
 # Charger les classes depuis le fichier JSON
@@ -110,22 +106,12 @@ def load_json_translations(filename):
 FRENCH_TO_ENGLISH = load_json_translations('translations_fr.json')
 ARABIC_TO_ENGLISH = load_json_translations('translations_ar.json')
 
-# Variable globale pour le modèle
-cnn_lstm_model = None
-
 def load_cnn_lstm_model():
-    """Charger le modèle CNN-LSTM pour la reconnaissance vidéo"""
-    global cnn_lstm_model
-    if cnn_lstm_model is None:
-        try:
-            if os.path.exists(CNN_LSTM_MODEL_PATH):
-                cnn_lstm_model = keras.models.load_model(CNN_LSTM_MODEL_PATH)
-                logging.info(f"Modèle CNN-LSTM chargé avec succès depuis {CNN_LSTM_MODEL_PATH}")
-            else:
-                logging.warning(f"Modèle CNN-LSTM non trouvé à {CNN_LSTM_MODEL_PATH}")
-        except Exception as e:
-            logging.error(f"Erreur lors du chargement du modèle CNN-LSTM: {e}")
-    return cnn_lstm_model
+    """Modèle CNN-LSTM actif du registre (versions dans backend/model/video/)"""
+    from backend.model_registry import get_registry
+    
+    entry = get_registry().get('video')
+    return entry.model if entry else None
 
 def preprocess_text(text):
     """
@@ -449,6 +435,23 @@ Best Match from Vocabulary (ONLY the word):"""
     }
 
 
+def predict_word_probabilities(batch):
+    """
+    Probabilités du modèle CNN-LSTM (serveur d'inférence si configuré) ;
+    retourne (probabilités, version du modèle), ou (None, None) sans modèle
+    """
+    from backend.model_server import remote_predict
+    from backend.model_registry import get_registry
+    
+    result = remote_predict('video', batch)
+    if result is not None:
+        return result
+    entry = get_registry().get('video')
+    if entry is None:
+        return None, None
+    return entry.model.predict(batch, verbose=0), entry.version
+
+
 def predict_video_sequence(video_frames):
     """
     Prédire le mot ASL à partir d'une séquence de frames vidéo
@@ -457,33 +460,35 @@ def predict_video_sequence(video_frames):
         video_frames: numpy array de shape (num_frames, height, width, channels)
         
     Returns:
-        dict avec 'word', 'confidence', et 'all_predictions'
+        dict avec 'word', 'confidence', 'model_version' et 'all_predictions'
     """
+    from backend.model_registry import get_registry
+    
     try:
-        model = load_cnn_lstm_model()
-        if model is None:
-            return None
-        
         # Prétraiter les frames si nécessaire
         processed_frames = preprocess_video_frames(video_frames)
         
         # Faire la prédiction
-        predictions = model.predict(processed_frames, verbose=0)
+        predictions, version = predict_word_probabilities(processed_frames)
+        if predictions is None:
+            return None
+        words = get_registry().classes_for('video', version)
         predicted_idx = np.argmax(predictions[0])
         confidence = float(predictions[0][predicted_idx])
         
         # Vérifier que l'index est valide
-        if predicted_idx < len(ASL_WORDS):
-            predicted_word = ASL_WORDS[predicted_idx]
+        if predicted_idx < len(words):
+            predicted_word = words[predicted_idx]
         else:
             predicted_word = f"Unknown_{predicted_idx}"
         
         return {
             'word': predicted_word,
             'confidence': confidence,
+            'model_version': version,
             'all_predictions': {
-                ASL_WORDS[i]: float(predictions[0][i]) 
-                for i in range(min(len(ASL_WORDS), len(predictions[0])))
+                words[i]: float(predictions[0][i]) 
+                for i in range(min(len(words), len(predictions[0])))
             }
         }
     except Exception as e:
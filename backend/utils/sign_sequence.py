@@ -0,0 +1,28 @@
+"""
+Représentation compacte des séquences de signes de l'alphabet (texte -> signes)
+
+Une séquence est stockée comme une chaîne : une lettre par signe et '_' pour
+le signe `space`, ex. ['H', 'I', 'space', 'Y', 'O', 'U'] -> 'HI_YOU'.
+"""
+from collections import Counter
+
+SPACE_SIGN = 'space'
+SPACE_CODE = '_'
+
+
+def pack_signs(signs):
+    """Liste de signes -> chaîne compacte"""
+    return ''.join(SPACE_CODE if sign == SPACE_SIGN else sign for sign in signs)
+
+
+def unpack_signs(packed):
+    """Chaîne compacte -> liste de signes"""
+    return [SPACE_SIGN if code == SPACE_CODE else code for code in packed or '']
+
+
+def count_signs(packed_sequences):
+    """Nombre d'occurrences de chaque signe sur un ensemble de séquences compactes"""
+    counts = Counter(''.join(packed_sequences))
+    if SPACE_CODE in counts:
+        counts[SPACE_SIGN] = counts.pop(SPACE_CODE)
+    return counts
@@ -0,0 +1,46 @@
+"""
+Calcul d'un mel-spectrogramme, exécuté dans les processus du pool de
+backend/spectrogram_jobs.py.
+
+Module volontairement léger (NumPy + Pillow, librosa importé à l'appel) :
+les workers sont lancés en forkserver/spawn et n'importent que lui, jamais
+l'application Flask, TensorFlow ni le pool MySQL.
+"""
+import os
+
+import numpy as np
+from PIL import Image
+
+N_MELS = 128
+TOP_DB = 80.0
+
+
+def save_spectrogram_png(S_dB, path):
+    """[-TOP_DB, 0] dB -> niveaux de gris, basses fréquences en bas (comme specshow)"""
+    pixels = np.clip((S_dB + TOP_DB) / TOP_DB, 0.0, 1.0)
+    image = Image.fromarray((np.flipud(pixels) * 255).astype(np.uint8), mode='L')
+    image.save(path + '.tmp', format='PNG')
+    os.replace(path + '.tmp', path)
+
+
+def save_mel_array(S_dB, path):
+    with open(path + '.tmp', 'wb') as f:
+        np.save(f, S_dB.astype(np.float32))
+    os.replace(path + '.tmp', path)
+
+
+def compute_spectrogram(audio_path, png_path, npy_path):
+    """Mel-spectrogramme d'un fichier audio, écrit en PNG et en .npy"""
+    import librosa
+
+    y, sr_rate = librosa.load(audio_path)
+    S = librosa.feature.melspectrogram(y=y, sr=sr_rate, n_mels=N_MELS)
+    S_dB = librosa.power_to_db(S, ref=np.max, top_db=TOP_DB)
+    save_mel_array(S_dB, npy_path)
+    save_spectrogram_png(S_dB, png_path)
+    return {
+        'spectrogram_path': png_path,
+        'mel_path': npy_path,
+        'sample_rate': sr_rate,
+        'frames': int(S_dB.shape[1]),
+    }
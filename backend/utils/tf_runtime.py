@@ -0,0 +1,106 @@
+"""
+Configuration du runtime TensorFlow pour l'inférence.
+
+Sans configuration, chaque processus TensorFlow crée autant de threads que de
+coeurs : avec plusieurs workers web, ils se disputent tous les coeurs. Les
+réglages viennent de backend/config.py (variables d'environnement) :
+
+- TF_INTRA_OP_THREADS / TF_INTER_OP_THREADS : taille des pools de threads (0 = défaut TF)
+- TF_CPU_AFFINITY : coeurs autorisés pour ce processus, ex. "0-3" ou "0,2,4"
+- TF_ENABLE_ONEDNN : "1" / "0" pour forcer les optimisations oneDNN (vide = défaut TF)
+
+`configure_tensorflow()` doit être appelé avant le premier import de
+TensorFlow (les chargeurs de modèles le font) ; les appels suivants sont sans effet.
+"""
+import os
+import sys
+import logging
+import threading
+
+from backend.config import Config
+
+_configured = None
+_lock = threading.Lock()
+
+
+def parse_cpu_list(spec):
+    """Liste de coeurs "0-3,8" -> {0, 1, 2, 3, 8}"""
+    cpus = set()
+    for part in spec.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        if '-' in part:
+            first, last = part.split('-', 1)
+            cpus.update(range(int(first), int(last) + 1))
+        else:
+            cpus.add(int(part))
+    return cpus
+
+
+def set_cpu_affinity(cpus):
+    """Restreindre le processus courant à `cpus` (Linux uniquement)"""
+    if not hasattr(os, 'sched_setaffinity'):
+        logging.warning("Affinité CPU non supportée sur cette plateforme")
+        return None
+    os.sched_setaffinity(0, cpus)
+    return sorted(os.sched_getaffinity(0))
+
+
+def pin_worker(slot, slots):
+    """
+    Réserver à un worker une part des coeurs disponibles, par ex. dans le
+    hook `post_fork` de gunicorn :
+
+        def post_fork(server, worker):
+            from backend.utils.tf_runtime import pin_worker
+            pin_worker(worker.age % server.num_workers, server.num_workers)
+    """
+    if not hasattr(os, 'sched_getaffinity'):
+        return None
+    available = sorted(os.sched_getaffinity(0))
+    share = max(1, len(available) // slots)
+    start = (slot * share) % len(available)
+    return set_cpu_affinity(set(available[start:start + share]))
+
+
+def configure_tensorflow(intra_op_threads=None, inter_op_threads=None, cpu_affinity=None, onednn=None):
+    """Appliquer les réglages (arguments > Config) une seule fois par processus ; retourne les réglages effectifs"""
+    global _configured
+    with _lock:
+        if _configured is not None and _configured['pid'] == os.getpid():
+            return _configured
+
+        intra = Config.TF_INTRA_OP_THREADS if intra_op_threads is None else intra_op_threads
+        inter = Config.TF_INTER_OP_THREADS if inter_op_threads is None else inter_op_threads
+        affinity = Config.TF_CPU_AFFINITY if cpu_affinity is None else cpu_affinity
+        onednn = Config.TF_ENABLE_ONEDNN if onednn is None else onednn
+
+        if onednn != '':
+            if 'tensorflow' in sys.modules:
+                logging.warning("TensorFlow déjà importé : TF_ENABLE_ONEDNN ignoré")
+            os.environ['TF_ENABLE_ONEDNN_OPTS'] = str(onednn)
+
+        cpus = None
+        if affinity:
+            cpus = set_cpu_affinity(parse_cpu_list(affinity))
+
+        import tensorflow as tf
+        try:
+            if intra:
+                tf.config.threading.set_intra_op_parallelism_threads(intra)
+            if inter:
+                tf.config.threading.set_inter_op_parallelism_threads(inter)
+        except RuntimeError as e:
+            # Le runtime est déjà initialisé (modèle chargé avant l'appel)
+            logging.warning(f"Threads TensorFlow non modifiables: {e}")
+
+        _configured = {
+            'pid': os.getpid(),
+            'intra_op_threads': tf.config.threading.get_intra_op_parallelism_threads(),
+            'inter_op_threads': tf.config.threading.get_inter_op_parallelism_threads(),
+            'cpu_affinity': cpus,
+            'onednn': os.environ.get('TF_ENABLE_ONEDNN_OPTS', ''),
+        }
+        logging.info(f"Runtime TensorFlow: {_configured}")
+        return _configured
@@ -0,0 +1,60 @@
+"""
+Préchargement explicite des modèles.
+
+TensorFlow n'est plus importé au chargement des routes : le premier appel à
+modèle via le registre (`backend/model_registry.py`) paie l'import et le chargement.
+`warm_up()` fait ce travail à l'avance, au choix :
+
+- MODEL_WARMUP=off         rien au démarrage (modèles chargés à la première prédiction)
+- MODEL_WARMUP=background  thread de fond au démarrage, les routes servent immédiatement
+- MODEL_WARMUP=blocking    chargement avant de servir la première requête
+
+ou à la main : `flask --app backend.app warmup`.
+"""
+import time
+import logging
+import threading
+
+
+def warm_up():
+    """Charger les modèles actifs du registre (prédiction à vide incluse) ; retourne les durées (s)"""
+    from backend.model_server import get_model_client
+    from backend.model_registry import get_registry
+
+    timings = {}
+
+    if get_model_client() is not None:
+        # Modèles détenus par le serveur d'inférence : rien à charger dans ce processus
+        logging.info("Serveur d'inférence configuré, préchargement local ignoré")
+        return timings
+
+    for name in ('image', 'video'):
+        start = time.perf_counter()
+        get_registry().get(name)
+        timings[f'{name}_model'] = time.perf_counter() - start
+
+    logging.info("Préchargement des modèles terminé: " +
+                 ", ".join(f"{name} {seconds:.2f}s" for name, seconds in timings.items()))
+    return timings
+
+
+def _warm_up_safely():
+    try:
+        warm_up()
+    except Exception as e:
+        logging.error(f"Préchargement des modèles impossible: {e}")
+
+
+def init_app(app):
+    """Appliquer MODEL_WARMUP et enregistrer la commande `flask warmup`"""
+    mode = app.config.get('MODEL_WARMUP', 'off')
+    if mode == 'background':
+        threading.Thread(target=_warm_up_safely, name='model-warmup', daemon=True).start()
+    elif mode == 'blocking':
+        _warm_up_safely()
+
+    @app.cli.command('warmup')
+    def warmup_command():
+        """Charger les modèles et afficher les temps de chargement"""
+        for name, seconds in warm_up().items():
+            print(f"{name}: {seconds:.2f}s")
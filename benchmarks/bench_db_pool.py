@@ -0,0 +1,103 @@
+"""
+Benchmark: per-request DB overhead with and without the connection pool.
+
+Simulates a page view that opens N connections (the routes call
+get_db_connection several times per request: context processor, route body,
+prediction logging...) and runs one trivial query on each.
+
+Usage:
+    python benchmarks/bench_db_pool.py --requests 200 --connections-per-request 3
+
+Reads MYSQL_* settings from the environment / .env like the application.
+"""
+
+import os
+import sys
+import time
+import argparse
+import statistics
+
+import pymysql
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.config import Config
+from backend.database import ConnectionPool
+
+
+def config_dict():
+    return {k: getattr(Config, k) for k in dir(Config) if k.isupper()}
+
+
+def query(conn):
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT 1")
+        cursor.fetchone()
+
+
+def run_direct(connect_kwargs, n_requests, per_request):
+    timings = []
+    for _ in range(n_requests):
+        start = time.perf_counter()
+        for _ in range(per_request):
+            conn = pymysql.connect(**connect_kwargs)
+            try:
+                query(conn)
+            finally:
+                conn.close()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def run_pooled(pool, n_requests, per_request):
+    timings = []
+    for _ in range(n_requests):
+        start = time.perf_counter()
+        for _ in range(per_request):
+            with pool.acquire() as conn:
+                query(conn)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def report(label, timings):
+    timings_ms = sorted(t * 1000 for t in timings)
+    p95 = timings_ms[int(len(timings_ms) * 0.95) - 1]
+    print(f"{label:<10} mean={statistics.mean(timings_ms):7.3f} ms  "
+          f"p50={statistics.median(timings_ms):7.3f} ms  p95={p95:7.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark MySQL connection pooling')
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--connections-per-request', type=int, default=3)
+    parser.add_argument('--pool-size', type=int, default=4)
+    args = parser.parse_args()
+
+    try:
+        from dotenv import load_dotenv
+        load_dotenv()
+    except ImportError:
+        pass
+
+    config = config_dict()
+    config['MYSQL_POOL_SIZE'] = args.pool_size
+    pool = ConnectionPool.from_config(config)
+
+    print(f"{args.requests} requests x {args.connections_per_request} connections "
+          f"against {config['MYSQL_HOST']}:{config['MYSQL_PORT']}")
+
+    direct = run_direct(pool.connect_kwargs, args.requests, args.connections_per_request)
+    report('direct', direct)
+
+    pooled = run_pooled(pool, args.requests, args.connections_per_request)
+    report('pooled', pooled)
+
+    speedup = statistics.mean(direct) / statistics.mean(pooled)
+    print(f"speedup    x{speedup:.1f}")
+    print(f"pool stats {pool.stats()}")
+    pool.close_all()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+"""
+Benchmark: frame sampling strategies of the pose extractor.
+
+Compares, on the clips of scripts/test_extraction.py (or --videos):
+    read-all   cap.read() on every frame, keep every Nth (previous extract_keyframes loop)
+    grab       FrameSampler/OpenCV: cap.grab() on skipped frames, retrieve only sampled ones
+    target-fps FrameSampler/OpenCV with time-based sampling (--target-fps keyframes/s)
+    pyav       FrameSampler/PyAV with threaded decoding (skipped if `av` is not installed)
+
+Reports the median time per clip over --repeat runs and the speedup against
+read-all. The grab strategy must return exactly the frames read-all keeps,
+which is checked as well. With --mediapipe, every sampled frame also
+goes through MediaPipe Holistic, to see the share of decoding in a real run.
+
+Usage:
+    python benchmarks/bench_frame_sampling.py --repeat 5
+    python benchmarks/bench_frame_sampling.py --videos train/hello/hello_1.mp4 --target-fps 6 --mediapipe
+"""
+
+import os
+import sys
+import time
+import argparse
+import statistics
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(ROOT, 'scripts'))
+
+import cv2
+import numpy as np
+
+from frame_sampler import FrameSampler, has_pyav
+from test_extraction import TEST_VIDEOS
+
+
+def read_all(path, sample_rate, process):
+    """The extract_keyframes loop before FrameSampler"""
+    cap = cv2.VideoCapture(path)
+    frames = []
+    frame_idx = 0
+    while cap.isOpened():
+        ret, frame = cap.read()
+        if not ret:
+            break
+        if frame_idx % sample_rate == 0:
+            rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            process(rgb)
+            frames.append(rgb)
+        frame_idx += 1
+    cap.release()
+    return frames
+
+
+def sampled(path, process, **kwargs):
+    frames = []
+    with FrameSampler(path, **kwargs) as sampler:
+        for _, _, rgb in sampler:
+            process(rgb)
+            frames.append(rgb)
+    return frames
+
+
+def timed(fn, repeat):
+    times, result = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark pose extraction frame sampling')
+    parser.add_argument('--videos', nargs='+', help='Video files (default: the test_extraction.py clips)')
+    parser.add_argument('--sample-rate', type=int, default=5, help='Keep every Nth frame')
+    parser.add_argument('--target-fps', type=float, default=6.0, help='Keyframes per second for target-fps')
+    parser.add_argument('--threads', type=int, default=0, help='PyAV decoding threads (0 = auto)')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per clip and strategy')
+    parser.add_argument('--mediapipe', action='store_true', help='Run MediaPipe Holistic on sampled frames')
+    args = parser.parse_args()
+
+    videos = args.videos or [os.path.join(ROOT, v) for v in TEST_VIDEOS]
+    videos = [v for v in videos if os.path.exists(v)]
+    if not videos:
+        sys.exit('No test videos found (pass --videos)')
+
+    process = lambda rgb: None
+    if args.mediapipe:
+        import mediapipe.solutions.holistic as mp_holistic
+        holistic = mp_holistic.Holistic(model_complexity=1)
+        process = holistic.process
+
+    strategies = [
+        ('read-all', lambda v: read_all(v, args.sample_rate, process)),
+        ('grab', lambda v: sampled(v, process, sample_rate=args.sample_rate)),
+        ('target-fps', lambda v: sampled(v, process, target_fps=args.target_fps)),
+    ]
+    if has_pyav():
+        strategies.append(('pyav', lambda v: sampled(v, process, sample_rate=args.sample_rate,
+                                                     decoder='pyav', threads=args.threads)))
+    else:
+        print('PyAV not installed: skipping the pyav strategy (pip install av)')
+
+    totals = {name: 0.0 for name, _ in strategies}
+    print(f"{'video':<28} {'strategy':<11} {'frames':>6} {'ms':>9} {'speedup':>8}")
+    for video in videos:
+        baseline = None
+        reference = None
+        label = os.path.relpath(video, ROOT) if video.startswith(ROOT) else video
+        for name, fn in strategies:
+            elapsed, frames = timed(lambda: fn(video), args.repeat)
+            totals[name] += elapsed
+            if name == 'read-all':
+                baseline, reference = elapsed, frames
+            elif name == 'grab' and (len(frames) != len(reference) or
+                                     any(not np.array_equal(a, b) for a, b in zip(frames, reference))):
+                print(f"  ⚠️  grab frames differ from read-all for {video}")
+            print(f"{label[-28:]:<28} {name:<11} {len(frames):>6} "
+                  f"{elapsed * 1000:>9.1f} {baseline / elapsed:>7.2f}x")
+
+    print()
+    for name, total in totals.items():
+        print(f"{name:<11} total {total * 1000:>9.1f} ms  ({totals['read-all'] / total:.2f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""
+Benchmark: startup cost of importing the application.
+
+Runs `python -X importtime -c "import <module>"` in a fresh interpreter,
+reports the wall-clock import time, the slowest top-level packages and
+whether any heavy ML library (TensorFlow, librosa, matplotlib...) was pulled
+in. With lazy model loading none of them should appear for the routes module.
+
+Usage:
+    python benchmarks/bench_import_time.py [--module backend.server.routes] [--top 15]
+    python benchmarks/bench_import_time.py --save import_profile.txt   # raw -X importtime report
+    python benchmarks/bench_import_time.py --warmup                    # also time model warm-up
+
+Reference numbers (before/after lazy imports): benchmarks/results/import_time.txt
+"""
+
+import os
+import sys
+import time
+import argparse
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_PACKAGES = ('tensorflow', 'keras', 'librosa', 'matplotlib', 'torch', 'pyarrow', 'cv2', 'mediapipe')
+
+
+def run_importtime(module):
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    elapsed = time.perf_counter() - start
+    if proc.returncode != 0:
+        lines = [l for l in proc.stderr.splitlines() if not l.startswith('import time:')]
+        raise RuntimeError(f"import {module} failed:\n" + '\n'.join(lines[-20:]))
+    return elapsed, proc.stderr
+
+
+def parse_report(report):
+    """-> [(package, self_us, cumulative_us, depth)]"""
+    entries = []
+    for line in report.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        fields = line[len('import time:'):].split('|')
+        self_us, cumulative_us, name = int(fields[0]), int(fields[1]), fields[2][1:]
+        depth = (len(name) - len(name.lstrip(' '))) // 2
+        entries.append((name.strip(), self_us, cumulative_us, depth))
+    return entries
+
+
+def run_warmup():
+    code = (
+        "import time; start = time.perf_counter(); "
+        "from backend.warmup import warm_up; timings = warm_up(); "
+        "print(round(time.perf_counter() - start, 3), timings)"
+    )
+    proc = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True)
+    return proc.stdout.strip() or proc.stderr.strip().splitlines()[-1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure application import time')
+    parser.add_argument('--module', default='backend.server.routes', help='Module to import')
+    parser.add_argument('--top', type=int, default=15, help='Number of slowest packages to show')
+    parser.add_argument('--save', help='Write the raw -X importtime report to this file')
+    parser.add_argument('--warmup', action='store_true', help='Also time backend.warmup.warm_up()')
+    args = parser.parse_args()
+
+    elapsed, report = run_importtime(args.module)
+    entries = parse_report(report)
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            f.write(report)
+        print(f"Raw report written to {args.save}")
+
+    top_level = sorted((e for e in entries if e[3] == 0), key=lambda e: e[2], reverse=True)
+    total_us = sum(e[2] for e in top_level)
+
+    print(f"import {args.module}")
+    print(f"  wall clock (interpreter + import): {elapsed * 1000:.0f} ms")
+    print(f"  cumulative import time:            {total_us / 1000:.0f} ms ({len(entries)} modules)")
+    print()
+    print(f"  {'package':40s} {'cumulative':>12s}")
+    for name, _, cumulative_us, _ in top_level[:args.top]:
+        print(f"  {name:40s} {cumulative_us / 1000:10.1f} ms")
+
+    imported = {e[0].split('.')[0] for e in entries}
+    heavy = [pkg for pkg in HEAVY_PACKAGES if pkg in imported]
+    print()
+    print(f"  heavy packages imported: {', '.join(heavy) if heavy else 'none'}")
+
+    if args.warmup:
+        print()
+        print(f"  warm_up(): {run_warmup()}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,169 @@
+"""
+Benchmark: TensorFlow threading / affinity / oneDNN settings under concurrent load.
+
+Each setting combination runs in fresh interpreters (TF threading and oneDNN
+cannot be changed once TensorFlow is initialised). For every combination,
+--processes worker processes are started at the same time to mimic gunicorn
+workers; each runs --threads client threads that alternate letter (image) and
+word (video) predictions. Reports aggregate throughput and latency
+percentiles per model.
+
+Usage:
+    python benchmarks/bench_tf_threading.py --processes 4 --threads 2 --requests 50
+    python benchmarks/bench_tf_threading.py --intra 1,2,4 --inter 1,2 --onednn 0,1 --pin
+
+Needs the trained models under backend/model/.
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import itertools
+import statistics
+import subprocess
+import threading
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+MODELS = ('image', 'video')
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))] if values else 0.0
+
+
+# ----- worker process -----
+
+def run_worker(args):
+    import numpy as np
+    from backend.utils.tf_runtime import configure_tensorflow, pin_worker
+    from backend.utils.predict import load_model
+    from backend.utils.predict_video import load_cnn_lstm_model
+
+    if args.pin:
+        pin_worker(args.slot, args.processes)
+    configure_tensorflow(args.worker_intra, args.worker_inter, onednn=args.worker_onednn)
+
+    models = {'image': load_model(), 'video': load_cnn_lstm_model()}
+    models = {name: model for name, model in models.items() if model is not None}
+    inputs = {name: np.random.rand(1, *model.input_shape[1:]).astype(np.float32)
+              for name, model in models.items()}
+    for name, model in models.items():
+        model.predict(inputs[name], verbose=0)
+
+    latencies = {name: [] for name in models}
+    lock = threading.Lock()
+
+    def client():
+        for i in range(args.requests):
+            name = list(models)[i % len(models)]
+            start = time.perf_counter()
+            models[name].predict(inputs[name], verbose=0)
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies[name].append(elapsed)
+
+    # Synchronise the workers so that they really compete for the cores
+    while time.time() < args.start_at:
+        time.sleep(0.001)
+    started = time.perf_counter()
+    threads = [threading.Thread(target=client) for _ in range(args.threads)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    print(json.dumps({'elapsed': time.perf_counter() - started, 'latencies': latencies}))
+
+
+# ----- driver -----
+
+def run_combination(args, intra, inter, onednn):
+    start_at = time.time() + 2 + args.processes  # leave time for TF import and model loading
+    procs = []
+    for slot in range(args.processes):
+        cmd = [sys.executable, os.path.abspath(__file__), '--worker',
+               '--slot', str(slot), '--processes', str(args.processes),
+               '--threads', str(args.threads), '--requests', str(args.requests),
+               '--worker-intra', str(intra), '--worker-inter', str(inter),
+               '--worker-onednn', onednn, '--start-at', str(start_at)]
+        if args.pin:
+            cmd.append('--pin')
+        procs.append(subprocess.Popen(cmd, cwd=ROOT, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True))
+
+    results = []
+    for proc in procs:
+        out, _ = proc.communicate()
+        lines = [l for l in out.splitlines() if l.startswith('{')]
+        if proc.returncode != 0 or not lines:
+            raise RuntimeError(f"worker failed (intra={intra}, inter={inter}, onednn={onednn})")
+        results.append(json.loads(lines[-1]))
+
+    elapsed = max(r['elapsed'] for r in results)
+    summary = {}
+    for name in MODELS:
+        latencies = [l for r in results for l in r['latencies'].get(name, [])]
+        if latencies:
+            summary[name] = {
+                'throughput': len(latencies) / elapsed,
+                'p50_ms': statistics.median(latencies) * 1000,
+                'p95_ms': percentile(latencies, 95) * 1000,
+            }
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Sweep TensorFlow threading settings under concurrent load')
+    parser.add_argument('--intra', default='0,1,2,4', help='Intra-op thread counts to try (0 = TF default)')
+    parser.add_argument('--inter', default='0,1,2', help='Inter-op thread counts to try (0 = TF default)')
+    parser.add_argument('--onednn', default='', help='oneDNN settings to try, e.g. "0,1" (empty = TF default)')
+    parser.add_argument('--processes', type=int, default=4, help='Concurrent worker processes')
+    parser.add_argument('--threads', type=int, default=2, help='Client threads per process')
+    parser.add_argument('--requests', type=int, default=50, help='Requests per client thread')
+    parser.add_argument('--pin', action='store_true', help='Pin each worker to its own share of the cores')
+    # internal: worker mode
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--slot', type=int, default=0, help=argparse.SUPPRESS)
+    parser.add_argument('--worker-intra', type=int, default=0, help=argparse.SUPPRESS)
+    parser.add_argument('--worker-inter', type=int, default=0, help=argparse.SUPPRESS)
+    parser.add_argument('--worker-onednn', default='', help=argparse.SUPPRESS)
+    parser.add_argument('--start-at', type=float, default=0.0, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args)
+        return
+
+    intras = [int(v) for v in args.intra.split(',')]
+    inters = [int(v) for v in args.inter.split(',')]
+    onednns = args.onednn.split(',') if args.onednn else ['']
+
+    print(f"{args.processes} processes x {args.threads} threads x {args.requests} requests, "
+          f"pinning {'on' if args.pin else 'off'}")
+    header = f"{'intra':>5s} {'inter':>5s} {'onednn':>6s}"
+    for name in MODELS:
+        header += f" | {name + ' req/s':>12s} {'p50 ms':>8s} {'p95 ms':>8s}"
+    print(header)
+
+    for intra, inter, onednn in itertools.product(intras, inters, onednns):
+        try:
+            summary = run_combination(args, intra, inter, onednn)
+        except RuntimeError as e:
+            print(f"  {e}")
+            continue
+        line = f"{intra:>5d} {inter:>5d} {onednn or '-':>6s}"
+        for name in MODELS:
+            stats = summary.get(name)
+            if stats:
+                line += f" | {stats['throughput']:12.1f} {stats['p50_ms']:8.1f} {stats['p95_ms']:8.1f}"
+            else:
+                line += f" | {'n/a':>12s} {'':8s} {'':8s}"
+        print(line)
+
+
+if __name__ == '__main__':
+    main()
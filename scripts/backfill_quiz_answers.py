@@ -0,0 +1,104 @@
+"""
+Backfill quiz_answers / quiz_sign_stats from quiz_results.questions_data.
+
+Quizzes that already have rows in quiz_answers are skipped, so the script can
+be re-run safely. quiz_sign_stats is then recomputed from quiz_answers.
+
+Usage:
+    python scripts/backfill_quiz_answers.py
+"""
+
+import os
+import sys
+import json
+
+import pymysql
+from dotenv import load_dotenv
+
+load_dotenv()
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.config import Config
+
+CHUNK_SIZE = 500
+
+
+def get_connection():
+    return pymysql.connect(
+        host=Config.MYSQL_HOST,
+        user=Config.MYSQL_USER,
+        password=Config.MYSQL_PASSWORD,
+        database=Config.MYSQL_DATABASE,
+        port=Config.MYSQL_PORT,
+        charset='utf8mb4',
+        cursorclass=pymysql.cursors.DictCursor
+    )
+
+
+def answer_rows(quiz):
+    try:
+        questions = json.loads(quiz['questions_data']) if quiz['questions_data'] else []
+    except ValueError:
+        print(f"  ⚠️  quiz {quiz['id']}: invalid questions_data, skipped")
+        return []
+    return [
+        (quiz['id'], quiz['user_email'], q.get('question'), q.get('correct_answer', 'Unknown'),
+         q.get('selected_answer'), bool(q.get('correct', False)), quiz['created_at'])
+        for q in questions
+    ]
+
+
+def backfill(conn):
+    read_conn = get_connection()
+    quizzes = answers = 0
+    try:
+        with read_conn.cursor(pymysql.cursors.SSDictCursor) as stream, conn.cursor() as cursor:
+            stream.execute("""
+                SELECT q.id, q.user_email, q.questions_data, q.created_at
+                FROM quiz_results q
+                WHERE NOT EXISTS (SELECT 1 FROM quiz_answers a WHERE a.quiz_id = q.id)
+            """)
+            while True:
+                chunk = stream.fetchmany(CHUNK_SIZE)
+                if not chunk:
+                    break
+                rows = [row for quiz in chunk for row in answer_rows(quiz)]
+                if rows:
+                    cursor.executemany("""
+                        INSERT INTO quiz_answers
+                            (quiz_id, user_email, question, correct_answer, selected_answer, is_correct, created_at)
+                        VALUES (%s, %s, %s, %s, %s, %s, %s)
+                    """, rows)
+                quizzes += len(chunk)
+                answers += len(rows)
+    finally:
+        read_conn.close()
+    print(f"  {answers} answers inserted from {quizzes} quizzes")
+
+    with conn.cursor() as cursor:
+        cursor.execute("DELETE FROM quiz_sign_stats")
+        cursor.execute("""
+            INSERT INTO quiz_sign_stats (user_email, sign, total, correct)
+            SELECT user_email, correct_answer, COUNT(*), SUM(is_correct)
+            FROM quiz_answers
+            GROUP BY user_email, correct_answer
+        """)
+        print(f"  {cursor.rowcount} per-sign aggregates rebuilt")
+    conn.commit()
+
+
+def main():
+    conn = get_connection()
+    try:
+        print("Backfilling quiz answers...")
+        backfill(conn)
+        print("Done.")
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
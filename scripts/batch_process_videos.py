@@ -5,12 +5,135 @@ Processes all videos in the train directory and generates animation data
 
 import os
 import sys
-from pathlib import Path
+import time
 import json
-from extract_pose_from_video import ASLPoseExtractor, process_single_video
+import hashlib
+import multiprocessing
+from datetime import datetime
+from pathlib import Path
+
+import cv2
+from extract_pose_from_video import ASLPoseExtractor, process_single_video, extractor_params
+from frame_sampler import DECODERS
+from convert_animations import convert_file, is_current
+from training.scripts.landmark_store import LandmarkStore
+from backend.utils.animation_format import MANIFEST_FILE, normalize_sign, load_manifest, save_manifest
+
+EXTRACTION_MANIFEST = 'extraction_manifest.json'
+
+# Holistic graph of the current worker process (see init_worker)
+_worker_extractor = None
+
+
+def file_sha1(path):
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_extraction_manifest(output_path):
+    """{sign: entry} of the previous runs (source video, hash, parameters, output)"""
+    try:
+        with open(Path(output_path) / EXTRACTION_MANIFEST) as f:
+            return json.load(f).get('signs', {})
+    except (OSError, ValueError):
+        return {}
+
+
+def save_extraction_manifest(output_path, entries):
+    """Atomic write: an interrupted run keeps every sign completed so far"""
+    output_path = Path(output_path)
+    output_path.mkdir(parents=True, exist_ok=True)
+    manifest_file = output_path / EXTRACTION_MANIFEST
+    tmp_file = manifest_file.with_name(manifest_file.name + '.tmp')
+    with open(tmp_file, 'w') as f:
+        json.dump({'version': 1, 'signs': entries}, f, indent=1, sort_keys=True)
+    os.replace(tmp_file, manifest_file)
+
+
+def stale_reason(entry, video_path, output_file, params, landmark_videos=None):
+    """Why a sign must be extracted again, or None if its output is up to date
+
+    Size and mtime are compared first; the content hash is only computed when
+    they differ, so a touched but identical video is not re-extracted.
+    """
+    if entry is None:
+        return 'new'
+    if entry['video'] != str(video_path):
+        return 'source video changed'
+    if entry['params'] != params:
+        return 'extractor parameters changed'
+    if not output_file.exists():
+        return 'output missing'
+    if landmark_videos is not None and str(video_path) not in landmark_videos:
+        return 'landmarks missing'
+    stat = os.stat(video_path)
+    if entry['size'] == stat.st_size and entry['mtime'] == stat.st_mtime:
+        return None
+    if entry['size'] == stat.st_size and entry['sha1'] == file_sha1(video_path):
+        entry['mtime'] = stat.st_mtime
+        return None
+    return 'source content changed'
+
+
+def init_worker(params):
+    """Pool initializer: one MediaPipe Holistic instance per worker, kept for all its videos"""
+    global _worker_extractor
+    # Parallelism comes from the processes: keep OpenCV (and PyAV) from spawning their own threads
+    cv2.setNumThreads(1)
+    _worker_extractor = ASLPoseExtractor(verbose=False, sample_rate=params['sample_rate'],
+                                         model_complexity=params['model_complexity'],
+                                         min_detection_confidence=params['min_detection_confidence'],
+                                         min_tracking_confidence=params['min_tracking_confidence'],
+                                         target_fps=params.get('target_fps'),
+                                         decoder=params.get('decoder', 'opencv'),
+                                         decoder_threads=1)
+
+
+def process_job(job):
+    """Extract one sign in a worker; returns a picklable summary
+
+    The landmarks travel back with the summary (about 100 KB per video): only
+    the parent process writes to the landmark store.
+    """
+    sign_name, video_path, output_dir = job
+    start = time.perf_counter()
+    stat = os.stat(video_path)
+    source = {'video': video_path, 'size': stat.st_size, 'mtime': stat.st_mtime, 'sha1': file_sha1(video_path)}
+    result = process_single_video(video_path, output_dir, sign_name, extractor=_worker_extractor)
+    summary = {'sign': sign_name, 'video': Path(video_path).name, 'source': source,
+               'seconds': time.perf_counter() - start}
+    if result and result['success']:
+        summary.update(success=True, duration=result['animation']['duration'],
+                       keyframes=len(result['animation']['keyframes']),
+                       landmarks=result['landmarks'], frame_idx=result['frame_idx'], fps=result['fps'])
+    else:
+        summary.update(success=False, error=result.get('error', 'Unknown error') if result else 'Processing failed')
+    return summary
+
+
+def run_jobs(jobs, workers, params):
+    """Yield job summaries as they complete
+
+    Workers pull videos from a shared task queue (imap_unordered, one video at
+    a time) so a long clip never holds back a whole chunk of signs.
+    """
+    if workers <= 1:
+        init_worker(params)
+        for job in jobs:
+            yield process_job(job)
+        return
+    # spawn: MediaPipe's native threads do not survive a fork
+    with multiprocessing.get_context('spawn').Pool(workers, initializer=init_worker, initargs=(params,)) as pool:
+        yield from pool.imap_unordered(process_job, jobs, chunksize=1)
+
 
 def batch_process_signs(train_dir='train', output_dir='backend/animations/keyframes', 
-                        limit=None, categories=None):
+                        limit=None, categories=None, workers=1, params=None,
+                        since=None, force=False, dry_run=False, landmark_dir=None,
+                        rebuild_landmarks=False):
     """
     Batch process all ASL sign videos
     
@@ -19,7 +142,17 @@ def batch_process_signs(train_dir='train', output_dir='backend/animations/keyfra
         output_dir: Output directory for animation JSON files
         limit: Maximum number of signs to process (None = all)
         categories: List of specific sign names to process (None = all)
+        workers: Number of worker processes (1 = process in this process)
+        params: Extractor parameters (extractor_params(), default settings if None)
+        since: Only consider videos modified after this timestamp (None = all)
+        force: Extract again even if the manifest says the output is up to date
+        dry_run: Only report what would be extracted
+        landmark_dir: Landmark store receiving all 543 landmarks of each
+            extracted video (None = keyframe JSON only)
+        rebuild_landmarks: Empty the landmark store if it was built with other
+            parameters (otherwise the run stops without extracting anything)
     """
+    params = params or extractor_params()
     train_path = Path(train_dir)
     output_path = Path(output_dir)
     
@@ -42,48 +175,116 @@ def batch_process_signs(train_dir='train', output_dir='backend/animations/keyfra
     print(f"\n🎬 Batch Processing {total} ASL Signs")
     print(f"📂 Input: {train_dir}")
     print(f"📁 Output: {output_dir}")
+    print(f"⚙️  Workers: {workers}")
     print("=" * 60)
     
     results = {
         'success': [],
         'failed': [],
-        'no_videos': []
+        'no_videos': [],
+        'up_to_date': [],
+        'not_modified_since': []
     }
     
-    for idx, sign_folder in enumerate(sign_folders, 1):
+    # Signs already extracted from the same video with the same parameters are skipped
+    manifest = load_extraction_manifest(output_path)
+    # Only rebuilt on request when the parameters change: the store may hold landmarks of
+    # videos that are no longer in the train directory
+    landmark_store = landmark_videos = None
+    if landmark_dir and dry_run:
+        try:
+            landmark_videos = set(LandmarkStore(landmark_dir, mode='r').videos())
+        except FileNotFoundError:
+            landmark_videos = set()
+    elif landmark_dir:
+        try:
+            landmark_store = LandmarkStore(landmark_dir, params, reset=rebuild_landmarks)
+        except ValueError as e:
+            print(f"❌ {e}")
+            print("   Rerun with --rebuild-landmarks (or --force) to empty it and extract every sign again")
+            return
+        landmark_videos = set(landmark_store.videos())
+    jobs = []
+    reasons = {}
+    for sign_folder in sign_folders:
         sign_name = sign_folder.name
         
         # Find video files
-        videos = list(sign_folder.glob('*.mp4'))
+        videos = sorted(sign_folder.glob('*.mp4'))
         
         if not videos:
-            print(f"\n[{idx}/{total}] ⚠️  {sign_name}: No videos found")
+            print(f"⚠️  {sign_name}: No videos found")
             results['no_videos'].append(sign_name)
             continue
         
         # Use first video as reference
         video_path = videos[0]
+        if since is not None and video_path.stat().st_mtime < since:
+            results['not_modified_since'].append(sign_name)
+            continue
         
-        print(f"\n[{idx}/{total}] Processing: {sign_name}")
-        print(f"  📹 Video: {video_path.name} ({len(videos)} total)")
-        
-        # Process video
-        result = process_single_video(video_path, output_dir, sign_name)
+        reason = 'forced' if force else stale_reason(manifest.get(sign_name), video_path,
+                                                       output_path / f"{sign_name}.json", params,
+                                                       landmark_videos)
+        if reason is None:
+            results['up_to_date'].append(sign_name)
+            continue
+        reasons[sign_name] = reason
+        jobs.append((sign_name, str(video_path), str(output_path)))
+    
+    if not dry_run:
+        save_extraction_manifest(output_path, manifest)  # keeps refreshed mtimes of touched videos
+    
+    print(f"🔁 To extract: {len(jobs)} | up to date: {len(results['up_to_date'])}"
+          + (f" | not modified since: {len(results['not_modified_since'])}" if since is not None else ""))
+    
+    if dry_run:
+        for sign_name, video_path, _ in jobs:
+            print(f"  - {sign_name}: {reasons[sign_name]} ({Path(video_path).name})")
+        results['planned'] = [{'sign': sign, 'reason': reasons[sign]} for sign, _, _ in jobs]
+        return results
+    
+    start = time.perf_counter()
+    for idx, summary in enumerate(run_jobs(jobs, workers, params), 1):
+        elapsed = time.perf_counter() - start
+        rate = idx / elapsed if elapsed > 0 else 0.0
+        eta = (len(jobs) - idx) / rate if rate > 0 else 0.0
+        progress = f"[{idx}/{len(jobs)}] {rate:.2f} videos/s, ETA {eta / 60:.1f} min"
         
-        if result and result['success']:
-            results['success'].append({
-                'sign': sign_name,
-                'video': video_path.name,
-                'duration': result['animation']['duration'],
-                'keyframes': len(result['animation']['keyframes'])
-            })
-            print(f"  ✅ Success ({result['animation']['duration']:.1f}s, "
-                  f"{len(result['animation']['keyframes'])} keyframes)")
+        if summary['success']:
+            results['success'].append({key: summary[key] for key in ('sign', 'video', 'duration', 'keyframes')})
+            if landmark_store is not None:
+                source = summary['source']
+                landmark_store.append(source['video'], summary['sign'], summary['landmarks'],
+                                      summary['frame_idx'], summary['fps'], source['size'], source['mtime'])
+                # Landmarks on disk before the manifest says the sign is done
+                landmark_store.commit()
+            manifest[summary['sign']] = dict(summary['source'], params=params,
+                                             output=str(output_path / f"{summary['sign']}.json"),
+                                             keyframes=summary['keyframes'],
+                                             extracted_at=datetime.now().isoformat(timespec='seconds'))
+            save_extraction_manifest(output_path, manifest)
+            print(f"{progress} ✅ {summary['sign']} ({summary['duration']:.1f}s, "
+                  f"{summary['keyframes']} keyframes, {summary['seconds']:.1f}s)")
         else:
-            results['failed'].append({
-                'sign': sign_name,
-                'error': result.get('error', 'Unknown error') if result else 'Processing failed'
-            })
+            results['failed'].append({'sign': summary['sign'], 'error': summary['error']})
+            # Retried on the next run
+            if manifest.pop(summary['sign'], None) is not None:
+                save_extraction_manifest(output_path, manifest)
+            if landmark_store is not None and landmark_store.has(summary['source']['video']):
+                landmark_store.discard(summary['source']['video'])
+                landmark_store.commit()
+            print(f"{progress} ❌ {summary['sign']}: {summary['error']}")
+    
+    if jobs:
+        elapsed = time.perf_counter() - start
+        print(f"\n⏱️  {len(jobs)} videos in {elapsed:.1f}s ({len(jobs) / elapsed:.2f} videos/s)")
+    
+    if landmark_store is not None:
+        landmark_store.close()
+        stats = landmark_store.stats()
+        print(f"🦴 Landmark store: {stats['videos']} videos, {stats['frames']} frames "
+              f"in {stats['shards']} shards ({landmark_dir})")
     
     # Summary
     print("\n" + "=" * 60)
@@ -92,6 +293,7 @@ def batch_process_signs(train_dir='train', output_dir='backend/animations/keyfra
     print(f"✅ Successful: {len(results['success'])}")
     print(f"❌ Failed: {len(results['failed'])}")
     print(f"⚠️  No videos: {len(results['no_videos'])}")
+    print(f"⏭️  Up to date: {len(results['up_to_date'])}")
     print(f"📊 Total: {total}")
     
     if results['failed']:
@@ -103,67 +305,50 @@ def batch_process_signs(train_dir='train', output_dir='backend/animations/keyfra
     
     # Save results
     results_file = output_path / 'batch_results.json'
-    with open(results_file, 'w') as f:
+    output_path.mkdir(parents=True, exist_ok=True)
+    with open(results_file.with_name(results_file.name + '.tmp'), 'w') as f:
         json.dump(results, f, indent=2)
+    os.replace(results_file.with_name(results_file.name + '.tmp'), results_file)
     print(f"\n💾 Results saved to: {results_file}")
     
-    # Generate combined JavaScript file
+    # Update the per-sign binary animations and their manifest, only if something was extracted
     if results['success']:
-        generate_combined_js(results['success'], output_path)
+        update_animation_manifest(results['success'], output_path)
     
     return results
 
 
-def generate_combined_js(successful_signs, output_dir):
-    """Generate a single JavaScript file with all animations"""
+def update_animation_manifest(successful_signs, output_dir):
+    """Convert the signs whose JSON changed to .asla files and update the manifest
+
+    Replaces the former single asl_animations.js: clients now fetch each sign
+    from /api/animation/<sign>, and a run only touches the entries it changed.
+    """
     output_dir = Path(output_dir)
-    js_file = output_dir.parent / 'asl_animations.js'
-    
-    print(f"\n📝 Generating combined JavaScript file...")
-    
-    animations_code = []
-    
+    binary_dir = output_dir.parent / 'binary'
+
+    print(f"\n📝 Updating animation manifest...")
+
+    signs = load_manifest(binary_dir)
+    changed = 0
+
     for item in successful_signs:
-        sign_name = item['sign']
-        json_file = output_dir / f"{sign_name}.json"
-        
-        if json_file.exists():
-            with open(json_file, 'r') as f:
-                animation_data = json.load(f)
-            
-            keyframes_json = json.dumps(animation_data['keyframes'], indent=12)
-            
-            js_code = f"""    '{sign_name.upper()}': {{
-        duration: {animation_data['duration']},
-        keyframes: {keyframes_json}
-    }}"""
-            
-            animations_code.append(js_code)
-    
-    # Create complete JavaScript file
-    full_js = f"""/**
- * ASL Animation Data - Auto-generated
- * Contains {len(animations_code)} ASL sign animations
- * Generated from training videos using MediaPipe pose extraction
- */
-
-const ASL_ANIMATIONS = {{
-{',\n'.join(animations_code)}
-}};
-
-// Export for use in avatar_3d.js
-if (typeof module !== 'undefined' && module.exports) {{
-    module.exports = ASL_ANIMATIONS;
-}}
-"""
-    
-    with open(js_file, 'w') as f:
-        f.write(full_js)
-    
-    print(f"  ✅ Generated: {js_file}")
-    print(f"  📊 Contains {len(animations_code)} animations")
-    
-    return js_file
+        json_file = output_dir / f"{item['sign']}.json"
+        if not json_file.exists():
+            continue
+        sign = normalize_sign(item['sign'])
+        if is_current(signs.get(sign), json_file, binary_dir):
+            continue
+        sign, signs[sign] = convert_file(json_file, binary_dir)
+        changed += 1
+
+    if changed:
+        save_manifest(binary_dir, signs)
+
+    print(f"  ✅ {changed} animations updated in {binary_dir}")
+    print(f"  📊 Manifest lists {len(signs)} animations")
+
+    return binary_dir / MANIFEST_FILE
 
 
 # Priority categories for phased processing
@@ -202,6 +387,21 @@ def main():
     parser.add_argument('--phase', choices=['1', '2', '3', 'all'], default='all',
                        help='Processing phase (1=priority, 2=extended, 3=remaining, all=everything)')
     parser.add_argument('--category', help='Specific category (e.g., phase1_numbers)')
+    parser.add_argument('--workers', '-j', type=int, default=os.cpu_count() or 1,
+                       help='Worker processes, each with its own MediaPipe instance (default: all cores)')
+    parser.add_argument('--sample-rate', type=int, default=5, help='Extract every Nth frame')
+    parser.add_argument('--target-fps', type=float,
+                       help='Extract this many keyframes per second of video instead of every Nth frame')
+    parser.add_argument('--decoder', choices=DECODERS, default='opencv',
+                       help='Video decoder (pyav needs `pip install av`)')
+    parser.add_argument('--landmarks', default='training/dataset/landmarks', metavar='DIR',
+                       help='Landmark store for all 543 landmarks of each extracted video')
+    parser.add_argument('--no-landmarks', action='store_true', help='Only write the keyframe JSON files')
+    parser.add_argument('--rebuild-landmarks', action='store_true',
+                       help='Empty the landmark store if it was built with other extractor parameters')
+    parser.add_argument('--since', help='Only consider videos modified since this date (e.g. 2024-06-01)')
+    parser.add_argument('--force', action='store_true', help='Extract again even if up to date')
+    parser.add_argument('--dry-run', action='store_true', help='Only list what would be extracted and why')
     
     args = parser.parse_args()
     
@@ -222,11 +422,20 @@ def main():
         train_dir=args.train_dir,
         output_dir=args.output_dir,
         limit=args.limit,
-        categories=categories
+        categories=categories,
+        workers=args.workers,
+        params=extractor_params(sample_rate=args.sample_rate, target_fps=args.target_fps,
+                                decoder=args.decoder),
+        since=datetime.fromisoformat(args.since).timestamp() if args.since else None,
+        force=args.force,
+        dry_run=args.dry_run,
+        landmark_dir=None if args.no_landmarks else args.landmarks,
+        rebuild_landmarks=args.rebuild_landmarks or args.force
     )
     
-    # Exit code based on results
-    if results and len(results['success']) > 0:
+    # Exit code based on results (an incremental run with nothing to do is a success,
+    # any failed video is not)
+    if results and not results['failed'] and (args.dry_run or results['success'] or results['up_to_date']):
         sys.exit(0)
     else:
         sys.exit(1)
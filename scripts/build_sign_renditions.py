@@ -0,0 +1,161 @@
+"""
+Offline rendition pipeline for the sign clips served by /api/video/<word>.
+
+The MS-ASL clips under train/ keep whatever resolution and bitrate the
+YouTube download produced, while the avatar only needs short low-res loops.
+For every word of the sign index this script writes, in parallel:
+
+    <SIGN_RENDITION_DIR>/<word>/240p.mp4    H.264, faststart (moov first), no audio
+    <SIGN_RENDITION_DIR>/<word>/240p.webm   VP9, no audio
+    <SIGN_RENDITION_DIR>/<word>/poster.jpg  first frame shown before playback
+
+Clips are trimmed to --max-duration seconds and normalised to the same
+frame size (padded 426x240), frame rate, pixel format and time base, so the
+renditions of several signs can be concatenated without re-encoding.
+
+The manifest <SIGN_RENDITION_DIR>/renditions.json records each source clip
+ETag: later runs only transcode clips that were added or replaced.
+
+Usage:
+    python scripts/build_sign_renditions.py [--workers 8] [--max-duration 4] [--force]
+
+Needs ffmpeg (FFMPEG_PATH or PATH) built with libx264 and libvpx.
+"""
+
+import os
+import sys
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from dotenv import load_dotenv
+
+load_dotenv()
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.config import Config
+from backend.sign_media import (SignMediaIndex, SignRenditions, RENDITION_SPEC, RENDITION_FILES,
+                                default_train_dir, default_rendition_dir)
+from backend.utils.ffmpeg import find_ffmpeg, run_ffmpeg, FFmpegError
+from backend.utils.media import content_etag
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def video_filter():
+    spec = RENDITION_SPEC
+    return (f"fps={spec['fps']},"
+            f"scale={spec['width']}:{spec['height']}:force_original_aspect_ratio=decrease,"
+            f"pad={spec['width']}:{spec['height']}:(ow-iw)/2:(oh-ih)/2,setsar=1,format=yuv420p")
+
+
+def encoder_args(kind):
+    """Identical settings for every clip: required by the no-re-encode concat"""
+    gop = str(RENDITION_SPEC['fps'])
+    if kind == 'mp4':
+        return ['-c:v', 'libx264', '-profile:v', 'main', '-preset', 'slow', '-crf', '28',
+                '-g', gop, '-keyint_min', gop, '-sc_threshold', '0',
+                '-video_track_timescale', str(RENDITION_SPEC['timescale']),
+                '-movflags', '+faststart', '-f', 'mp4']
+    return ['-c:v', 'libvpx-vp9', '-b:v', '0', '-crf', '38', '-row-mt', '1', '-deadline', 'good',
+            '-cpu-used', '4', '-g', gop, '-f', 'webm']
+
+
+def transcode(ffmpeg, source, word_dir, max_duration, poster_at):
+    """Write the renditions of one clip; returns {kind: {'file', 'size', 'etag'}}"""
+    os.makedirs(word_dir, exist_ok=True)
+    outputs = {}
+    for kind, filename in RENDITION_FILES.items():
+        target = os.path.join(word_dir, filename)
+        partial = target + '.part'
+        trim = ['-t', str(max_duration)] if max_duration else []
+        if kind == 'poster':
+            args = ['-ss', str(poster_at), '-i', source, '-frames:v', '1', '-vf', video_filter(),
+                    '-q:v', '4', '-f', 'image2', partial]
+        else:
+            args = trim + ['-i', source, '-an', '-sn', '-dn', '-map_metadata', '-1', '-threads', '1',
+                           '-vf', video_filter()] + encoder_args(kind) + [partial]
+        try:
+            run_ffmpeg(args, ffmpeg)
+        except FFmpegError:
+            if os.path.exists(partial):
+                os.remove(partial)
+            raise
+        os.replace(partial, target)
+        outputs[kind] = {
+            'file': os.path.relpath(target, os.path.dirname(word_dir)).replace(os.sep, '/'),
+            'size': os.path.getsize(target),
+            'etag': content_etag(target),
+        }
+    return outputs
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Transcode sign clips to small 240p renditions')
+    parser.add_argument('--train-dir', default=Config.SIGN_VIDEO_DIR or default_train_dir(ROOT),
+                        help='Source clips (train/<word>/*.mp4)')
+    parser.add_argument('--output', '-o', default=Config.SIGN_RENDITION_DIR or default_rendition_dir(ROOT),
+                        help='Rendition directory')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 2, help='Parallel ffmpeg processes')
+    parser.add_argument('--max-duration', type=float, default=4.0, help='Trim clips to this length (0 = keep)')
+    parser.add_argument('--poster-at', type=float, default=0.5, help='Poster frame time (seconds)')
+    parser.add_argument('--force', action='store_true', help='Transcode every clip again')
+    args = parser.parse_args()
+
+    ffmpeg = find_ffmpeg(Config.FFMPEG_PATH)
+    index = SignMediaIndex(args.train_dir, Config.SIGN_INDEX_PATH, poll_interval=0)
+    sources = index.load()
+    renditions = SignRenditions(args.output, poll_interval=0)
+    previous = renditions.load()
+
+    entries, todo = {}, []
+    for word, source in sources.items():
+        old = previous.get(word)
+        complete = old and all(os.path.exists(renditions.path_for(old, kind)) for kind in RENDITION_FILES)
+        if (complete and not args.force and old.get('source_etag') == source['etag']
+                and old.get('spec') == RENDITION_SPEC):
+            entries[word] = old
+        else:
+            todo.append(word)
+            if complete:
+                # Still served until replaced (the manifest is saved after each sign), but
+                # without its source ETag so that an interrupted run transcodes it next time
+                entries[word] = dict(old, source_etag=None)
+    print(f"{len(sources)} clips, {len(todo)} to transcode with {args.workers} workers")
+
+    start = time.perf_counter()
+    source_bytes = rendition_bytes = failed = 0
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        futures = {}
+        for word in todo:
+            source = sources[word]
+            poster_at = min(args.poster_at, (source['duration'] or 1.0) / 2)
+            word_dir = os.path.join(args.output, os.path.dirname(source['file']))
+            futures[pool.submit(transcode, ffmpeg, index.path_for(source), word_dir,
+                                args.max_duration, poster_at)] = word
+        for done, future in enumerate(as_completed(futures), 1):
+            word = futures[future]
+            try:
+                outputs = future.result()
+            except (FFmpegError, OSError) as e:
+                failed += 1
+                print(f"  [{done}/{len(todo)}] {word}: FAILED ({e})")
+                continue
+            entries[word] = dict(outputs, source_etag=sources[word]['etag'], spec=RENDITION_SPEC)
+            # Atomic save after every sign: an interrupted run keeps what it already transcoded
+            renditions.save(entries)
+            source_bytes += sources[word]['size']
+            rendition_bytes += outputs['mp4']['size']
+            if done % 50 == 0 or done == len(todo):
+                print(f"  [{done}/{len(todo)}] {time.perf_counter() - start:.0f}s")
+
+    # Also drops the words whose source clip is gone when there was nothing to transcode
+    renditions.save(entries)
+    print(f"{len(entries)} words in {renditions.manifest_path} ({failed} failed)")
+    if source_bytes:
+        print(f"mp4 size: {rendition_bytes / 1e6:.1f} MB for {source_bytes / 1e6:.1f} MB of source clips "
+              f"({100 * rendition_bytes / source_bytes:.0f}%)")
+
+
+if __name__ == '__main__':
+    main()
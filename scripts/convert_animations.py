@@ -0,0 +1,104 @@
+"""
+Convert the avatar keyframe JSON files to the compact binary format.
+
+    backend/animations/keyframes/<sign>.json  ->  backend/animations/binary/<sign>.asla
+                                                  backend/animations/binary/index.json
+
+Each sign becomes flat int16 channel arrays (see backend/utils/animation_format.py),
+served one sign at a time instead of the whole asl_animations.js literal.
+Only JSON files whose size or mtime changed since the last run are converted.
+
+Usage:
+    python scripts/convert_animations.py [--input DIR] [--output DIR] [--force] [--check]
+"""
+
+import os
+import sys
+import glob
+import json
+import argparse
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.utils.animation_format import (EXTENSION, normalize_sign, write_animation, decode_animation,
+                                            load_manifest, save_manifest)
+
+# Reports written next to the keyframes by batch_process_videos.py
+NOT_ANIMATIONS = ('batch_results.json', 'extraction_manifest.json')
+
+
+def manifest_entry(json_path, animation, size, etag, filename):
+    stat = os.stat(json_path)
+    return {
+        'file': filename,
+        'size': size,
+        'etag': etag,
+        'duration': animation.get('duration', 0),
+        'frames': len(animation['keyframes']),
+        'source_size': stat.st_size,
+        'source_mtime': int(stat.st_mtime),
+    }
+
+
+def is_current(entry, json_path, output_dir):
+    stat = os.stat(json_path)
+    return (entry is not None and entry['source_size'] == stat.st_size
+            and entry['source_mtime'] == int(stat.st_mtime)
+            and os.path.exists(os.path.join(output_dir, entry['file'])))
+
+
+def convert_file(json_path, output_dir):
+    """Convert one keyframe JSON file; returns (sign, manifest entry)"""
+    with open(json_path, encoding='utf-8') as f:
+        animation = json.load(f)
+    sign = normalize_sign(os.path.splitext(os.path.basename(json_path))[0])
+    filename = sign + EXTENSION
+    size, etag = write_animation(os.path.join(output_dir, filename), animation)
+    return sign, manifest_entry(json_path, animation, size, etag, filename)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Convert keyframe JSON animations to .asla files')
+    parser.add_argument('--input', default='backend/animations/keyframes', help='Keyframe JSON directory')
+    parser.add_argument('--output', default='backend/animations/binary', help='Binary output directory')
+    parser.add_argument('--force', action='store_true', help='Convert every file again')
+    parser.add_argument('--check', action='store_true', help='Decode each output and compare with the JSON')
+    args = parser.parse_args()
+
+    json_files = sorted(glob.glob(os.path.join(args.input, '*.json')))
+    json_files = [p for p in json_files if os.path.basename(p) not in NOT_ANIMATIONS]
+    signs = {} if args.force else load_manifest(args.output)
+    wanted = {normalize_sign(os.path.splitext(os.path.basename(p))[0]) for p in json_files}
+
+    converted = json_bytes = binary_bytes = 0
+    for json_path in json_files:
+        sign = normalize_sign(os.path.splitext(os.path.basename(json_path))[0])
+        if not is_current(signs.get(sign), json_path, args.output):
+            sign, signs[sign] = convert_file(json_path, args.output)
+            converted += 1
+        json_bytes += os.path.getsize(json_path)
+        binary_bytes += signs[sign]['size']
+
+        if args.check:
+            with open(json_path, encoding='utf-8') as f:
+                original = json.load(f)
+            with open(os.path.join(args.output, signs[sign]['file']), 'rb') as f:
+                decoded = decode_animation(f.read())
+            if decoded['keyframes'] != original['keyframes']:
+                print(f"  {sign}: decoded keyframes differ from the JSON")
+
+    # Signs whose JSON was removed
+    for sign in set(signs) - wanted:
+        path = os.path.join(args.output, signs.pop(sign)['file'])
+        if os.path.exists(path):
+            os.remove(path)
+
+    save_manifest(args.output, signs)
+    print(f"{len(signs)} animations ({converted} converted) in {args.output}")
+    if binary_bytes:
+        print(f"JSON: {json_bytes / 1024:.1f} KB -> binary: {binary_bytes / 1024:.1f} KB "
+              f"({json_bytes / binary_bytes:.1f}x smaller)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,236 @@
+"""
+Columnar snapshot export for BI (PowerBI, pandas, DuckDB...).
+
+Dumps the OLTP tables into Hive-style partitioned Parquet files so BI
+refreshes read compressed columnar data instead of hitting MySQL:
+
+    <output>/predictions/date=2024-06-01/prediction_type=image/part-000000004521.parquet
+    <output>/sign_sequences/date=2024-06-01/part-000000000812.parquet
+    <output>/quiz_results/date=2024-06-01/part.parquet
+    <output>/users/users.parquet            (no password hashes)
+
+Rows are read with a server-side cursor in chunks. Append-only tables
+(predictions, sign_sequences) are exported incrementally from the last
+exported id stored in <output>/_export_state.json: later runs only add new
+part files. Several web workers insert concurrently and InnoDB hands out ids
+before commit, so a lower id can become visible after a higher one was
+exported: ids skipped below the watermark are kept in the state as gaps and
+looked for again on later runs (up to LATE_ID_WINDOW ids back; older gaps
+are rolled-back inserts). quiz_results rows are updated while a quiz is running, so the
+partitions from the last exported day onwards are rewritten on each run.
+
+Usage:
+    python scripts/export_bi_snapshot.py --output bi_export [--full]
+"""
+
+import os
+import sys
+import json
+import shutil
+import argparse
+from collections import defaultdict
+
+import pymysql
+import pyarrow as pa
+import pyarrow.parquet as pq
+from dotenv import load_dotenv
+
+load_dotenv()
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.config import Config
+from backend.utils.export import prediction_schema, rows_to_table
+
+CHUNK_SIZE = 50000
+STATE_FILE = '_export_state.json'
+
+# How far below the last exported id a not-yet-committed row is still looked for
+LATE_ID_WINDOW = 10000
+
+SIGN_SEQUENCE_SCHEMA = pa.schema([
+    ('id', pa.int64()),
+    ('user_email', pa.string()),
+    ('source_text', pa.string()),
+    ('signs', pa.string()),
+    ('sign_count', pa.int32()),
+    ('created_at', pa.timestamp('s')),
+])
+
+QUIZ_SCHEMA = pa.schema([
+    ('id', pa.int64()),
+    ('user_email', pa.string()),
+    ('total_questions', pa.int32()),
+    ('correct_answers', pa.int32()),
+    ('score_percentage', pa.float64()),
+    ('quiz_duration', pa.int32()),
+    ('created_at', pa.timestamp('s')),
+])
+
+USER_SCHEMA = pa.schema([
+    ('email', pa.string()),
+    ('first_name', pa.string()),
+    ('last_name', pa.string()),
+    ('created_at', pa.timestamp('s')),
+    ('last_login', pa.timestamp('s')),
+    ('is_active', pa.bool_()),
+])
+
+
+def get_connection():
+    return pymysql.connect(
+        host=Config.MYSQL_HOST,
+        user=Config.MYSQL_USER,
+        password=Config.MYSQL_PASSWORD,
+        database=Config.MYSQL_DATABASE,
+        port=Config.MYSQL_PORT,
+        charset='utf8mb4',
+        cursorclass=pymysql.cursors.DictCursor
+    )
+
+
+def load_state(output_dir):
+    path = os.path.join(output_dir, STATE_FILE)
+    if os.path.exists(path):
+        with open(path) as f:
+            return json.load(f)
+    return {}
+
+
+def save_state(output_dir, state):
+    path = os.path.join(output_dir, STATE_FILE)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(state, f, indent=2)
+    os.replace(path + '.tmp', path)
+
+
+def write_parquet(table, path):
+    """Write atomically so an interrupted run never leaves a half-written file"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    pq.write_table(table, path + '.tmp', compression='snappy')
+    os.replace(path + '.tmp', path)
+
+
+def stream_chunks(conn, sql, params=()):
+    with conn.cursor(pymysql.cursors.SSDictCursor) as cursor:
+        cursor.execute(sql, params)
+        while True:
+            rows = cursor.fetchmany(CHUNK_SIZE)
+            if not rows:
+                break
+            yield rows
+
+
+def partition_dir(base, row, keys):
+    parts = [f"date={row['created_at']:%Y-%m-%d}"] + [f"{key}={row[key]}" for key in keys]
+    return os.path.join(base, *parts)
+
+
+def export_append_only(conn, output_dir, state, table_name, columns, schema, partition_keys=()):
+    """
+    Incremental export of an insert-only table, keyed on its auto-increment id.
+    Ids missing below the watermark (gaps) are exported when they show up later.
+    """
+    table_state = state.get(table_name, {})
+    last_id = table_state.get('last_id', 0)
+    gaps = set(table_state.get('gaps', []))
+    base = os.path.join(output_dir, table_name)
+    sql = f"SELECT {', '.join(columns)} FROM {table_name} WHERE id > %s ORDER BY id"
+
+    exported = late = files = 0
+    for rows in stream_chunks(conn, sql, (min(gaps) - 1 if gaps else last_id,)):
+        new_rows = []
+        for row in rows:
+            if row['id'] <= last_id:
+                # Below the watermark: only rows that were not visible at the last run
+                if row['id'] in gaps:
+                    gaps.discard(row['id'])
+                    new_rows.append(row)
+                    late += 1
+                continue
+            gaps.update(range(max(last_id + 1, row['id'] - LATE_ID_WINDOW), row['id']))
+            last_id = row['id']
+            new_rows.append(row)
+        gaps = {gap for gap in gaps if gap > last_id - LATE_ID_WINDOW}
+
+        groups = defaultdict(list)
+        for row in new_rows:
+            groups[partition_dir(base, row, partition_keys)].append(row)
+        for directory, group in groups.items():
+            # Partition columns live in the path, not in the file
+            file_schema = pa.schema([f for f in schema if f.name not in partition_keys])
+            write_parquet(rows_to_table(group, file_schema),
+                          os.path.join(directory, f"part-{group[0]['id']:012d}.parquet"))
+            files += 1
+        exported += len(new_rows)
+        state[table_name] = {'last_id': last_id, 'gaps': sorted(gaps)}
+        save_state(output_dir, state)
+
+    print(f"  {table_name}: {exported} new rows ({late} committed late) in {files} files "
+          f"(last id {last_id}, {len(gaps)} ids still missing)")
+
+
+def export_quiz_results(conn, output_dir, state):
+    """Rewrite the partitions from the last exported day onwards (rows change during a quiz)"""
+    since = state.get('quiz_results', {}).get('last_date', '1970-01-01')
+    base = os.path.join(output_dir, 'quiz_results')
+    sql = f"""
+        SELECT {', '.join(QUIZ_SCHEMA.names)} FROM quiz_results
+        WHERE created_at >= %s ORDER BY created_at
+    """
+    groups = defaultdict(list)
+    last_date = since
+    for rows in stream_chunks(conn, sql, (since,)):
+        for row in rows:
+            groups[f"{row['created_at']:%Y-%m-%d}"].append(row)
+            last_date = max(last_date, f"{row['created_at']:%Y-%m-%d}")
+
+    for day, group in groups.items():
+        for row in group:
+            row['score_percentage'] = float(row['score_percentage'])
+        write_parquet(rows_to_table(group, QUIZ_SCHEMA),
+                      os.path.join(base, f"date={day}", 'part.parquet'))
+
+    state['quiz_results'] = {'last_date': last_date}
+    save_state(output_dir, state)
+    print(f"  quiz_results: {sum(len(g) for g in groups.values())} rows in {len(groups)} partitions")
+
+
+def export_users(conn, output_dir):
+    """Small dimension table: full snapshot, password hashes excluded"""
+    rows = []
+    for chunk in stream_chunks(conn, f"SELECT {', '.join(USER_SCHEMA.names)} FROM users"):
+        for row in chunk:
+            row['is_active'] = bool(row['is_active'])
+        rows.extend(chunk)
+    write_parquet(rows_to_table(rows, USER_SCHEMA), os.path.join(output_dir, 'users', 'users.parquet'))
+    print(f"  users: {len(rows)} rows")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Export BI snapshot as partitioned Parquet')
+    parser.add_argument('--output', '-o', default='bi_export', help='Output directory')
+    parser.add_argument('--full', action='store_true', help='Discard previous export and start over')
+    args = parser.parse_args()
+
+    if args.full and os.path.exists(args.output):
+        shutil.rmtree(args.output)
+    os.makedirs(args.output, exist_ok=True)
+    state = load_state(args.output)
+
+    conn = get_connection()
+    try:
+        print(f"📦 Exporting BI snapshot to {args.output}")
+        export_append_only(conn, args.output, state, 'predictions',
+                           prediction_schema().names, prediction_schema(),
+                           partition_keys=('prediction_type',))
+        export_append_only(conn, args.output, state, 'sign_sequences',
+                           SIGN_SEQUENCE_SCHEMA.names, SIGN_SEQUENCE_SCHEMA)
+        export_quiz_results(conn, args.output, state)
+        export_users(conn, args.output)
+        print("✅ Done")
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -4,8 +4,7 @@ Extracts hand and body pose data from ASL training videos using MediaPipe
 and converts them to avatar-compatible keyframe animations.
 """
 
-import cv2
-import mediapipe as mp
+import os
 import mediapipe.solutions.holistic as mp_holistic
 import json
 import numpy as np
@@ -13,52 +12,80 @@ from pathlib import Path
 import argparse
 import sys
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from frame_sampler import DECODERS, FrameSampler
+from training.scripts.landmark_store import NUM_LANDMARKS, LandmarkStore, results_to_array
+
+# Bump when the keyframe output changes for the same video and parameters,
+# so that incremental batch runs re-extract everything
+EXTRACTOR_VERSION = 1
+
+
 class ASLPoseExtractor:
-    def __init__(self):
+    def __init__(self, verbose=True, sample_rate=5, model_complexity=1,
+                 min_detection_confidence=0.5, min_tracking_confidence=0.5,
+                 target_fps=None, decoder='opencv', decoder_threads=0):
+        self.verbose = verbose
+        self.sample_rate = sample_rate
+        self.target_fps = target_fps
+        self.decoder = decoder
+        self.decoder_threads = decoder_threads
+        self.model_complexity = model_complexity
+        self.min_detection_confidence = min_detection_confidence
+        self.min_tracking_confidence = min_tracking_confidence
         self.mp_holistic = mp_holistic.Holistic
         self.holistic = self.mp_holistic(
-            min_detection_confidence=0.5,
-            min_tracking_confidence=0.5,
-            model_complexity=1
+            min_detection_confidence=min_detection_confidence,
+            min_tracking_confidence=min_tracking_confidence,
+            model_complexity=model_complexity
         )
+    
+    def params(self):
+        """Settings that determine the output (recorded in the extraction manifest)"""
+        return extractor_params(self.sample_rate, self.model_complexity,
+                                self.min_detection_confidence, self.min_tracking_confidence,
+                                self.target_fps, self.decoder)
         
-    def extract_keyframes(self, video_path, sample_rate=5):
+    def extract_keyframes(self, video_path, sample_rate=None):
         """
         Extract pose keyframes from video
         
         Args:
             video_path: Path to video file
-            sample_rate: Extract every Nth frame (default: 5)
+            sample_rate: Extract every Nth frame (default: the extractor's, 5;
+                ignored when the extractor has a target_fps)
             
         Returns:
-            dict: Animation data with keyframes
+            dict: Animation data with keyframes, and the (keyframes, 543, 3)
+                float16 array of all landmarks under 'landmarks'
         """
-        cap = cv2.VideoCapture(str(video_path))
+        # The graph tracks landmarks across calls: start each video from a fresh detection
+        # instead of the previous video's last frame
+        self.holistic.reset()
         
-        if not cap.isOpened():
-            raise ValueError(f"Could not open video: {video_path}")
-        
-        fps = cap.get(cv2.CAP_PROP_FPS)
-        frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-        duration = frame_count / fps if fps > 0 else 0
+        sampler = FrameSampler(video_path, sample_rate or self.sample_rate,
+                               target_fps=self.target_fps, decoder=self.decoder,
+                               threads=self.decoder_threads)
+        fps = sampler.fps
+        frame_count = sampler.frame_count
+        duration = sampler.duration
         
         keyframes = []
-        frame_idx = 0
+        all_landmarks = []
         
-        print(f"  Processing {frame_count} frames at {fps:.1f} fps...")
+        if self.verbose:
+            print(f"  Processing {frame_count} frames at {fps:.1f} fps...")
         
-        while cap.isOpened():
-            ret, frame = cap.read()
-            if not ret:
-                break
-            
-            # Sample frames at specified rate
-            if frame_idx % sample_rate == 0:
-                rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        # Skipped frames are only grabbed, not retrieved or converted (see frame_sampler.py)
+        with sampler:
+            for frame_idx, timestamp, rgb_frame in sampler:
                 results = self.holistic.process(rgb_frame)
+                # All 543 landmarks, for the landmark store (see training/scripts/landmark_store.py)
+                all_landmarks.append(results_to_array(results))
                 
                 keyframe = {
-                    'time': frame_idx / fps if fps > 0 else 0,
+                    'time': timestamp,
                     'frame': frame_idx
                 }
                 
@@ -103,18 +130,17 @@ class ASLPoseExtractor:
                     }
                 
                 keyframes.append(keyframe)
-            
-            frame_idx += 1
-        
-        cap.release()
         
-        print(f"  Extracted {len(keyframes)} keyframes")
+        if self.verbose:
+            print(f"  Extracted {len(keyframes)} keyframes")
         
         return {
             'duration': duration,
             'fps': fps,
             'total_frames': frame_count,
-            'keyframes': keyframes
+            'keyframes': keyframes,
+            'landmarks': (np.stack(all_landmarks) if all_landmarks
+                          else np.empty((0, NUM_LANDMARKS, 3))).astype(np.float16)
         }
     
     def calculate_finger_curl(self, hand_data):
@@ -210,13 +236,16 @@ class ASLPoseExtractor:
         }
     
     def save_animation(self, animation_data, output_path):
-        """Save animation data to JSON file"""
+        """Save animation data to JSON file (atomic: never a half-written file)"""
         output_path.parent.mkdir(parents=True, exist_ok=True)
         
-        with open(output_path, 'w') as f:
+        tmp_path = output_path.with_name(output_path.name + f'.{os.getpid()}.tmp')
+        with open(tmp_path, 'w') as f:
             json.dump(animation_data, f, indent=2)
+        os.replace(tmp_path, output_path)
         
-        print(f"  ✓ Saved to {output_path}")
+        if self.verbose:
+            print(f"  ✓ Saved to {output_path}")
     
     def generate_javascript(self, animation_data, sign_name):
         """Generate JavaScript code for avatar_3d.js"""
@@ -230,9 +259,38 @@ class ASLPoseExtractor:
         return js_code
 
 
-def process_single_video(video_path, output_dir, sign_name=None):
-    """Process a single video file"""
+def extractor_params(sample_rate=5, model_complexity=1,
+                     min_detection_confidence=0.5, min_tracking_confidence=0.5,
+                     target_fps=None, decoder='opencv'):
+    """Parameters of an extraction, without building a MediaPipe graph
+
+    target_fps and decoder are only recorded when not the defaults, so
+    manifests written before they existed stay up to date.
+    """
+    params = {
+        'version': EXTRACTOR_VERSION,
+        'sample_rate': sample_rate,
+        'model_complexity': model_complexity,
+        'min_detection_confidence': min_detection_confidence,
+        'min_tracking_confidence': min_tracking_confidence,
+    }
+    if target_fps:
+        params['target_fps'] = target_fps
+    if decoder != 'opencv':
+        # PyAV converts YUV to RGB with libswscale: pixels (and landmarks) differ slightly
+        params['decoder'] = decoder
+    return params
+
+
+def process_single_video(video_path, output_dir, sign_name=None, extractor=None, landmark_store=None):
+    """Process a single video file
+
+    Pass an existing `extractor` to reuse its MediaPipe Holistic graph across
+    videos (batch workers keep one per process), and a LandmarkStore opened
+    for writing to also persist all the landmarks of the video.
+    """
     video_path = Path(video_path)
+    verbose = extractor is None or extractor.verbose
     
     if not video_path.exists():
         print(f"❌ Video not found: {video_path}")
@@ -241,11 +299,13 @@ def process_single_video(video_path, output_dir, sign_name=None):
     if sign_name is None:
         sign_name = video_path.parent.name
     
-    print(f"\n📹 Processing: {sign_name}")
-    print(f"  Video: {video_path.name}")
+    if verbose:
+        print(f"\n📹 Processing: {sign_name}")
+        print(f"  Video: {video_path.name}")
     
     try:
-        extractor = ASLPoseExtractor()
+        if extractor is None:
+            extractor = ASLPoseExtractor()
         
         # Extract pose data
         pose_data = extractor.extract_keyframes(video_path)
@@ -260,17 +320,28 @@ def process_single_video(video_path, output_dir, sign_name=None):
         # Generate JavaScript
         js_code = extractor.generate_javascript(animation_data, sign_name)
         
+        frame_idx = [kf['frame'] for kf in pose_data['keyframes']]
+        if landmark_store is not None:
+            stat = video_path.stat()
+            landmark_store.append(str(video_path), sign_name, pose_data['landmarks'], frame_idx,
+                                  pose_data['fps'], stat.st_size, stat.st_mtime)
+            landmark_store.commit()
+        
         return {
             'sign': sign_name,
             'animation': animation_data,
             'js_code': js_code,
+            'landmarks': pose_data['landmarks'],
+            'frame_idx': frame_idx,
+            'fps': pose_data['fps'],
             'success': True
         }
         
     except Exception as e:
-        print(f"  ❌ Error: {e}")
-        import traceback
-        traceback.print_exc()
+        if verbose:
+            print(f"  ❌ Error: {e}")
+            import traceback
+            traceback.print_exc()
         return {
             'sign': sign_name,
             'success': False,
@@ -284,10 +355,29 @@ def main():
     parser.add_argument('--output', '-o', default='backend/animations/keyframes',
                        help='Output directory for JSON files')
     parser.add_argument('--sign', '-s', help='Sign name (default: parent folder name)')
+    parser.add_argument('--sample-rate', type=int, default=5, help='Extract every Nth frame')
+    parser.add_argument('--target-fps', type=float,
+                       help='Extract this many keyframes per second of video instead of every Nth frame')
+    parser.add_argument('--decoder', choices=DECODERS, default='opencv',
+                       help='Video decoder (pyav needs `pip install av`)')
+    parser.add_argument('--landmarks', metavar='DIR',
+                       help='Also add all 543 landmarks per keyframe to this landmark store')
     
     args = parser.parse_args()
     
-    result = process_single_video(args.video, args.output, args.sign)
+    extractor = ASLPoseExtractor(sample_rate=args.sample_rate, target_fps=args.target_fps,
+                                 decoder=args.decoder)
+    try:
+        landmark_store = LandmarkStore(args.landmarks, extractor.params()) if args.landmarks else None
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    try:
+        result = process_single_video(args.video, args.output, args.sign, extractor=extractor,
+                                      landmark_store=landmark_store)
+    finally:
+        if landmark_store is not None:
+            landmark_store.close()
     
     if result and result['success']:
         print(f"\n✅ Successfully processed: {result['sign']}")
@@ -0,0 +1,121 @@
+"""
+Rebuild the analytics rollup tables from the raw history.
+
+The rollups (prediction_daily_rollups, prediction_class_totals,
+prediction_daily_totals) are maintained incrementally by the prediction log
+writer. Run this script once after creating the tables to backfill existing
+rows, or any time to compact/repair them.
+
+Rows written by the application while a rebuild is running may be counted
+twice: run it while the application is stopped.
+
+Usage:
+    python scripts/rebuild_analytics_rollups.py [--user EMAIL]
+"""
+
+import os
+import sys
+import argparse
+
+import pymysql
+from dotenv import load_dotenv
+
+load_dotenv()
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.config import Config
+from backend.prediction_log import ROLLUP_SQL, rollup_batch
+
+CHUNK_SIZE = 5000
+
+
+def get_connection():
+    return pymysql.connect(
+        host=Config.MYSQL_HOST,
+        user=Config.MYSQL_USER,
+        password=Config.MYSQL_PASSWORD,
+        database=Config.MYSQL_DATABASE,
+        port=Config.MYSQL_PORT,
+        charset='utf8mb4',
+        cursorclass=pymysql.cursors.DictCursor
+    )
+
+
+def rebuild(conn, user_email=None):
+    where = "WHERE user_email = %s" if user_email else ""
+    params = (user_email,) if user_email else ()
+
+    with conn.cursor() as cursor:
+        for table in ('prediction_daily_rollups', 'prediction_class_totals', 'prediction_daily_totals'):
+            cursor.execute(f"DELETE FROM {table} {where}", params)
+
+        # 1. Raw predictions, aggregated server-side
+        cursor.execute(f"""
+            INSERT INTO prediction_daily_rollups
+                (user_email, day, prediction_type, predicted_class, prediction_count, confidence_sum)
+            SELECT user_email, DATE(created_at), prediction_type, predicted_class, COUNT(*), SUM(confidence)
+            FROM predictions
+            {where}
+            GROUP BY user_email, DATE(created_at), prediction_type, predicted_class
+        """, params)
+        print(f"  predictions: {cursor.rowcount} daily rollup rows")
+
+    # 2. Packed text-to-sign sequences, expanded in Python chunk by chunk.
+    # The unbuffered read needs its own connection while we write on `conn`.
+    sequences = 0
+    read_conn = get_connection()
+    try:
+        with read_conn.cursor(pymysql.cursors.SSDictCursor) as stream, conn.cursor() as cursor:
+            stream.execute(f"SELECT user_email, source_text, signs, sign_count, created_at "
+                           f"FROM sign_sequences {where}", params)
+            while True:
+                rows = stream.fetchmany(CHUNK_SIZE)
+                if not rows:
+                    break
+                batch = [('sign_sequence', (r['user_email'], r['source_text'], r['signs'],
+                                            r['sign_count'], r['created_at'])) for r in rows]
+                cursor.executemany(ROLLUP_SQL['daily_classes'], rollup_batch(batch)['daily_classes'])
+                sequences += len(rows)
+    finally:
+        read_conn.close()
+    print(f"  sign sequences: {sequences} rows expanded")
+
+    # 3. Coarser rollups derived from the daily ones
+    with conn.cursor() as cursor:
+        cursor.execute(f"""
+            INSERT INTO prediction_class_totals
+                (user_email, prediction_type, predicted_class, prediction_count, confidence_sum)
+            SELECT user_email, prediction_type, predicted_class, SUM(prediction_count), SUM(confidence_sum)
+            FROM prediction_daily_rollups
+            {where}
+            GROUP BY user_email, prediction_type, predicted_class
+        """, params)
+        cursor.execute(f"""
+            INSERT INTO prediction_daily_totals (user_email, day, prediction_count)
+            SELECT user_email, day, SUM(prediction_count)
+            FROM prediction_daily_rollups
+            {where}
+            GROUP BY user_email, day
+        """, params)
+    conn.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Rebuild analytics rollup tables')
+    parser.add_argument('--user', help='Only rebuild rollups for this user email')
+    args = parser.parse_args()
+
+    conn = get_connection()
+    try:
+        print(f"Rebuilding rollups for {args.user or 'all users'}...")
+        rebuild(conn, args.user)
+        print("Done.")
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
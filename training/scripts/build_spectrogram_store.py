@@ -0,0 +1,237 @@
+"""
+Construction hors ligne des mel-spectrogrammes de tout le dataset d'entraînement.
+
+Parcourt dataset/audio sur tous les coeurs, calcule le mel-spectrogramme de
+chaque fichier en une passe et l'ajoute à un store NumPy unique :
+
+    dataset/features/mel_store.f16   trames float16 concaténées, forme (N, n_mels)
+    dataset/features/index.json      paramètres + {fichier: offset, frames, taille, mtime}
+
+Le store se lit avec np.memmap (voir `open_store`) sans rien charger en
+mémoire. Les fichiers déjà présents avec la même taille / mtime et les mêmes
+paramètres sont ignorés ; changer n_mels, sr, n_fft ou hop reconstruit tout.
+Les lignes asl_training_labels correspondantes sont ensuite mises à jour en
+une seule requête groupée (action_metadata.mel_store / mel_offset / mel_frames) ;
+spectrogram_path reste réservé à l'image PNG.
+
+Usage:
+    python build_spectrogram_store.py [--n-mels 128] [--sr 22050] [--workers 8] [--full]
+"""
+import os
+import json
+import time
+import argparse
+from multiprocessing import Pool, cpu_count
+
+import numpy as np
+import pymysql
+from dotenv import load_dotenv
+
+load_dotenv()
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DATASET_DIR = os.path.join(SCRIPT_DIR, '..', 'dataset')
+AUDIO_EXTENSIONS = ('.wav', '.mp3', '.ogg', '.flac', '.webm')
+
+STORE_FILE = 'mel_store.f16'
+INDEX_FILE = 'index.json'
+DTYPE = np.float16
+
+
+def get_db_connection():
+    try:
+        conn = pymysql.connect(
+            host=os.getenv('MYSQL_HOST', 'localhost'),
+            user=os.getenv('MYSQL_USER', 'root'),
+            password=os.getenv('MYSQL_PASSWORD', '1234567890'),
+            database=os.getenv('MYSQL_DATABASE', 'asl_recognition'),
+            charset='utf8mb4',
+            cursorclass=pymysql.cursors.DictCursor
+        )
+        return conn
+    except Exception as e:
+        print(f"Erreur DB: {e}")
+        return None
+
+
+# ----- store -----
+
+def load_index(features_dir):
+    path = os.path.join(features_dir, INDEX_FILE)
+    if os.path.exists(path):
+        with open(path) as f:
+            return json.load(f)
+    return None
+
+
+def save_index(features_dir, index):
+    path = os.path.join(features_dir, INDEX_FILE)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(index, f, indent=1)
+    os.replace(path + '.tmp', path)
+
+
+def open_store(features_dir):
+    """(memmap (N, n_mels), index) ; un échantillon = store[offset:offset + frames]"""
+    index = load_index(features_dir)
+    store = np.memmap(os.path.join(features_dir, STORE_FILE), dtype=DTYPE, mode='r')
+    return store.reshape(-1, index['params']['n_mels']), index
+
+
+# ----- workers -----
+
+def compute_mel(args):
+    """Exécuté dans un worker : fichier audio -> trames mel en dB (frames, n_mels)"""
+    import librosa
+
+    path, params = args
+    try:
+        y, sr = librosa.load(path, sr=params['sr'])
+        S = librosa.feature.melspectrogram(y=y, sr=sr, n_fft=params['n_fft'],
+                                           hop_length=params['hop_length'], n_mels=params['n_mels'])
+        S_dB = librosa.power_to_db(S, ref=np.max, top_db=params['top_db'])
+        return path, np.ascontiguousarray(S_dB.T, dtype=DTYPE), None
+    except Exception as e:
+        return path, None, str(e)
+
+
+def list_audio_files(audio_dir):
+    files = []
+    for name in sorted(os.listdir(audio_dir)):
+        if name.lower().endswith(AUDIO_EXTENSIONS):
+            stat = os.stat(os.path.join(audio_dir, name))
+            files.append((name, stat.st_size, int(stat.st_mtime)))
+    return files
+
+
+def build_store(audio_dir, features_dir, params, workers, full=False):
+    """Ajouter au store les fichiers nouveaux ou modifiés ; retourne l'index"""
+    os.makedirs(features_dir, exist_ok=True)
+    store_path = os.path.join(features_dir, STORE_FILE)
+
+    index = None if full else load_index(features_dir)
+    if index is None or index['params'] != params:
+        if index is not None:
+            print("Paramètres modifiés : reconstruction complète du store")
+        index = {'params': params, 'dtype': 'float16', 'entries': {}}
+        if os.path.exists(store_path):
+            os.remove(store_path)
+
+    audio_files = list_audio_files(audio_dir)
+
+    # Fichiers audio supprimés : leurs trames deviennent inutilisées
+    present = {name for name, _, _ in audio_files}
+    for name in [name for name in index['entries'] if name not in present]:
+        del index['entries'][name]
+
+    todo = []
+    for name, size, mtime in audio_files:
+        entry = index['entries'].get(name)
+        if entry and entry['size'] == size and entry['mtime'] == mtime:
+            continue
+        todo.append((name, size, mtime))
+
+    print(f"{len(index['entries'])} fichiers indexés, {len(todo)} à calculer ({workers} workers)")
+    if not todo:
+        save_index(features_dir, index)
+        return index
+
+    meta = {name: (size, mtime) for name, size, mtime in todo}
+    jobs = [(os.path.join(audio_dir, name), params) for name, _, _ in todo]
+    row_bytes = params['n_mels'] * np.dtype(DTYPE).itemsize
+    done = errors = 0
+    started = time.time()
+
+    # Un arrêt pendant l'écriture laisse des trames non indexées (ou une trame
+    # partielle) en fin de store : repartir de la fin de la dernière entrée
+    # indexée, sinon tous les offsets suivants seraient décalés
+    end = max((e['offset'] + e['frames'] for e in index['entries'].values()), default=0) * row_bytes
+    if os.path.exists(store_path) and os.path.getsize(store_path) > end:
+        os.truncate(store_path, end)
+
+    with Pool(workers) as pool, open(store_path, 'ab') as store:
+        for path, mel, error in pool.imap_unordered(compute_mel, jobs, chunksize=4):
+            name = os.path.basename(path)
+            if error:
+                errors += 1
+                print(f"  ⚠️  {name}: {error}")
+                continue
+            # Un fichier modifié est ré-ajouté en fin de store (l'ancienne zone devient inutilisée)
+            offset = store.tell() // row_bytes
+            store.write(mel.tobytes())
+            size, mtime = meta[name]
+            index['entries'][name] = {'offset': offset, 'frames': int(mel.shape[0]),
+                                      'size': size, 'mtime': mtime}
+            done += 1
+            if done % 100 == 0:
+                print(f"  {done}/{len(todo)} ({done / (time.time() - started):.1f} fichiers/s)")
+        store.flush()
+        os.fsync(store.fileno())
+
+    # L'index n'est écrit qu'une fois les données sur disque
+    save_index(features_dir, index)
+    print(f"{done} spectrogrammes ajoutés, {errors} erreurs en {time.time() - started:.1f}s")
+    return index
+
+
+# ----- base de données -----
+
+def update_labels(conn, index, store_path):
+    """Renseigner la position dans le store pour toutes les lignes en une requête groupée"""
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT id, audio_path FROM asl_training_labels")
+        rows = cursor.fetchall()
+
+    params = index['params']
+    updates = []
+    for row in rows:
+        name = row['audio_path'].replace('\\', '/').rsplit('/', 1)[-1]
+        entry = index['entries'].get(name)
+        if entry:
+            updates.append((store_path, store_path, entry['offset'], entry['frames'],
+                            params['n_mels'], params['sr'], row['id']))
+
+    with conn.cursor() as cursor:
+        cursor.executemany("""
+            UPDATE asl_training_labels
+            SET spectrogram_path = NULLIF(spectrogram_path, %s),
+                action_metadata = JSON_SET(COALESCE(action_metadata, JSON_OBJECT()),
+                    '$.mel_store', %s, '$.mel_offset', %s, '$.mel_frames', %s,
+                    '$.n_mels', %s, '$.sample_rate', %s)
+            WHERE id = %s
+        """, updates)
+    conn.commit()
+    print(f"{len(updates)} lignes asl_training_labels mises à jour")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Construire le store de mel-spectrogrammes du dataset")
+    parser.add_argument('--audio-dir', default=os.path.join(DATASET_DIR, 'audio'))
+    parser.add_argument('--output', default=os.path.join(DATASET_DIR, 'features'))
+    parser.add_argument('--sr', type=int, default=22050)
+    parser.add_argument('--n-mels', type=int, default=128)
+    parser.add_argument('--n-fft', type=int, default=2048)
+    parser.add_argument('--hop-length', type=int, default=512)
+    parser.add_argument('--top-db', type=float, default=80.0)
+    parser.add_argument('--workers', type=int, default=cpu_count())
+    parser.add_argument('--full', action='store_true', help='Ignorer le store existant')
+    parser.add_argument('--no-db', action='store_true', help='Ne pas mettre à jour asl_training_labels')
+    args = parser.parse_args()
+
+    params = {'sr': args.sr, 'n_mels': args.n_mels, 'n_fft': args.n_fft,
+              'hop_length': args.hop_length, 'top_db': args.top_db}
+    index = build_store(args.audio_dir, args.output, params, args.workers, args.full)
+
+    if args.no_db:
+        return
+    conn = get_db_connection()
+    if not conn:
+        return
+    try:
+        update_labels(conn, index, os.path.abspath(os.path.join(args.output, STORE_FILE)))
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
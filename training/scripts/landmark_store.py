@@ -0,0 +1,268 @@
+"""
+Full-landmark pose store for training and analytics.
+
+The avatar keyframes keep about 20 of the 543 MediaPipe Holistic landmarks.
+The extractor also returns every landmark of every sampled frame, and this
+store persists them so that feature engineering and training read landmarks
+from disk instead of running MediaPipe over the videos again:
+
+    <dir>/landmarks-0000.f16   float16 frames concatenated, shape (N, 543, 3)
+    <dir>/landmarks-0001.f16   (a new shard is started every `shard_frames` frames)
+    <dir>/index.json           extractor params + {video: sign, shard, offset, frames, ...}
+                               + {sign: [videos]}
+
+Landmark order follows LAYOUT (face, left hand, pose, right hand); x, y, z
+are MediaPipe's normalized coordinates and NaN marks a part that was not
+detected in a frame. Shards are read with np.memmap without loading them
+(from training/scripts, or `from training.scripts.landmark_store import
+LandmarkStore` from the repository root):
+
+    from landmark_store import LandmarkStore
+
+    store = LandmarkStore('training/dataset/landmarks', mode='r')
+    for video in store.videos('hello'):
+        frames = store.get(video)          # (frames, 543, 3) float16 memmap
+
+A video extracted again is appended at the end of the current shard (the old
+rows become unused) and an index written only after the data is on disk, so
+an interrupted run never indexes half-written rows.
+"""
+
+import os
+import json
+
+import numpy as np
+
+INDEX_FILE = 'index.json'
+SHARD_PATTERN = 'landmarks-{:04d}.f16'
+DTYPE = np.float16
+STORE_VERSION = 1
+
+LAYOUT = (('face', 468), ('left_hand', 21), ('pose', 33), ('right_hand', 21))
+NUM_LANDMARKS = sum(count for _, count in LAYOUT)
+
+# 65536 frames x 543 landmarks x 3 x 2 bytes = 213 MB per shard
+DEFAULT_SHARD_FRAMES = 65536
+
+
+def layout_slices():
+    """{part: slice of the landmark axis}"""
+    slices, start = {}, 0
+    for name, count in LAYOUT:
+        slices[name] = slice(start, start + count)
+        start += count
+    return slices
+
+
+def results_to_array(results):
+    """MediaPipe Holistic results -> (543, 3) float32, NaN for undetected parts"""
+    array = np.full((NUM_LANDMARKS, 3), np.nan, dtype=np.float32)
+    for (name, count), part in zip(LAYOUT, layout_slices().values()):
+        landmarks = getattr(results, f"{name}_landmarks", None)
+        if landmarks:
+            array[part] = [(lm.x, lm.y, lm.z) for lm in landmarks.landmark[:count]]
+    return array
+
+
+class LandmarkStore:
+    """Append-only sharded landmark store
+
+    Args:
+        directory: Store directory
+        params: Extractor parameters (extractor_params()); required to write
+        mode: 'r' to read, 'a' to append
+        reset: Start an empty store when `params` differ from the stored ones
+            (otherwise that is an error: the frames would not be comparable)
+        shard_frames: Frames per shard before a new one is started
+    """
+
+    def __init__(self, directory, params=None, mode='a', reset=False, shard_frames=DEFAULT_SHARD_FRAMES):
+        if mode not in ('r', 'a'):
+            raise ValueError(f"Unknown mode: {mode}")
+        if mode == 'a' and params is None:
+            raise ValueError("params are required to write to a landmark store")
+        self.directory = str(directory)
+        self.mode = mode
+        self.shard_frames = shard_frames
+        self._shard_file = None
+        self._memmaps = {}
+
+        self.index = self._load_index()
+        if self.index is None and mode == 'r':
+            raise FileNotFoundError(f"No landmark store in {self.directory}")
+        if mode == 'a':
+            if self.index is not None and self.index['params'] != params:
+                if not reset:
+                    raise ValueError(f"Landmark store {self.directory} was built with other extractor "
+                                     f"parameters: {self.index['params']}")
+                print("Extractor parameters changed: rebuilding the landmark store")
+                self._remove_shards()
+                self.index = None
+            if self.index is None:
+                self.index = self._empty_index(params)
+            os.makedirs(self.directory, exist_ok=True)
+            self._truncate_shards()
+
+    # ----- index -----
+
+    def _empty_index(self, params):
+        return {
+            'version': STORE_VERSION,
+            'params': params,
+            'dtype': 'float16',
+            'landmarks': NUM_LANDMARKS,
+            'layout': [[name, part.start, part.stop] for name, part in layout_slices().items()],
+            'shards': [],
+            'videos': {},
+            'signs': {},
+        }
+
+    def _load_index(self):
+        try:
+            with open(os.path.join(self.directory, INDEX_FILE)) as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return index if index.get('version') == STORE_VERSION else None
+
+    def _save_index(self):
+        path = os.path.join(self.directory, INDEX_FILE)
+        with open(path + '.tmp', 'w') as f:
+            json.dump(self.index, f, separators=(',', ':'))
+        os.replace(path + '.tmp', path)
+
+    def _shard_path(self, shard):
+        return os.path.join(self.directory, self.index['shards'][shard]['file'])
+
+    def _remove_shards(self):
+        for shard in self.index['shards']:
+            path = os.path.join(self.directory, shard['file'])
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _truncate_shards(self):
+        """Drop rows written after the last saved index (interrupted run)"""
+        row_bytes = NUM_LANDMARKS * 3 * np.dtype(DTYPE).itemsize
+        for shard in range(len(self.index['shards'])):
+            path = self._shard_path(shard)
+            expected = self.index['shards'][shard]['frames'] * row_bytes
+            if os.path.exists(path) and os.path.getsize(path) > expected:
+                os.truncate(path, expected)
+
+    # ----- reading -----
+
+    def has(self, video):
+        return str(video) in self.index['videos']
+
+    def entry(self, video):
+        """Index entry (sign, shard, offset, frames, frame_idx, fps, size, mtime) or None"""
+        return self.index['videos'].get(str(video))
+
+    def videos(self, sign=None):
+        """Video keys of one sign, or of the whole store"""
+        if sign is None:
+            return list(self.index['videos'])
+        return list(self.index['signs'].get(sign, []))
+
+    def signs(self):
+        return sorted(self.index['signs'])
+
+    def _shard(self, shard):
+        memmap = self._memmaps.get(shard)
+        if memmap is None:
+            memmap = np.memmap(self._shard_path(shard), dtype=DTYPE, mode='r').reshape(-1, NUM_LANDMARKS, 3)
+            self._memmaps[shard] = memmap
+        return memmap
+
+    def get(self, video):
+        """(frames, 543, 3) float16 memmap view of a video's landmarks"""
+        entry = self.entry(video)
+        if entry is None:
+            raise KeyError(video)
+        if not entry['frames']:
+            return np.empty((0, NUM_LANDMARKS, 3), dtype=DTYPE)
+        return self._shard(entry['shard'])[entry['offset']:entry['offset'] + entry['frames']]
+
+    def by_sign(self, sign):
+        """{video: (frames, 543, 3) memmap} for every video of a sign"""
+        return {video: self.get(video) for video in self.videos(sign)}
+
+    def stats(self):
+        indexed = sum(entry['frames'] for entry in self.index['videos'].values())
+        stored = sum(shard['frames'] for shard in self.index['shards'])
+        return {'videos': len(self.index['videos']), 'signs': len(self.index['signs']),
+                'shards': len(self.index['shards']), 'frames': indexed, 'unused_frames': stored - indexed}
+
+    # ----- writing -----
+
+    def _current_shard(self, frames):
+        """Shard to append `frames` rows to (a video never spans two shards)"""
+        shards = self.index['shards']
+        if not shards or (shards[-1]['frames'] and shards[-1]['frames'] + frames > self.shard_frames):
+            if self._shard_file is not None:
+                self._sync()
+                self._shard_file.close()
+                self._shard_file = None
+            shards.append({'file': SHARD_PATTERN.format(len(shards)), 'frames': 0})
+        if self._shard_file is None:
+            # 'wb' for a new shard: a file left by a lost index must not shift the offsets
+            mode = 'ab' if shards[-1]['frames'] else 'wb'
+            self._shard_file = open(self._shard_path(len(shards) - 1), mode)
+        return len(shards) - 1
+
+    def append(self, video, sign, landmarks, frame_idx, fps, size=None, mtime=None):
+        """Add (or replace) the landmarks of a video; call commit() to make it durable"""
+        if self.mode != 'a':
+            raise ValueError("Landmark store opened read-only")
+        landmarks = np.ascontiguousarray(landmarks, dtype=DTYPE)
+        if landmarks.ndim != 3 or landmarks.shape[1:] != (NUM_LANDMARKS, 3):
+            raise ValueError(f"Expected (frames, {NUM_LANDMARKS}, 3) landmarks, got {landmarks.shape}")
+
+        self.discard(video)
+        shard = self._current_shard(len(landmarks))
+        offset = self.index['shards'][shard]['frames']
+        self._shard_file.write(landmarks.tobytes())
+        self.index['shards'][shard]['frames'] += len(landmarks)
+        self._memmaps.pop(shard, None)
+
+        self.index['videos'][str(video)] = {
+            'sign': sign, 'shard': shard, 'offset': offset, 'frames': len(landmarks),
+            'frame_idx': [int(i) for i in frame_idx], 'fps': fps, 'size': size, 'mtime': mtime,
+        }
+        self.index['signs'].setdefault(sign, []).append(str(video))
+
+    def discard(self, video):
+        """Remove a video from the index (its rows become unused)"""
+        entry = self.index['videos'].pop(str(video), None)
+        if entry is None:
+            return
+        videos = self.index['signs'].get(entry['sign'], [])
+        if str(video) in videos:
+            videos.remove(str(video))
+        if not videos:
+            self.index['signs'].pop(entry['sign'], None)
+
+    def _sync(self):
+        self._shard_file.flush()
+        os.fsync(self._shard_file.fileno())
+
+    def commit(self):
+        """Write the index, once the appended rows are on disk"""
+        if self.mode != 'a':
+            return
+        if self._shard_file is not None:
+            self._sync()
+        self._save_index()
+
+    def close(self):
+        self.commit()
+        if self._shard_file is not None:
+            self._shard_file.close()
+            self._shard_file = None
+        self._memmaps.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()